@@ -0,0 +1,64 @@
+# bench_codec.py
+"""
+Encode/decode throughput of the JSON backends in codec.py on history
+shards of growing size, and the file size compact vs. the old indent=4.
+
+    python bench_codec.py [--entries 100 1000 10000] [--repeat 20]
+"""
+import argparse
+import json
+import random
+import time
+
+import codec
+
+DISHES = ["Poutine", "Chickpea Curry", "Crème brûlée", "Pad Thai", "Shakshuka", "Caesar Salad",
+          "Mapo Tofu", "Ratatouille", "Pho", "Chili sin carne"]
+
+
+def make_shard(entries, seed=0):
+    """A history shard as HistoryService writes it."""
+    rng = random.Random(seed)
+    return {
+        "username": "user0",
+        "entries": [{
+            "recipe_id": f"{rng.getrandbits(64):016x}",
+            "dish_name": rng.choice(DISHES),
+            "timestamp": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+            "substitutions": [["butter", "olive oil"]] if rng.random() < 0.2 else [],
+        } for _ in range(entries)],
+    }
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codecs.")
+    parser.add_argument("--entries", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"backends installed: {', '.join(codec.available())}")
+    print(f"{'entries':>8} {'codec':>7} {'compact':>9} {'indent=4':>9} {'encode MB/s':>12} {'decode MB/s':>12}")
+    for n in args.entries:
+        shard = make_shard(n)
+        legacy = len(json.dumps(shard, indent=4).encode("utf-8"))
+        for name in codec.available():
+            backend = codec.make_codec(name)
+            data = backend.dumps(shard)
+            mb = len(data) / 1e6
+            encode = best_of(args.repeat, lambda: backend.dumps(shard))
+            decode = best_of(args.repeat, lambda: backend.loads(data))
+            print(f"{n:>8} {name:>7} {len(data) / 1024:>7.0f} K {legacy / 1024:>7.0f} K "
+                  f"{mb / encode:>12.0f} {mb / decode:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_packed.py
+"""
+Worker start-up time and private memory with and without a corpus pack.
+
+Each worker runs in a fresh interpreter, loads the corpus either by
+parsing recipes.json and building a RecipeIndex or by mapping the pack,
+runs a few searches and reports its private memory (Linux only; other
+platforms report peak RSS, which also counts shared pages).
+
+    python bench_packed.py [--recipes 100000] [--workers 4]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench_recommend import make_corpus
+from packed import pack_corpus
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_WORKER = r"""
+import json, sys, time
+t0 = time.perf_counter()
+if sys.argv[1] == "pack":
+    from packed import PackedCorpus
+    corpus = PackedCorpus("corpus.pack")
+    recipes, index = corpus.recipes(), corpus.index()
+else:
+    from index import RecipeIndex
+    with open("recipes.json", "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+    index = RecipeIndex.build(recipes)
+startup = time.perf_counter() - t0
+for q in ["dish 123", "dish 99999", "nothing like this"]:
+    slot = index.search(q)
+    if slot is not None:
+        recipes[slot]
+
+private = None
+try:
+    with open("/proc/self/smaps_rollup") as f:
+        private = sum(int(line.split()[1]) for line in f if line.startswith("Private_"))
+except OSError:
+    import resource
+    private = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(startup, private)
+"""
+
+
+def _worker(cwd, mode):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", _WORKER, mode], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), int(out[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark corpus pack start-up and memory.")
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        recipes = make_corpus(args.recipes)
+        with open(os.path.join(tmp, "recipes.json"), "w", encoding="utf-8") as f:
+            json.dump(recipes, f)
+        pack_corpus(recipes, {}, os.path.join(tmp, "corpus.pack"))
+        size = os.path.getsize(os.path.join(tmp, "corpus.pack")) / 2 ** 20
+
+        print(f"corpus: {args.recipes} recipes, pack {size:.1f} MiB")
+        for mode in ("json", "pack"):
+            runs = [_worker(tmp, mode) for _ in range(args.workers)]
+            startup = max(t for t, _ in runs) * 1000
+            private = sum(m for _, m in runs) / 1024
+            print(f"{mode:>5}: start-up {startup:8.1f} ms, private memory for {args.workers} workers {private:8.1f} MiB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# bench_planner.py
+"""
+Latency of weekly meal plans over a synthetic corpus.
+
+    python bench_planner.py [--recipes 100000] [--plans 50]
+"""
+import argparse
+import statistics
+import time
+
+from bench_recommend import make_corpus
+from index import RecipeIndex
+from planner import MealPlanner, shopping_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark meal plan generation.")
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--plans", type=int, default=50)
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    recipes = make_corpus(args.recipes)
+    index = RecipeIndex.build(recipes)
+
+    prefs = [{"diet_mode": "none", "exclusions": []},
+             {"diet_mode": "vegetarian", "exclusions": []},
+             {"diet_mode": "vegan", "exclusions": ["peanut"]}]
+
+    # the first plan per preference set also builds its feasible list
+    planner = MealPlanner(recipes, index)
+    t0 = time.perf_counter()
+    for p in prefs:
+        planner.plan(p, args.days, seed=0)
+    cold = (time.perf_counter() - t0) * 1000 / len(prefs)
+
+    times = []
+    for i in range(args.plans):
+        t0 = time.perf_counter()
+        plan, _ = planner.plan(prefs[i % len(prefs)], args.days, seed=i)
+        shopping_list([recipes[slot] for day in plan for slot in day if slot is not None])
+        times.append((time.perf_counter() - t0) * 1000)
+
+    times.sort()
+    print(f"corpus: {args.recipes} recipes, {args.days} days x 3 meals")
+    print(f"first plan per preference set: {cold:.1f} ms")
+    print(f"plan + shopping list: p50 {statistics.median(times):.1f} ms, max {times[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
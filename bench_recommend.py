@@ -0,0 +1,69 @@
+# bench_recommend.py
+"""
+Latency of "more like this" recommendations over a synthetic corpus.
+
+    python bench_recommend.py [--recipes 100000] [--queries 200]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from index import RecipeIndex
+from recommender import Recommender
+
+INGREDIENTS = [
+    "chicken", "beef", "pork", "salmon", "shrimp", "tofu", "tempeh", "egg", "milk", "cheese",
+    "butter", "potato", "rice", "pasta", "bread", "lentil", "chickpea", "bean", "spinach", "kale",
+    "tomato", "onion", "garlic", "ginger", "carrot", "pepper", "mushroom", "zucchini", "eggplant",
+    "lemon", "lime", "basil", "cilantro", "parsley", "cumin", "paprika", "curry", "coconut",
+    "yogurt", "cream", "flour", "sugar", "honey", "oat", "almond", "peanut", "sesame", "soy",
+]
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    # a few hundred rarer ingredients make the vocabulary realistic
+    pool = INGREDIENTS + [f"{a}{b}" for a in ("red", "wild", "smoked", "dried") for b in INGREDIENTS]
+    return [{
+        "dish_name": f"Dish {i}",
+        "ingredients": [{"name": name, "quantity": ""} for name in rng.sample(pool, rng.randint(5, 14))],
+        "steps": [],
+    } for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recipe recommendations.")
+    parser.add_argument("--recipes", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--history", type=int, default=20, help="history recipes per query")
+    args = parser.parse_args()
+
+    recipes = make_corpus(args.recipes)
+
+    t0 = time.perf_counter()
+    index = RecipeIndex.build(recipes)
+    recommender = Recommender(recipes, index)
+    build = time.perf_counter() - t0
+
+    rng = random.Random(1)
+    prefs = [{"diet_mode": "none", "exclusions": []},
+             {"diet_mode": "vegetarian", "exclusions": []},
+             {"diet_mode": "vegan", "exclusions": ["peanut"]}]
+
+    times = []
+    for q in range(args.queries):
+        history = rng.sample(recipes, args.history)
+        t0 = time.perf_counter()
+        recommender.recommend(history, prefs[q % len(prefs)], k=10)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    times.sort()
+    print(f"corpus: {args.recipes} recipes, {len(recommender.vocab)} terms, "
+          f"{len(recommender.rows)} non-zeros, built in {build:.2f} s")
+    print(f"recommend (k=10, {args.history} history recipes): "
+          f"p50 {statistics.median(times):.1f} ms, p99 {times[int(len(times) * 0.99) - 1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_snapshot.py
+"""
+Cold vs warm RecipeService start-up, and resident memory afterwards.
+
+Each start runs in a fresh interpreter inside a temporary data/ folder.
+The cold start parses recipes.json, builds the index and writes the
+snapshot (data/snapshots/recipes.json.pack); the warm start checks the
+snapshot against the source fingerprints and maps it. Both then serve
+recipe bodies from the pack; RECIPE_SNAPSHOTS=0 keeps everything parsed
+in memory, for comparison. Memory is VmRSS (Linux only; 0 elsewhere).
+
+    python bench_snapshot.py [--recipes 200000] [--runs 3]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench_recommend import make_corpus
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_START = r"""
+import gc, time
+t0 = time.perf_counter()
+from services import RecipeService
+service = RecipeService()
+service.findRecipe("dish 1")
+startup = time.perf_counter() - t0
+gc.collect()
+rss = 0
+try:
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+except OSError:
+    pass
+print(startup, rss, type(service.recipes).__name__)
+"""
+
+
+def _start(cwd, snapshots="1"):
+    env = dict(os.environ, PYTHONPATH=ROOT, RECIPE_SNAPSHOTS=snapshots)
+    out = subprocess.run([sys.executable, "-c", _START], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), int(out[1]) / 1024, out[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold vs warm RecipeService start-up.")
+    parser.add_argument("--recipes", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        data = os.path.join(tmp, "data")
+        os.makedirs(data)
+        with open(os.path.join(data, "recipes.json"), "w", encoding="utf-8") as f:
+            json.dump(make_corpus(args.recipes), f)
+        with open(os.path.join(data, "substitutions.json"), "w", encoding="utf-8") as f:
+            json.dump({}, f)
+
+        print(f"corpus: {args.recipes} recipes")
+        memory = [_start(tmp, snapshots="0") for _ in range(args.runs)]
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(os.path.join(data, "snapshots"), ignore_errors=True)
+            cold.append(_start(tmp))
+        warm = [_start(tmp) for _ in range(args.runs)]
+
+        for label, runs in (("in-memory", memory), ("cold", cold), ("warm", warm)):
+            startup = min(t for t, _, _ in runs) * 1000
+            rss = max(m for _, m, _ in runs)
+            print(f"{label:>9}: start-up {startup:8.1f} ms, resident {rss:7.1f} MiB (recipes in {runs[0][2]})")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
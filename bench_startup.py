@@ -0,0 +1,86 @@
+# bench_startup.py
+"""
+Time-to-first-prompt benchmark for the CLI.
+
+Runs main.py in a fresh interpreter against generated data directories of
+growing size and reports how long it takes until the login menu asks for
+input. With lazy services this should stay flat as the data grows.
+
+    python bench_startup.py [--sizes 0 10000 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_PROBE = r"""
+import builtins, sys, time
+t0 = time.perf_counter()
+import main
+
+def first_prompt(prompt=""):
+    sys.stderr.write(f"{time.perf_counter() - t0:.6f} {'requests' in sys.modules}\n")
+    return "0"
+
+builtins.input = first_prompt
+main.main()
+"""
+
+
+def _make_data(root, size):
+    data = os.path.join(root, "data")
+    os.makedirs(data)
+
+    recipes = [{
+        "dish_name": f"Dish {i}",
+        "ingredients": [{"name": f"Ingredient {j}", "quantity": "1 cup"} for j in range(8)],
+        "steps": [f"Step {j} of dish {i}." for j in range(5)],
+    } for i in range(size)]
+    users = {f"user{i}": {"password": "secret"} for i in range(size)}
+    prefs = {f"user{i}": {"diet_mode": "none", "exclusions": []} for i in range(size)}
+    history = {f"user{i}": [{"dish_name": f"Dish {i}", "ingredients": [], "steps": []}] for i in range(size)}
+
+    for name, payload in [("recipes.json", recipes), ("users.json", users),
+                          ("preferences.json", prefs), ("history.json", history),
+                          ("substitutions.json", {})]:
+        with open(os.path.join(data, name), "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+    shutil.copy(os.path.join(ROOT, "data", "diets.json"), data)
+
+
+def _run_once(cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True)
+    seconds, requests_loaded = proc.stderr.strip().splitlines()[-1].split()
+    return float(seconds), requests_loaded == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI time-to-first-prompt.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 10000, 100000],
+                        help="number of recipes/users/history entries to generate")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'median ms':>10} {'max ms':>10}  requests imported")
+    for size in args.sizes:
+        tmp = tempfile.mkdtemp()
+        try:
+            _make_data(tmp, size)
+            runs = [_run_once(tmp) for _ in range(args.repeat)]
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        times = [t * 1000 for t, _ in runs]
+        print(f"{size:>10} {statistics.median(times):>10.1f} {max(times):>10.1f}  {any(r for _, r in runs)}")
+
+
+if __name__ == "__main__":
+    main()
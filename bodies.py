@@ -0,0 +1,84 @@
+# bodies.py
+"""
+Recipe bodies (ingredients and steps) kept out of memory.
+
+A BodyFile is an append-only file of JSON records with an offset table in
+memory (8 bytes per record); a record is read back with one seek when it
+is needed. Records are never rewritten, so an offset handed out once
+stays valid and several snapshots of the corpus can share the file.
+
+BodyCache keeps the most recently decoded bodies, so a recipe that is
+shown, validated and saved to history is parsed once.
+"""
+import tempfile
+from array import array
+from collections import OrderedDict
+from threading import Lock
+
+import codec
+
+# Decoded recipe bodies kept per corpus.
+BODY_CACHE_SIZE = 256
+
+
+class BodyCache:
+    """Least-recently-used map of decoded bodies. Values must be treated as read-only."""
+
+    def __init__(self, size=BODY_CACHE_SIZE):
+        self.size = size
+        self._bodies = OrderedDict()  # key -> body, least recently used first
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._bodies)
+
+    def get(self, key, load):
+        """The cached body for key, or load() stored under key."""
+        with self._lock:
+            if key in self._bodies:
+                self._bodies.move_to_end(key)
+                self.hits += 1
+                return self._bodies[key]
+        body = load()
+        with self._lock:
+            self.misses += 1
+            self._bodies[key] = body
+            while len(self._bodies) > self.size:
+                self._bodies.popitem(last=False)
+        return body
+
+
+class BodyFile:
+    """
+    Append-only file of JSON records, in an anonymous temporary file that
+    disappears with the process.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("Q", [0])
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, record) -> int:
+        """Write record at the end of the file; returns its record number."""
+        data = codec.dumps(record)
+        with self._lock:
+            self._file.seek(self._offsets[-1])
+            self._file.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+            return len(self._offsets) - 2
+
+    def read(self, i: int):
+        with self._lock:
+            start, end = self._offsets[i], self._offsets[i + 1]
+            self._file.seek(start)
+            data = self._file.read(end - start)
+        return codec.loads(data)
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,369 @@
+# bulk.py
+"""
+Bulk import/export of recipe dumps.
+
+    python bulk.py import dump.jsonl [--format csv] [--replace] [--workers 4]
+    python bulk.py export dump.jsonl [--format csv]
+
+Dumps are streamed in bounded chunks: rows are validated and normalized
+in a process pool, deduplicated against the corpus (by Spoonacular id and
+normalized name) and written straight to the output file while the search
+and feasibility indexes are built in the same pass. Importing into the
+app's corpus writes its pack (packed.py) from those indexes, so the next
+start does not parse recipes.json again.
+
+The recipes RecipeService ingested from the API since recipes.json was
+last written (journal.py) are part of the corpus: export includes them
+and import folds them into the new recipes.json.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import codec
+import journal
+import snapshot
+from index import RecipeIndex, match_data
+from packed import CORPUS_SOURCES, PACK_PATH, RECIPES_PATH, SUBSTITUTIONS_PATH, pack_records
+
+CSV_FIELDS = ["dish_name", "spoonacular_id", "ingredients", "steps"]
+
+
+# -----------------------------------------------------------
+# READERS
+# -----------------------------------------------------------
+
+def iter_json_array(path, buffer_size=1 << 16):
+    """Stream the objects of a top-level JSON array without loading the whole file."""
+    # the stdlib decoder, as codec's backends cannot parse one value off the front of a buffer
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        started = False
+        eof = False
+        while True:
+            buf = buf.lstrip(" \t\r\n,")
+            if not started and buf:
+                if buf[0] != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                buf = buf[1:]
+                started = True
+                continue
+            if buf.startswith("]"):
+                return
+            if buf:
+                try:
+                    obj, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    yield obj
+                    buf = buf[end:]
+                    continue
+            if eof:
+                return
+            chunk = f.read(buffer_size)
+            eof = not chunk
+            buf += chunk
+
+
+def _iter_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def _iter_csv(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def _iter_rows(path, fmt):
+    if fmt == "jsonl":
+        return _iter_jsonl(path)
+    if fmt == "csv":
+        return _iter_csv(path)
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -----------------------------------------------------------
+# VALIDATION (runs in worker processes)
+# -----------------------------------------------------------
+
+def _dumps(obj) -> str:
+    return codec.dumps(obj).decode("utf-8")
+
+
+def _clean(text) -> str:
+    return " ".join(str(text).split())
+
+
+def _amount(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return float(value)
+
+
+def _csv_list(value):
+    value = (value or "").strip()
+    if value.startswith("["):
+        return codec.loads(value)
+    return [part for part in value.split(";") if part.strip()]
+
+
+def normalize_recipe(raw: dict):
+    """
+    Validate one raw recipe and return it in the corpus format, or raise
+    ValueError explaining why it was rejected.
+    """
+    name = _clean(raw.get("dish_name") or "")
+    if not name:
+        raise ValueError("missing dish_name")
+
+    ingredients = []
+    for ing in raw.get("ingredients") or []:
+        if isinstance(ing, str):
+            ing = {"name": ing}
+        if not isinstance(ing, dict) or not _clean(ing.get("name") or ""):
+            raise ValueError(f"bad ingredient in {name!r}")
+        cleaned = {
+            "name": _clean(ing["name"]),
+            "quantity": _clean(ing.get("quantity") or ""),
+        }
+        # kept when present, so recipes need not be canonicalized again on load
+        if ing.get("canonical"):
+            cleaned["canonical"] = _clean(ing["canonical"])
+        if "amount" in ing:
+            cleaned["amount"] = _amount(ing["amount"])
+        if "unit" in ing:
+            cleaned["unit"] = _clean(ing["unit"] or "")
+        ingredients.append(cleaned)
+    if not ingredients:
+        raise ValueError(f"no ingredients in {name!r}")
+
+    steps = raw.get("steps") or []
+    if isinstance(steps, str):
+        steps = steps.splitlines()
+    steps = [_clean(s) for s in steps if _clean(s)]
+
+    recipe = {"dish_name": name}
+    recipe_id = raw.get("spoonacular_id")
+    if recipe_id not in (None, ""):
+        recipe["spoonacular_id"] = int(recipe_id)
+    recipe["ingredients"] = ingredients
+    recipe["steps"] = steps
+    return recipe
+
+
+def _process_chunk(rows, fmt):
+    """
+    Parse, validate and precompute index data for a chunk of rows.
+    Returns (accepted, rejected) where accepted holds (json_text, match).
+    """
+    accepted = []
+    rejected = 0
+    for row in rows:
+        try:
+            if fmt == "jsonl":
+                raw = codec.loads(row)
+            else:
+                raw = dict(row, ingredients=_csv_list(row.get("ingredients")),
+                           steps=_csv_list(row.get("steps")))
+            recipe = normalize_recipe(raw)
+        except (ValueError, TypeError, AttributeError):
+            rejected += 1
+            continue
+        accepted.append((_dumps(recipe), match_data(recipe)))
+    return accepted, rejected
+
+
+# -----------------------------------------------------------
+# IMPORT
+# -----------------------------------------------------------
+
+def import_recipes(src, fmt="jsonl", out=RECIPES_PATH, replace=False,
+                   workers=None, chunk_size=5000, journal_path=None, pack_path=None):
+    """
+    Stream recipes from src into out (a JSON array, one recipe per line).
+    Unless replace is set, the existing corpus at out, followed by the
+    recipes in journal_path, is kept and new recipes are appended after
+    it. The journal is emptied either way. With pack_path, the new corpus
+    is also packed there (with the substitutions and diets it is served
+    with).
+
+    Returns (stats, index) where index is the RecipeIndex of the new corpus.
+    """
+    stats = {"read": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+    index = RecipeIndex()
+    slot = 0
+    records = [] if pack_path else None
+    ingested, journal_size = journal.read(journal_path) if journal_path else ([], 0)
+
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+
+        def emit(text, match):
+            nonlocal slot
+            f.write(",\n" if slot else "\n")
+            f.write(text)
+            if records is not None:
+                records.append(text)
+            index.add(slot, None, match)
+            slot += 1
+
+        if not replace:
+            existing = iter_json_array(out) if os.path.exists(out) else ()
+            for recipe in chain(existing, ingested):
+                match = match_data(recipe)
+                if index.lookup(recipe, match) is None:
+                    emit(_dumps(recipe), match)
+
+        def apply(result):
+            accepted, rejected = result
+            stats["read"] += len(accepted) + rejected
+            stats["invalid"] += rejected
+            for text, match in accepted:
+                if index.lookup(None, match) is not None:
+                    stats["duplicates"] += 1
+                    continue
+                emit(text, match)
+                stats["imported"] += 1
+
+        chunks = _chunks(_iter_rows(src, fmt), chunk_size)
+        if workers == 1:
+            for chunk in chunks:
+                apply(_process_chunk(chunk, fmt))
+        else:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # keep a bounded number of chunks in flight so memory stays flat
+                limit = 2 * workers
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_process_chunk, chunk, fmt))
+                    if len(pending) >= limit:
+                        apply(pending.popleft().result())
+                while pending:
+                    apply(pending.popleft().result())
+
+        f.write("\n]\n")
+
+    os.replace(tmp, out)
+    if journal_path:
+        journal.clear(journal_size, journal_path)
+    if pack_path:
+        _pack(records, index, pack_path, sources=(out,) + CORPUS_SOURCES[1:])
+    return stats, index
+
+
+def _pack(records, index, pack_path, sources):
+    head = snapshot.header(sources)  # before the substitutions are read
+    try:
+        subs = codec.load(SUBSTITUTIONS_PATH)
+    except (OSError, ValueError):
+        subs = {}
+    try:
+        pack_records(records, subs, index, pack_path, head=head)
+    except OSError:
+        pass  # RecipeService packs the corpus itself on its next (cold) start
+
+
+# -----------------------------------------------------------
+# EXPORT
+# -----------------------------------------------------------
+
+def export_recipes(dest, fmt="jsonl", src=RECIPES_PATH, journal_path=None):
+    """Stream the corpus at src, then the recipes in journal_path, into dest. Returns the number of recipes written."""
+    count = 0
+    with open(dest, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+        elif fmt != "jsonl":
+            raise ValueError(f"Unknown format: {fmt}")
+
+        ingested = journal.read(journal_path)[0] if journal_path else []
+        for recipe in journal.merge(iter_json_array(src), ingested):
+            if fmt == "jsonl":
+                f.write(_dumps(recipe) + "\n")
+            else:
+                writer.writerow({
+                    "dish_name": recipe.get("dish_name", ""),
+                    "spoonacular_id": recipe.get("spoonacular_id", ""),
+                    "ingredients": _dumps(recipe.get("ingredients", [])),
+                    "steps": _dumps(recipe.get("steps", [])),
+                })
+            count += 1
+    return count
+
+
+def _journal_for(corpus_path):
+    # the ingest journal belongs to the app's own corpus only
+    return journal.JOURNAL_PATH if corpus_path == RECIPES_PATH else None
+
+
+def _pack_for(corpus_path):
+    # so is the pack RecipeService starts from
+    return PACK_PATH if corpus_path == RECIPES_PATH and snapshot.enabled() else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk recipe import/export.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="import a JSON-lines or CSV dump into the corpus")
+    imp.add_argument("src")
+    imp.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    imp.add_argument("--out", default=RECIPES_PATH)
+    imp.add_argument("--replace", action="store_true", help="discard the existing corpus")
+    imp.add_argument("--workers", type=int, default=None)
+    imp.add_argument("--chunk-size", type=int, default=5000)
+
+    exp = sub.add_parser("export", help="export the corpus as JSON-lines or CSV")
+    exp.add_argument("dest")
+    exp.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    exp.add_argument("--src", default=RECIPES_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        fmt = args.format or ("csv" if args.src.endswith(".csv") else "jsonl")
+        stats, index = import_recipes(args.src, fmt, out=args.out, replace=args.replace,
+                                      workers=args.workers, chunk_size=args.chunk_size,
+                                      journal_path=_journal_for(args.out), pack_path=_pack_for(args.out))
+        print(f"Read {stats['read']} rows: imported {stats['imported']}, "
+              f"skipped {stats['duplicates']} duplicates and {stats['invalid']} invalid. "
+              f"Corpus now holds {len(index)} recipes.")
+    else:
+        fmt = args.format or ("csv" if args.dest.endswith(".csv") else "jsonl")
+        count = export_recipes(args.dest, fmt, src=args.src, journal_path=_journal_for(args.src))
+        print(f"Exported {count} recipes to {args.dest}.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
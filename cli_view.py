@@ -1,5 +1,7 @@
 # cli_view.py
 
+from functools import cached_property
+
 from controllers import (
     AuthController,
     PreferencesController,
@@ -12,19 +14,53 @@ from views import (
     RecipeView,
     HistoryView
 )
+from warmer import WARM_INTERVAL, CacheWarmer
 
 class CLI:
 
-    def __init__(self):
-        self.auth = AuthController()
-        self.pref = PreferencesController()
-        self.recipe_ctrl = RecipeController()
-        self.history = HistoryController()
-        
-        self.auth_view = AuthView(self.auth)
-        self.pref_view = PreferencesView(self.pref)
-        self.recipe_view = RecipeView(self.recipe_ctrl, self.history)
-        self.history_view = HistoryView(self.history) 
+    # Controllers and views are built on first use so the login menu
+    # appears without loading any data file.
+    @cached_property
+    def auth(self):
+        return AuthController()
+
+    @cached_property
+    def pref(self):
+        return PreferencesController()
+
+    @cached_property
+    def recipe_ctrl(self):
+        return RecipeController()
+
+    @cached_property
+    def history(self):
+        return HistoryController()
+
+    @cached_property
+    def auth_view(self):
+        return AuthView(self.auth)
+
+    @cached_property
+    def pref_view(self):
+        return PreferencesView(self.pref)
+
+    @cached_property
+    def recipe_view(self):
+        return RecipeView(self.recipe_ctrl, self.history)
+
+    @cached_property
+    def history_view(self):
+        return HistoryView(self.history)
+
+    @cached_property
+    def warmer(self):
+        return CacheWarmer(self.recipe_ctrl.service)
+
+    def startWarmer(self):
+        # built here on the main thread: cached_property does not lock (Python 3.12+), and a
+        # second thread could build a second RecipeService writing the same cache file
+        if WARM_INTERVAL > 0:
+            self.warmer.start()
 
     # ---------------------------------------------------------
     # LOGIN SCREEN
@@ -54,6 +90,7 @@ class CLI:
     # ---------------------------------------------------------
     def dashboard(self):
         user = self.auth.current_user
+        self.startWarmer()
         while True:
             prefs = self.pref.getPreferences(user)
 
@@ -61,6 +98,9 @@ class CLI:
             print("1) Generate recipe")
             print("2) Manage preferences")
             print("3) View history")
+            print("4) Recommended for you")
+            print("5) Cook with what I have")
+            print("6) Weekly meal plan")
             print("0) Logout")
 
             choice = input("Choose: ")
@@ -71,7 +111,22 @@ class CLI:
                 self.managePreferences(user)
             elif choice == "3":
                 self.history_view.showHistory(user)
+            elif choice == "4":
+                self.recipe_view.showRecommendations(user, prefs)
+            elif choice == "5":
+                self.recipe_view.showPantrySearch(prefs)
+            elif choice == "6":
+                self.recipe_view.showMealPlan(user, prefs)
             elif choice == "0":
+                if "warmer" in vars(self):
+                    report = self.warmer.report()
+                    print(f"Cache warmer: {report['warm_set']} queries kept warm, "
+                          f"{report['hits']} lookups served from the cache.")
+                if "service" in vars(self.recipe_ctrl):
+                    usage = self.recipe_ctrl.apiUsage()
+                    if usage["calls"]:
+                        print(f"Recipe API: {usage['calls']} calls ({usage['points']:g} points) over "
+                              f"{len(usage['keys'])} key(s), {usage['left']:g} points left today.")
                 print("Logging out...\n")
                 return
             else:
@@ -0,0 +1,138 @@
+# codec.py
+"""
+JSON encoding for everything the app writes to disk.
+
+The fastest installed backend is used: orjson, then ujson, then the
+standard library's json. RECIPE_JSON_CODEC=orjson|ujson|json picks one
+explicitly. Output is UTF-8 and compact (no indentation or spaces after
+separators); files written with dump() are indented for reading by eye
+with
+
+    set RECIPE_JSON_PRETTY=1
+
+Every backend reads what the others write, so switching is safe.
+
+    python bench_codec.py         (encode/decode throughput per backend)
+"""
+import json
+import os
+
+BACKENDS = ("orjson", "ujson", "json")
+
+
+class _StdlibCodec:
+    name = "json"
+
+    def dumps(self, obj, pretty=False) -> bytes:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class _OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj, pretty=False) -> bytes:
+        return self._orjson.dumps(obj, option=self._orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class _UjsonCodec:
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj, pretty=False) -> bytes:
+        return self._ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                                 indent=2 if pretty else 0).encode("utf-8")
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+_CODECS = {"orjson": _OrjsonCodec, "ujson": _UjsonCodec, "json": _StdlibCodec}
+
+
+def make_codec(name: str):
+    """The codec for a backend name; ImportError if that backend is not installed."""
+    if name not in _CODECS:
+        raise ValueError(f"Unknown JSON codec: {name} (choose from {', '.join(BACKENDS)})")
+    return _CODECS[name]()
+
+
+def available() -> list:
+    """Names of the installed backends, fastest first."""
+    names = []
+    for name in BACKENDS:
+        try:
+            make_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def codec_from_env():
+    """RECIPE_JSON_CODEC if set, else the first installed of BACKENDS."""
+    name = os.environ.get("RECIPE_JSON_CODEC")
+    if name:
+        return make_codec(name.lower())
+    return make_codec(available()[0])
+
+
+_codec = None
+
+
+def get_codec():
+    global _codec
+    if _codec is None:
+        _codec = codec_from_env()
+    return _codec
+
+
+def set_codec(codec):
+    """Replace the process-wide codec (None: choose from the environment again)."""
+    global _codec
+    _codec = codec
+
+
+def pretty_from_env() -> bool:
+    return os.environ.get("RECIPE_JSON_PRETTY", "0") not in ("", "0")
+
+
+# -----------------------------------------------------------
+# ENCODING
+# -----------------------------------------------------------
+
+def dumps(obj, pretty=False) -> bytes:
+    """obj as UTF-8 JSON, compact unless pretty."""
+    return get_codec().dumps(obj, pretty)
+
+
+def loads(data):
+    """Parse JSON from bytes or str."""
+    return get_codec().loads(data)
+
+
+def dump(obj, path: str, pretty=None):
+    """Write obj to path; pretty=None follows RECIPE_JSON_PRETTY."""
+    data = dumps(obj, pretty_from_env() if pretty is None else pretty)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load(path: str):
+    """Parse a JSON file. OSError and ValueError propagate."""
+    with open(path, "rb") as f:
+        return loads(f.read())
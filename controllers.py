@@ -1,6 +1,6 @@
 # controllers.py
-import json
-from scraper import RecipeScraper
+from functools import cached_property
+
 from services import (
     AuthService,
     PreferencesService,
@@ -8,6 +8,7 @@ from services import (
     HistoryService
 )
 from models import RecipeRequest
+from tracing import traced
 
 # -----------------------------------------------------------
 # AUTH CONTROLLER
@@ -15,8 +16,10 @@ from models import RecipeRequest
 
 class AuthController:
 
-    def __init__(self):
-        self.service = AuthService()
+    # Services load their JSON files, so they are only built on first use.
+    @cached_property
+    def service(self):
+        return AuthService()
 
     def handleRegistration(self, username, password):
         return self.service.registerUser(username, password)
@@ -37,11 +40,15 @@ class AuthController:
 class PreferencesController:
 
     
-    def __init__(self):
-        self.service = PreferencesService()
+    @cached_property
+    def service(self):
+        return PreferencesService()
 
     def getPreferences(self, username):
         return self.service.viewPreferences(username)
+
+    def getDietModes(self):
+        return self.service.dietModes()
     
     def updatePreferences(self, username, diet_mode, exclusions):
         return self.service.updatePreferences(username, diet_mode, exclusions)
@@ -55,15 +62,31 @@ class PreferencesController:
 class HistoryController:
 
 
-    def __init__(self):
-        self.service = HistoryService()
+    @cached_property
+    def service(self):
+        return HistoryService()
 
-    def addEntry(self, username, recipe: dict):
-        self.service.addEntry(username, recipe)
+    def addEntry(self, username, recipe: dict, substitutions=None):
+        self.service.addEntry(username, recipe, substitutions)
 
     def getHistory(self, username):
         return self.service.getHistory(username)
 
+    def getRecipe(self, entry: dict):
+        return self.service.getRecipe(entry)
+
+    def getPage(self, username, page=1, page_size=10):
+        return self.service.getPage(username, page, page_size)
+
+    def getEntriesBetween(self, username, start=None, end=None):
+        return self.service.getEntriesBetween(username, start, end)
+
+    def topDishes(self, username, n=10):
+        return self.service.topDishes(username, n)
+
+    def getStats(self, username):
+        return self.service.getStats(username)
+
 # -----------------------------------------------------------
 # RECIPE CONTROLLER
 # -----------------------------------------------------------
@@ -74,8 +97,9 @@ class RecipeController:
     Delegates all recipe-related logic to RecipeService.
     """
 
-    def __init__(self):
-        self.service = RecipeService()
+    @cached_property
+    def service(self):
+        return RecipeService()
 
     def findRecipe(self, dish_name: str):
         return self.service.findRecipe(dish_name)
@@ -83,10 +107,35 @@ class RecipeController:
     def checkFeasibility(self, recipe: dict, preferences: dict):
         return self.service.validateRecipe(recipe, preferences)
 
-    def generateCompliantRecipe(self, dish_name: str, preferences: dict):
+    @traced("RecipeController.generateCompliantRecipe")
+    def generateCompliantRecipe(self, dish_name: str, preferences: dict, budget=None):
         req = RecipeRequest(
             dish_name=dish_name,
             diet_mode=preferences.get("diet_mode", "none"),
             exclusions=preferences.get("exclusions", []),
+            budget=budget,
         )
         return self.service.generateCompliantRecipe(req)
+
+    def apiUsage(self):
+        """Quota metrics of the recipe API keys (see keypool.py)."""
+        return self.service.scraper.keys.metrics()
+
+    def findByIngredients(self, on_hand, preferences: dict, limit=10):
+        return self.service.findByIngredients(on_hand, preferences, limit)
+
+    def recommendRecipes(self, history_recipes, preferences: dict, k=5):
+        try:
+            recommendations = self.service.recommendRecipes(history_recipes, preferences, k)
+        except ImportError:
+            return {
+                "success": False,
+                "message": "Recommendations need numpy (pip install numpy)."
+            }
+        return {
+            "success": True,
+            "recommendations": recommendations
+        }
+
+    def planMeals(self, preferences: dict, days=7, meals_per_day=3, recent_recipes=()):
+        return self.service.planMeals(preferences, days, meals_per_day, recent_recipes)
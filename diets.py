@@ -0,0 +1,143 @@
+# diets.py
+"""
+Diet rules, read from data/diets.json.
+
+The file names ingredient categories (lists of canonical terms) and diets
+that exclude categories, optionally inheriting another diet's exclusions:
+
+    "categories": {"dairy": {"terms": ["milk", "butter"], "except": ["peanut butter"]}, ...},
+    "diets": {"vegan": {"inherits": ["vegetarian"], "excludes": ["egg", "dairy"]}, ...}
+
+An ingredient containing one of a category's "except" terms does not
+count for that category (peanut butter is not dairy).
+
+Compiling gives every category a bit and every diet the mask of the
+categories it excludes. An ingredient's categories are found with one
+dict lookup per term id, so a recipe is checked against all diets at
+once: it fits a diet when its category mask and the diet's mask share
+no bit. Adding a diet is an edit to the file; restart to pick it up.
+
+The file is read on the first diet check (taxonomy()), not on import, so
+starting the app reads no data file. Without the file there are no diets.
+"""
+import threading
+
+import codec
+from ingredients import canonical_name, ingredient_id, ingredient_ids
+
+DIETS_PATH = "data/diets.json"
+
+# RecipeIndex.diet_flags keeps one bit per diet in a 32-bit array.
+MAX_DIETS = 32
+
+
+class DietTaxonomy:
+
+    def __init__(self, spec: dict):
+        categories = spec.get("categories", {})
+        diets = spec.get("diets", {})
+        if len(diets) > MAX_DIETS:
+            raise ValueError(f"at most {MAX_DIETS} diets are supported, got {len(diets)}")
+
+        self._terms = []        # (canonical term, id, category bit) in file order
+        self._term_mask = {}    # term id -> bits of the categories containing it
+        self._except_mask = {}  # term id -> bits of the categories it exempts an ingredient from
+        bits = {}
+        for i, (category, rules) in enumerate(categories.items()):
+            bit = bits[category] = 1 << i
+            for term in rules.get("terms", []):
+                canonical = canonical_name(term)
+                tid = ingredient_id(canonical)
+                self._terms.append((canonical, tid, bit))
+                self._term_mask[tid] = self._term_mask.get(tid, 0) | bit
+            for term in rules.get("except", []):
+                tid = ingredient_id(canonical_name(term))
+                self._except_mask[tid] = self._except_mask.get(tid, 0) | bit
+
+        def excluded(diet, seen):
+            if diet in seen:
+                raise ValueError(f"diet {diet!r} inherits from itself")
+            if diet not in diets:
+                raise ValueError(f"unknown diet {diet!r}")
+            mask = 0
+            for category in diets[diet].get("excludes", []):
+                if category not in bits:
+                    raise ValueError(f"diet {diet!r} excludes unknown category {category!r}")
+                mask |= bits[category]
+            for parent in diets[diet].get("inherits", []):
+                mask |= excluded(parent, seen | {diet})
+            return mask
+
+        # diet -> mask of excluded categories, in file order
+        self.masks = {diet: excluded(diet, frozenset()) for diet in diets}
+        # one bit per diet in RecipeIndex.diet_flags; a set bit means the recipe fits that diet
+        self.bits = {diet: 1 << i for i, diet in enumerate(sorted(self.masks))}
+
+    @classmethod
+    def load(cls, path=DIETS_PATH) -> "DietTaxonomy":
+        return cls(codec.load(path))
+
+    def __contains__(self, diet) -> bool:
+        return diet in self.masks
+
+    @property
+    def diets(self) -> list:
+        """Diet names in file order."""
+        return list(self.masks)
+
+    def _ingredientMask(self, ids) -> int:
+        hit = exempt = 0
+        for tid in ids:
+            hit |= self._term_mask.get(tid, 0)
+            exempt |= self._except_mask.get(tid, 0)
+        return hit & ~exempt
+
+    def categoryMask(self, ingredients) -> int:
+        """Bits of the categories a recipe's ingredients (dicts or Ingredient objects) fall in."""
+        mask = 0
+        for ing in ingredients:
+            mask |= self._ingredientMask(ingredient_ids(ing))
+        return mask
+
+    def flags(self, ingredients) -> int:
+        """Bitmask (see bits) of the diets a recipe's ingredients fit."""
+        mask = self.categoryMask(ingredients)
+        return sum(bit for diet, bit in self.bits.items() if not mask & self.masks[diet])
+
+    def violation(self, ingredients, diet):
+        """The first term that keeps the ingredients out of diet, or None (also for unknown diets)."""
+        mask = self.masks.get(diet, 0)
+        if not self.categoryMask(ingredients) & mask:
+            return None
+        for ing in ingredients:
+            ids = ingredient_ids(ing)
+            bad = self._ingredientMask(ids) & mask
+            if bad:
+                for term, tid, bit in self._terms:
+                    if bit & bad and tid in ids:
+                        return term
+        return None
+
+
+_taxonomy = None
+_lock = threading.Lock()
+
+
+def taxonomy() -> DietTaxonomy:
+    """The taxonomy in DIETS_PATH, read on first use; an empty one if the file does not exist."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _lock:
+            if _taxonomy is None:
+                try:
+                    _taxonomy = DietTaxonomy.load()
+                except FileNotFoundError:
+                    _taxonomy = DietTaxonomy({})
+    return _taxonomy
+
+
+def __getattr__(name):
+    # TAXONOMY is taxonomy(), loaded when first used rather than on import
+    if name == "TAXONOMY":
+        return taxonomy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,199 @@
+# fake_server.py
+"""
+A tiny local stand-in for the two Spoonacular endpoints used by
+RecipeScraper, serving recipes from a JSON file.
+
+    python fake_server.py --port 8765
+    SPOONACULAR_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Matches the first number of a quantity such as "500 g" or "1.5 cups".
+_AMOUNT = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(.*)$")
+
+# Spoonacular's free plan allows 150 points per day.
+DAILY_QUOTA = 150.0
+
+
+def _to_api_recipe(recipe_id: int, recipe: dict) -> dict:
+    """Convert a local recipe dict into Spoonacular's /information shape."""
+    ingredients = []
+    for ing in recipe.get("ingredients", []):
+        name = ing.get("name", "")
+        quantity = ing.get("quantity") or ""
+        match = _AMOUNT.match(quantity)
+        amount, unit = (float(match.group(1)), match.group(2)) if match else (1.0, quantity)
+        ingredients.append({
+            "original": f"{quantity} {name}".strip(),
+            "name": name.lower(),
+            "amount": amount,
+            "unit": unit,
+        })
+
+    return {
+        "id": recipe_id,
+        "title": recipe.get("dish_name", ""),
+        "extendedIngredients": ingredients,
+        "analyzedInstructions": [{
+            "name": "",
+            "steps": [
+                {"number": i, "step": step}
+                for i, step in enumerate(recipe.get("steps", []), 1)
+            ],
+        }],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    server_version = "FakeSpoonacular/1.0"
+
+    def do_GET(self):
+        fake = self.server.fake
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        key = params.get("apiKey")
+        if not key:
+            return self._send(401, {"status": "failure", "code": 401,
+                                    "message": "You are not authorized."})
+        if fake.quota_used[key] >= fake.daily_quota:
+            return self._send(402, {"status": "failure", "code": 402,
+                                    "message": f"Your daily points limit of {fake.daily_quota:g} has been reached."},
+                              key, cost=0)
+
+        if url.path == "/recipes/complexSearch":
+            return self._send(200, fake.search(params.get("query", ""), int(params.get("number", 10))), key)
+
+        match = re.fullmatch(r"/recipes/(\d+)/information", url.path)
+        if match:
+            info = fake.information(int(match.group(1)))
+            if info is None:
+                return self._send(404, {"status": "failure", "code": 404,
+                                        "message": "A recipe with the given id does not exist."}, key)
+            return self._send(200, info, key)
+
+        self._send(404, {"status": "failure", "code": 404, "message": "Not found."}, key)
+
+    def _send(self, status, body, key=None, cost=1):
+        """Send body; every call costs its key one point of its daily quota, like on the real API."""
+        fake = self.server.fake
+        payload = json.dumps(body).encode("utf-8")
+        with fake.lock:
+            fake.quota_used[key] += cost
+            used = fake.quota_used[key]
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-API-Quota-Request", f"{cost:g}")
+        self.send_header("X-API-Quota-Used", f"{used:g}")
+        self.send_header("X-API-Quota-Left", f"{max(fake.daily_quota - used, 0):g}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSpoonacularServer:
+    """
+    Serves /recipes/complexSearch and /recipes/{id}/information on localhost.
+    Recipe ids are positions in the given list, starting at 1. Each
+    apiKey gets daily_quota points; calls past that are answered with 402.
+    """
+
+    def __init__(self, recipes=None, host="127.0.0.1", port=0, latency=0.0, daily_quota=DAILY_QUOTA):
+        if recipes is None:
+            with open("data/recipes.json", "r", encoding="utf-8") as f:
+                recipes = json.load(f)
+
+        self.recipes = list(recipes)
+        self.latency = latency
+        self.daily_quota = daily_quota
+        self.quota_used = Counter()  # apiKey -> points used today
+        self.lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search(self, query: str, number: int):
+        q = query.lower().strip()
+        results = [
+            {"id": i, "title": r.get("dish_name", ""), "imageType": "jpg"}
+            for i, r in enumerate(self.recipes, 1)
+            if q in r.get("dish_name", "").lower()
+        ]
+        return {
+            "results": results[:number],
+            "offset": 0,
+            "number": number,
+            "totalResults": len(results),
+        }
+
+    def information(self, recipe_id: int):
+        if recipe_id < 1 or recipe_id > len(self.recipes):
+            return None
+        return _to_api_recipe(recipe_id, self.recipes[recipe_id - 1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._thread:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Spoonacular API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recipes", default="data/recipes.json")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--daily-quota", type=float, default=DAILY_QUOTA, help="points per apiKey")
+    args = parser.parse_args()
+
+    with open(args.recipes, "r", encoding="utf-8") as f:
+        recipes = json.load(f)
+
+    server = FakeSpoonacularServer(recipes, host=args.host, port=args.port, latency=args.latency,
+                                   daily_quota=args.daily_quota)
+    print(f"Fake Spoonacular API listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# index.py
+import copy
+import heapq
+import re
+from array import array
+from collections import Counter
+from itertools import combinations
+
+from diets import taxonomy
+from ingredients import canonical_name, excluded_by
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def __getattr__(name):
+    # DIET_BITS: one bit per diet in RecipeIndex.diet_flags; a set bit means the recipe fits that diet.
+    # Looked up on access, so importing the index does not read the diet file.
+    if name == "DIET_BITS":
+        return taxonomy().bits
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def diet_bit(diet: str):
+    """The DIET_BITS bit of diet, or None for "none" and unknown diets."""
+    return taxonomy().bits.get(diet)
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace: 'Poutine!' -> 'poutine'."""
+    return " ".join(_WORD.findall((name or "").lower()))
+
+
+def ingredient_words(name: str) -> frozenset:
+    """Words of an ingredient's canonical name: 'Potatoes (for fries)' -> {'potato'}."""
+    return frozenset(canonical_name(name).split())
+
+
+def diet_flags(ingredients) -> int:
+    """Bitmask of the diets (see DIET_BITS) a list of ingredient dicts satisfies."""
+    return taxonomy().flags(ingredients)
+
+
+def match_data(recipe: dict):
+    """
+    Everything the index needs to know about a recipe, as a small picklable
+    tuple so it can be computed in worker processes.
+    """
+    name = recipe.get("dish_name", "")
+    return (
+        name.lower(),
+        normalize_name(name),
+        tuple(set(_WORD.findall(name.lower()))),
+        diet_flags(recipe.get("ingredients", [])),
+        recipe.get("spoonacular_id"),
+        tuple({
+            ingredient_words(ing.get("canonical") or ing.get("name", ""))
+            for ing in recipe.get("ingredients", [])
+        } - {frozenset()}),
+    )
+
+
+class RecipeIndex:
+    """
+    In-memory lookup structures over RecipeService.recipes.
+
+    Recipes are addressed by slot (their position in the recipe list).
+
+    fork() returns a copy that can be updated while readers keep using the
+    original: the tables are copied shallowly and a posting set is only
+    copied the first time the fork changes it. The original must not be
+    updated after forking.
+    """
+
+    _TABLES = ("by_name", "by_id", "tokens", "names", "diet_flags", "ingredient_ids",
+               "ingredient_words", "word_ingredients", "ingredient_slots", "ingredient_counts")
+
+    def __init__(self):
+        self.by_name = {}             # normalized dish name -> slot
+        self.by_id = {}               # spoonacular id -> slot
+        self.tokens = {}              # name token -> set of slots
+        self.names = {}               # slot -> lowercase dish name
+        self.diet_flags = array("I")  # slot -> DIET_BITS mask
+
+        # pantry search: each distinct ingredient (as its key words) gets an id
+        self.ingredient_ids = {}      # frozenset of words -> ingredient id
+        self.ingredient_words = []    # ingredient id -> frozenset of words
+        self.word_ingredients = {}    # word -> set of ingredient ids
+        self.ingredient_slots = {}    # ingredient id -> set of slots using it
+        self.ingredient_counts = {}   # slot -> number of distinct ingredients
+
+        self._cow = False             # posting sets may be shared with the index this was forked from
+        self._owned = set()           # (table, key) postings already copied since the fork
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, recipes):
+        index = cls()
+        for slot, recipe in enumerate(recipes):
+            index.add(slot, recipe)
+        return index
+
+    def add(self, slot: int, recipe: dict, match=None):
+        lower, norm, tokens, flags, recipe_id, ingredients = match or match_data(recipe)
+
+        self.names[slot] = lower
+        self.by_name.setdefault(norm, slot)
+        if recipe_id is not None:
+            self.by_id.setdefault(recipe_id, slot)
+
+        for token in tokens:
+            self._posting("tokens", token).add(slot)
+
+        if slot >= len(self.diet_flags):
+            self.diet_flags.extend([0] * (slot + 1 - len(self.diet_flags)))
+        self.diet_flags[slot] = flags
+
+        for words in ingredients:
+            self._posting("ingredient_slots", self._ingredient_id(words)).add(slot)
+        self.ingredient_counts[slot] = len(ingredients)
+
+    def _ingredient_id(self, words: frozenset) -> int:
+        iid = self.ingredient_ids.get(words)
+        if iid is None:
+            iid = self.ingredient_ids[words] = len(self.ingredient_words)
+            self.ingredient_words.append(words)
+            for word in words:
+                self._posting("word_ingredients", word).add(iid)
+        return iid
+
+    def _posting(self, table: str, key) -> set:
+        """The posting set for key, copied first if it is shared with the index this was forked from."""
+        postings = getattr(self, table)
+        posting = postings.setdefault(key, set())
+        if self._cow and (table, key) not in self._owned:
+            posting = postings[key] = set(posting)
+            self._owned.add((table, key))
+        return posting
+
+    def remove(self, slot: int, recipe: dict, match=None):
+        """Drop a recipe (as it was indexed) from every table."""
+        lower, norm, tokens, _, recipe_id, ingredients = match or match_data(recipe)
+
+        del self.names[slot]
+        self.diet_flags[slot] = 0
+        self.ingredient_counts.pop(slot, None)
+
+        for token in tokens:
+            posting = self._posting("tokens", token)
+            posting.discard(slot)
+            if not posting:
+                del self.tokens[token]
+
+        for words in ingredients:
+            iid = self.ingredient_ids.get(words)
+            if iid is not None:
+                self._posting("ingredient_slots", iid).discard(slot)
+
+        if recipe_id is not None and self.by_id.get(recipe_id) == slot:
+            del self.by_id[recipe_id]
+
+        if self.by_name.get(norm) == slot:
+            del self.by_name[norm]
+            # another recipe with the same name takes over, if any
+            words = _WORD.findall(lower)
+            if words and all(w in self.tokens for w in words):
+                same = [s for s in set.intersection(*(self.tokens[w] for w in words))
+                        if normalize_name(self.names[s]) == norm]
+                if same:
+                    self.by_name[norm] = min(same)
+
+    def fork(self):
+        clone = copy.copy(self)
+        for table in self._TABLES:
+            setattr(clone, table, copy.copy(getattr(self, table)))
+        clone._cow = True
+        clone._owned = set()
+        return clone
+
+    def lookup(self, recipe: dict, match=None):
+        """Return the slot of an already indexed copy of this recipe, or None."""
+        _, norm, _, _, recipe_id, _ = match or match_data(recipe)
+        if recipe_id is not None and recipe_id in self.by_id:
+            return self.by_id[recipe_id]
+        return self.by_name.get(norm)
+
+    def fits_diet(self, slot: int, diet: str) -> bool:
+        bit = diet_bit(diet)
+        return bit is None or bool(self.diet_flags[slot] & bit)
+
+    def search(self, query: str):
+        """
+        Return the slot of the first recipe whose name contains the query,
+        or None. An exact name match wins; otherwise whole-word postings
+        narrow the candidates, and a linear scan is only needed for
+        partial-word queries such as 'pout'.
+        """
+        dish = query.lower().strip()
+        if not dish:
+            return None
+
+        exact = self.by_name.get(normalize_name(dish))
+        if exact is not None:
+            return exact
+
+        words = _WORD.findall(dish)
+        if words and all(w in self.tokens for w in words):
+            candidates = set.intersection(*(self.tokens[w] for w in words))
+            for slot in sorted(candidates):
+                if dish in self.names[slot]:
+                    return slot
+
+        return self._scanNames(dish)
+
+    def similar(self, query: str, limit=5):
+        """
+        Slots of up to limit recipes sharing words with the query, most
+        shared words first, for when search() finds nothing: 'chicken
+        curry' -> 'Chickpea Curry'.
+        """
+        hits = Counter()
+        for word in set(_WORD.findall(query.lower())):
+            hits.update(self.tokens.get(word, ()))
+        return [slot for slot, _ in heapq.nsmallest(limit, hits.items(), key=lambda item: (-item[1], item[0]))]
+
+    def _scanNames(self, dish: str):
+        # slots are only ever appended, so dict order is slot order
+        for slot, name in self.names.items():
+            if dish in name:
+                return slot
+        return None
+
+    # ------------------------------
+    # PANTRY SEARCH
+    # ------------------------------
+    def coveredIngredients(self, on_hand) -> set:
+        """
+        Ids of the ingredients an on-hand list covers. An item covers an
+        ingredient when one's key words contain the other's: "potato" covers
+        "Potatoes (for fries)", and "cheddar cheese" covers "cheese".
+        """
+        covered = set()
+        for item in on_hand:
+            words = ingredient_words(item)
+            if not words:
+                continue
+
+            # ingredients with all of the item's words
+            if all(w in self.word_ingredients for w in words):
+                covered |= set.intersection(*(self.word_ingredients[w] for w in words))
+
+            # ingredients made only of the item's words (items are a few words long)
+            for size in range(1, len(words)):
+                for subset in combinations(words, size):
+                    iid = self.ingredient_ids.get(frozenset(subset))
+                    if iid is not None:
+                        covered.add(iid)
+        return covered
+
+    def excludedSlots(self, exclusions) -> set:
+        """Slots with an ingredient excluded by one of exclusions (see ingredients.excluded_by)."""
+        slots = set()
+        for iid, words in enumerate(self.ingredient_words):
+            if any(excluded_by(banned, words) for banned in exclusions):
+                slots |= self.ingredient_slots[iid]
+        return slots
+
+    def pantry(self, on_hand, diet="none", exclusions=(), limit=10):
+        """
+        Rank recipes by the fraction of their ingredients covered by on_hand,
+        then by fewest missing ingredients. Returns ([(slot, coverage)] best
+        first, set of covered ingredient ids).
+        """
+        covered = self.coveredIngredients(on_hand)
+
+        hits = Counter()
+        for iid in covered:
+            hits.update(self.ingredient_slots[iid])
+        if not hits:
+            return [], covered
+
+        excluded = self.excludedSlots(exclusions) if exclusions else set()
+        ranked = heapq.nsmallest(limit, (
+            (-count / self.ingredient_counts[slot], self.ingredient_counts[slot] - count, slot)
+            for slot, count in hits.items()
+            if slot not in excluded and self.fits_diet(slot, diet)
+        ))
+        return [(slot, -neg_coverage) for neg_coverage, _, slot in ranked], covered
@@ -0,0 +1,184 @@
+# ingredients.py
+"""
+Ingredient normalization: "2 cups shredded cheddar cheese" ->
+ParsedIngredient(amount=2.0, unit="cup", name="cheddar cheese").
+
+Canonical names are memoized and every canonical term gets a small int
+id, so matching an ingredient against an exclusion or a diet rule is a
+set lookup instead of a substring search over free text.
+"""
+import re
+from functools import lru_cache
+from threading import Lock
+from typing import NamedTuple, Optional
+
+_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4",
+    "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8", "⅕": "1/5",
+}
+
+_QUANTITY = re.compile(
+    r"^\s*(?P<whole>\d+(?:\.\d+)?(?![\d/]))?\s*(?:(?P<num>\d+)/(?P<den>\d+))?"
+    r"(?:\s*(?:-|–|to)\s*\d+(?:[./]\d+)?)?\s*"
+)
+
+_UNITS = {
+    "cup": "cup", "cups": "cup", "c": "cup",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsp": "tbsp", "tbs": "tbsp", "tbsps": "tbsp",
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsp": "tsp", "tsps": "tsp",
+    "g": "g", "gram": "g", "grams": "g", "gr": "g",
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+    "mg": "mg",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "pinch": "pinch", "pinches": "pinch", "dash": "dash", "dashes": "dash",
+    "clove": "clove", "cloves": "clove",
+    "can": "can", "cans": "can", "jar": "jar", "jars": "jar",
+    "package": "package", "packages": "package", "pkg": "package",
+    "slice": "slice", "slices": "slice", "stick": "stick", "sticks": "stick",
+    "head": "head", "heads": "head", "bunch": "bunch", "bunches": "bunch",
+    "handful": "handful", "handfuls": "handful", "sprig": "sprig", "sprigs": "sprig",
+    "serving": "serving", "servings": "serving",
+}
+
+# Preparation and size words that do not change what the ingredient is.
+_DESCRIPTORS = {
+    "a", "an", "the", "of", "about", "approximately", "plus", "more", "extra",
+    "fresh", "freshly", "large", "small", "medium", "big", "whole", "finely",
+    "roughly", "coarsely", "thinly", "thickly", "chopped", "diced", "minced",
+    "sliced", "shredded", "grated", "peeled", "crushed", "softened", "melted",
+    "cooked", "uncooked", "boneless", "skinless", "optional", "divided",
+    "packed", "heaping", "level", "cubed", "halved", "quartered", "trimmed",
+    "rinsed", "drained", "beaten", "room", "temperature", "taste", "garnish",
+    "to", "for",
+}
+
+_WORD = re.compile(r"[a-z]+")
+
+
+class ParsedIngredient(NamedTuple):
+    amount: Optional[float]
+    unit: str
+    name: str
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_unit(unit: str) -> str:
+    unit = (unit or "").lower().strip().rstrip(".")
+    return _UNITS.get(unit, unit)
+
+
+@lru_cache(maxsize=65536)
+def canonical_name(text: str) -> str:
+    """Canonical ingredient name: lowercase, singular, without quantity, unit or preparation notes."""
+    return parse_ingredient(text).name
+
+
+@lru_cache(maxsize=65536)
+def parse_ingredient(text: str) -> ParsedIngredient:
+    """Split free ingredient text into amount, unit and canonical name."""
+    text = (text or "").lower()
+    for char, fraction in _FRACTIONS.items():
+        text = text.replace(char, " " + fraction)
+
+    # "onion, finely chopped" / "flour (sifted)" -> drop the notes
+    text = re.sub(r"\([^)]*\)", " ", text).split(",")[0]
+
+    amount = None
+    match = _QUANTITY.match(text)
+    if match and (match.group("whole") or match.group("num")):
+        amount = float(match.group("whole") or 0)
+        if match.group("num"):
+            amount += int(match.group("num")) / max(int(match.group("den")), 1)
+        text = text[match.end():]
+
+    words = _WORD.findall(text)
+    unit = ""
+    if words and words[0] in _UNITS and (amount is not None or len(words) > 1):
+        unit = _UNITS[words.pop(0)]
+        if words and words[0] == "of":
+            words.pop(0)
+
+    name = " ".join(_singular(w) for w in words if w not in _DESCRIPTORS)
+    return ParsedIngredient(amount, unit, name)
+
+
+# -----------------------------------------------------------
+# CANONICAL IDS
+# -----------------------------------------------------------
+
+_ids = {}
+_ids_lock = Lock()
+
+
+def ingredient_id(term: str) -> int:
+    """Small int id for a canonical term, assigned on first sight."""
+    iid = _ids.get(term)
+    if iid is None:
+        with _ids_lock:
+            iid = _ids.setdefault(term, len(_ids))
+    return iid
+
+
+@lru_cache(maxsize=65536)
+def term_ids(canonical: str) -> frozenset:
+    """
+    Ids of every contiguous run of words in a canonical name, so
+    "lean ground beef" matches the rules "beef" and "ground beef".
+    """
+    words = canonical.split()
+    return frozenset(
+        ingredient_id(" ".join(words[i:j]))
+        for i in range(len(words))
+        for j in range(i + 1, len(words) + 1)
+    )
+
+
+def ingredient_ids(ing) -> frozenset:
+    """term_ids of one ingredient (a dict or an Ingredient object)."""
+    if isinstance(ing, dict):
+        text = ing.get("canonical") or ing.get("name", "")
+    else:
+        text = getattr(ing, "canonical", None) or ing.name
+    return term_ids(canonical_name(text))
+
+
+def ingredient_term_ids(ingredients) -> frozenset:
+    """Union of term_ids for a recipe's ingredients (dicts or Ingredient objects)."""
+    ids = set()
+    for ing in ingredients:
+        ids |= ingredient_ids(ing)
+    return frozenset(ids)
+
+
+def excluded_by(exclusion: str, words) -> bool:
+    """
+    Whether an ingredient, given as the words of its canonical name, falls
+    under a user's exclusion: every word of the exclusion's canonical name
+    is part of one of them. Exclusions are how users state allergies, so
+    parts of words count: "nuts" excludes "walnut", "cheese" "cheesecake".
+    """
+    banned = canonical_name(exclusion).split()
+    return bool(banned) and all(any(b in word for word in words) for b in banned)
+
+
+def first_match(recipe_ids, terms):
+    """The first of terms (canonical names) present in recipe_ids, or None."""
+    for term in terms:
+        canonical = canonical_name(term)
+        if canonical and ingredient_id(canonical) in recipe_ids:
+            return term
+    return None
@@ -0,0 +1,80 @@
+# journal.py
+"""
+Append-only journal of the recipes RecipeService ingests from the API.
+
+Each fetched recipe is appended to the journal as one line of JSON
+instead of rewriting recipes.json, so an ingest costs one small write
+however large the corpus is, and the corpus pack built from recipes.json
+stays fresh. The corpus is recipes.json followed by the journaled recipes
+it does not already hold. The journal is folded into recipes.json (and
+emptied) whenever the whole corpus is written anyway: on a cold start,
+by RecipeService.packCorpus() and by a bulk import.
+"""
+import os
+
+import codec
+from index import normalize_name
+
+JOURNAL_PATH = "data/recipes.ingested.jsonl"
+
+
+def append(recipe: dict, path=JOURNAL_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(codec.dumps(recipe) + b"\n")
+
+
+def read(path=JOURNAL_PATH):
+    """
+    (recipes, size): the journaled recipes, oldest first, and the number
+    of bytes they were read from. A line cut short by a crash is skipped.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return [], 0
+
+    recipes = []
+    for line in data.splitlines():
+        try:
+            recipes.append(codec.loads(line))
+        except ValueError:
+            continue
+    return recipes, len(data)
+
+
+def clear(size, path=JOURNAL_PATH) -> bool:
+    """
+    Remove the journal once it has been folded into recipes.json, unless
+    it grew past size (the bytes that were folded) in the meantime; the
+    lines left then are dropped as duplicates on the next load.
+    """
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+
+def merge(recipes, ingested):
+    """
+    recipes, then the ingested recipes none of them matches by Spoonacular
+    id or normalized name (the same test RecipeIndex.lookup makes).
+    """
+    ids, names = set(), set()
+    for recipe in recipes:
+        ids.add(recipe.get("spoonacular_id"))
+        names.add(normalize_name(recipe.get("dish_name", "")))
+        yield recipe
+
+    for recipe in ingested:
+        recipe_id = recipe.get("spoonacular_id")
+        name = normalize_name(recipe.get("dish_name", ""))
+        if (recipe_id is not None and recipe_id in ids) or name in names:
+            continue
+        ids.add(recipe_id)
+        names.add(name)
+        yield recipe
@@ -0,0 +1,183 @@
+# keypool.py
+"""
+A pool of Spoonacular API keys, each with its own daily quota.
+
+    set SPOONACULAR_API_KEYS=key1,key2,key3
+
+Every API response reports the points its key has used and has left
+today (X-API-Quota-Used, X-API-Quota-Left) and what the call cost
+(X-API-Quota-Request). Each call goes to the key with the most points
+left; a key not heard from yet counts as full, so every key gets used.
+A key that runs out (HTTP 402, or 0 points left) rests until the quota
+resets at midnight UTC, one that is rate limited (429) for
+RATE_LIMIT_COOLDOWN seconds and one the API rejects (401) for
+REJECTED_COOLDOWN seconds. When every key is resting, calls fail with
+QuotaExhaustedError without reaching the API. No keys ship with the app:
+with neither SPOONACULAR_API_KEYS nor SPOONACULAR_API_KEY set the pool is
+empty and calls fail with NoAPIKeysError.
+
+    python keypool.py             (print the configured keys, masked)
+"""
+import math
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from transport import TransportError
+
+RATE_LIMIT_COOLDOWN = 60.0
+REJECTED_COOLDOWN = 3600.0
+
+# Statuses with which the API turns a key away; the call is retried with another key.
+KEY_REJECTED = (401, 402, 429)
+
+DAY = 24 * 3600
+
+
+class QuotaExhaustedError(TransportError):
+    pass
+
+
+class NoAPIKeysError(TransportError):
+    pass
+
+
+@dataclass
+class KeyState:
+    key: str
+    left: Optional[float] = None    # points left today as last reported; None: not known
+    used: float = 0.0               # points used today as last reported
+    cost: float = 1.0               # points the last call cost
+    calls: int = 0                  # calls made with the key by this process
+    points: float = 0.0             # points those calls cost
+    resting_until: float = 0.0      # epoch seconds; 0: available
+
+    @property
+    def label(self) -> str:
+        return mask(self.key)
+
+
+def mask(key: str) -> str:
+    """What may be shown of a key: '...71eff' (nothing of a short one)."""
+    return "..." + key[-5:] if len(key) >= 16 else "..."
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class KeyPool:
+
+    def __init__(self, keys, clock=time.time):
+        keys = list(dict.fromkeys(k.strip() for k in keys if k and k.strip()))
+        self.clock = clock
+        self._states = [KeyState(key) for key in keys]
+        self._by_key = {state.key: state for state in self._states}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    def acquire(self) -> str:
+        """The available key with the most points left; its expected cost is set aside until record()."""
+        if not self._states:
+            raise NoAPIKeysError("no Spoonacular API keys configured: set SPOONACULAR_API_KEYS")
+        with self._lock:
+            now = self.clock()
+            ready = []
+            for state in self._states:
+                if state.resting_until and state.resting_until <= now:
+                    # back from a rest: what it has left is unknown until the next response
+                    state.resting_until, state.left = 0.0, None
+                if not state.resting_until:
+                    ready.append(state)
+            if not ready:
+                until = min(state.resting_until for state in self._states)
+                raise QuotaExhaustedError(
+                    f"all {len(self._states)} API keys are out of quota until "
+                    f"{time.strftime('%H:%M:%S', time.localtime(until))}")
+
+            best = max(ready, key=lambda s: (math.inf if s.left is None else s.left, -s.calls))
+            best.calls += 1
+            if best.left is not None:
+                best.left -= best.cost
+            return best.key
+
+    def record(self, key: str, status: int, headers=None):
+        """Account for the response to a call made with key."""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        used = _number(headers.get("x-api-quota-used"))
+        left = _number(headers.get("x-api-quota-left"))
+        cost = _number(headers.get("x-api-quota-request"))
+
+        with self._lock:
+            state = self._by_key.get(key)
+            if state is None:
+                return
+            now = self.clock()
+            if used is not None:
+                state.used = used
+            if left is not None:
+                state.left = left
+            if cost is not None:
+                state.cost = cost
+                state.points += cost
+
+            if status == 402 or (state.left is not None and state.left <= 0):
+                state.left = 0.0
+                state.resting_until = (now // DAY + 1) * DAY  # next midnight UTC
+            elif status == 429:
+                state.resting_until = now + RATE_LIMIT_COOLDOWN
+            elif status == 401:
+                state.resting_until = now + REJECTED_COOLDOWN
+
+    def metrics(self) -> dict:
+        """
+        {"calls", "points", "left", "keys": [per key: "key" (masked), "calls",
+        "points", "used", "left", "resting_for" (seconds)]}; "left" sums the
+        keys that reported it.
+        """
+        with self._lock:
+            now = self.clock()
+            keys = [{
+                "key": state.label,
+                "calls": state.calls,
+                "points": state.points,
+                "used": state.used,
+                "left": state.left,
+                "resting_for": max(state.resting_until - now, 0.0),
+            } for state in self._states]
+        return {
+            "calls": sum(k["calls"] for k in keys),
+            "points": sum(k["points"] for k in keys),
+            "left": sum(k["left"] for k in keys if k["left"] is not None),
+            "keys": keys,
+        }
+
+
+def key_pool_from_env() -> KeyPool:
+    """Keys from SPOONACULAR_API_KEYS (comma or space separated), else SPOONACULAR_API_KEY; empty if neither is set."""
+    keys = re.split(r"[\s,;]+", os.environ.get("SPOONACULAR_API_KEYS", ""))
+    if not any(keys):
+        keys = [os.environ.get("SPOONACULAR_API_KEY")]
+    return KeyPool(keys)
+
+
+def main():
+    pool = key_pool_from_env()
+    if not len(pool):
+        print("No API keys configured: set SPOONACULAR_API_KEYS=key1,key2 (or SPOONACULAR_API_KEY)")
+        return 1
+    print(f"{len(pool)} API key(s): " + ", ".join(k["key"] for k in pool.metrics()["keys"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
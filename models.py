@@ -1,6 +1,6 @@
 # models.py
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import hashlib
 import os
@@ -22,11 +22,18 @@ class RecipeRequest:
     dish_name: str
     diet_mode: str = "none"
     exclusions: List[str] = field(default_factory=list)
+    budget: Optional[float] = None  # seconds to wait for the recipe API; None: the service default
 
-@dataclass
+# Recipes and their ingredients are frozen, so one object can be shared by
+# every request that looks the recipe up; per-request changes such as
+# substitutions go in a SubstitutionOverlay instead.
+@dataclass(frozen=True)
 class Ingredient:
     name: str
     quantity: Optional[str] = None
+    canonical: Optional[str] = None
+    amount: Optional[float] = None
+    unit: Optional[str] = None
 
 @dataclass
 class Substitution:
@@ -34,13 +41,32 @@ class Substitution:
     replacementIngredient: str
     rationale: str
 
-@dataclass
+@dataclass(frozen=True)
 class Recipe:
     dish_name: str
-    ingredients: List[Ingredient]
-    steps: List[str]
+    ingredients: Tuple[Ingredient, ...]
+    steps: Tuple[str, ...]
 
-@dataclass
+@dataclass(frozen=True)
+class SubstitutionOverlay:
+    """
+    The substitutions made in a recipe for one preference profile:
+    replacements maps an ingredient's position to its new name, and
+    substitutions lists the (original, replacement) pairs applied.
+    """
+    replacements: Dict[int, str] = field(default_factory=dict)
+    substitutions: Tuple[Tuple[str, str], ...] = ()
+
+    def apply(self, recipe: Recipe) -> Recipe:
+        """A copy of recipe with the replacements made; recipe itself when there are none."""
+        if not self.replacements:
+            return recipe
+        return replace(recipe, ingredients=tuple(
+            replace(ing, name=self.replacements[i]) if i in self.replacements else ing
+            for i, ing in enumerate(recipe.ingredients)
+        ))
+
+@dataclass(frozen=True)
 class CompletedRecipe(Recipe):
     feasible: bool = False
     substitutions: List[Substitution] = field(default_factory=list)
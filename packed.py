@@ -0,0 +1,593 @@
+# packed.py
+"""
+Read-only recipe corpus packed into one flat binary file, for running
+several worker processes over the same recipes.
+
+    python packed.py build [--recipes data/recipes.json] [--out data/snapshots/recipes.json.pack]
+
+The pack holds every recipe as JSON text, the substitutions, and all
+RecipeIndex tables (name and id lookups, token and ingredient postings,
+diet flags) as sorted arrays. Opening it maps the file read-only and
+parses only a small section directory, so workers start without
+re-parsing recipes.json and share one physical copy through the page
+cache. Recipes are decoded one at a time when accessed and lookups
+binary-search the mapped tables in place.
+
+Recipes ingested after the pack was built go into a small per-process
+overlay on top of the shared tables (their bodies into an append-only
+temporary file, see bodies.py); the mapped file never changes.
+
+The pack doubles as RecipeService's startup snapshot: it is written after
+a cold load and used while the JSON it came from is unchanged (see
+snapshot.py for how freshness is decided).
+"""
+import argparse
+import copy
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+import codec
+import snapshot
+from bodies import BODY_CACHE_SIZE, BodyCache, BodyFile
+from diets import DIETS_PATH
+from index import RecipeIndex
+
+MAGIC = b"RCPPACK\x01"
+RECIPES_PATH = "data/recipes.json"
+SUBSTITUTIONS_PATH = "data/substitutions.json"
+PACK_PATH = snapshot.snapshot_path(RECIPES_PATH, ".pack")
+
+# What a pack of the app's corpus is built from; diet flags are packed, so the diet file counts.
+CORPUS_SOURCES = (RECIPES_PATH, SUBSTITUTIONS_PATH, DIETS_PATH)
+
+_MISSING = object()
+_DELETED = object()  # overlay marker for a packed entry that was removed
+
+
+def _ingredient_key(words) -> str:
+    return " ".join(sorted(words))
+
+
+def _ingredient_words(key: str) -> frozenset:
+    return frozenset(key.split())
+
+
+def _recipe_id(key: str):
+    # ids are packed as text; Spoonacular's are numbers
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+
+def _sorted_keys(keys):
+    # tables are binary-searched on UTF-8 bytes
+    return sorted(keys, key=lambda k: k.encode("utf-8"))
+
+
+# -----------------------------------------------------------
+# WRITER
+# -----------------------------------------------------------
+
+class _PackWriter:
+
+    def __init__(self):
+        self.sections = {}
+        self.chunks = []
+        self.size = 0
+
+    def add(self, name, data, typecode="B"):
+        if isinstance(data, array):
+            typecode, data = data.typecode, data.tobytes()
+        pad = -self.size % 8  # keep every table aligned for memoryview.cast
+        self.chunks.append(b"\0" * pad)
+        self.sections[name] = [self.size + pad, len(data), typecode]
+        self.chunks.append(data)
+        self.size += pad + len(data)
+
+    def strings(self, name, items):
+        offsets = array("Q", [0])
+        blob = bytearray()
+        for item in items:
+            blob += item if isinstance(item, bytes) else item.encode("utf-8")
+            offsets.append(len(blob))
+        self.add(name + ".offsets", offsets)
+        self.add(name + ".blob", bytes(blob))
+
+    def postings(self, name, lists):
+        offsets = array("Q", [0])
+        values = array("I")
+        for slots in lists:
+            values.extend(sorted(slots))
+            offsets.append(len(values))
+        self.add(name + ".offsets", offsets)
+        self.add(name + ".values", values)
+
+    def write(self, path, header):
+        header = dict(header, sections=self.sections)
+        directory = json.dumps(header).encode("utf-8")
+        start = len(MAGIC) + 8 + len(directory)
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(directory)))
+            f.write(directory)
+            f.write(b"\0" * (-start % 8))
+            for chunk in self.chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+
+
+def pack_corpus(recipes, subs, out=PACK_PATH, index=None, sources=(), head=None):
+    """
+    Write recipes, substitutions and their RecipeIndex to out. sources are
+    the files the data came from; the pack counts as stale once any of
+    them changes. head is snapshot.header(sources), best taken before the
+    sources were read.
+    """
+    if any(r is None for r in recipes):
+        # slots freed by RecipeService.reload() are compacted away
+        recipes, index = [r for r in recipes if r is not None], None
+    index = index or RecipeIndex.build(recipes)
+    return pack_records((codec.dumps(r) for r in recipes), subs, index, out, sources, head)
+
+
+def pack_records(records, subs, index, out=PACK_PATH, sources=(), head=None):
+    """
+    pack_corpus for recipes already encoded as JSON text, one per slot of
+    index, which must have no free slots (bulk.py packs what it imports).
+    """
+    n = len(index)
+    w = _PackWriter()
+
+    w.strings("records", records)
+    w.strings("names", (index.names[slot] for slot in range(n)))
+    w.add("diet_flags", array("I", index.diet_flags[:n]))
+    w.add("ingredient_counts", array("I", (index.ingredient_counts.get(slot, 0) for slot in range(n))))
+    w.add("substitutions", codec.dumps(subs))
+
+    keys = _sorted_keys(index.by_name)
+    w.strings("by_name.keys", keys)
+    w.add("by_name.values", array("I", (index.by_name[k] for k in keys)))
+
+    ids = {str(k): v for k, v in index.by_id.items()}
+    keys = _sorted_keys(ids)
+    w.strings("by_id.keys", keys)
+    w.add("by_id.values", array("I", (ids[k] for k in keys)))
+
+    keys = _sorted_keys(index.tokens)
+    w.strings("tokens.keys", keys)
+    w.postings("tokens", (index.tokens[k] for k in keys))
+
+    w.strings("ingredient_words", (_ingredient_key(words) for words in index.ingredient_words))
+    w.postings("ingredient_slots", (index.ingredient_slots.get(i, ()) for i in range(len(index.ingredient_words))))
+
+    ingredient_ids = {_ingredient_key(words): iid for words, iid in index.ingredient_ids.items()}
+    keys = _sorted_keys(ingredient_ids)
+    w.strings("ingredient_ids.keys", keys)
+    w.add("ingredient_ids.values", array("I", (ingredient_ids[k] for k in keys)))
+
+    keys = _sorted_keys(index.word_ingredients)
+    w.strings("word_ingredients.keys", keys)
+    w.postings("word_ingredients", (index.word_ingredients[k] for k in keys))
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    w.write(out, dict(head or snapshot.header(sources), count=n))
+    return out
+
+
+# -----------------------------------------------------------
+# READER
+# -----------------------------------------------------------
+
+class PackedCorpus:
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a recipe pack")
+
+        (size,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mmap[start:start + size])
+        self._base = start + size + (-(start + size) % 8)
+        self._view = memoryview(self._mmap)
+        self.count = self.header["count"]
+
+    def isFresh(self, sources) -> bool:
+        """True if the pack was built by this format version and platform from the current sources."""
+        return snapshot.header_matches(self.header, sources)
+
+    def section(self, name):
+        offset, length, typecode = self.header["sections"][name]
+        start = self._base + offset
+        view = self._view[start:start + length]
+        return view if typecode == "B" else view.cast(typecode)
+
+    def find(self, name, needle: bytes, start=0):
+        """Offset of needle in a bytes section (searched in the mapping, no copy), or -1."""
+        offset, length, _ = self.header["sections"][name]
+        base = self._base + offset
+        pos = self._mmap.find(needle, base + start, base + length)
+        return pos - base if pos >= 0 else -1
+
+    def strings(self, name):
+        return _Strings(self, name)
+
+    def recipes(self):
+        return PackedRecipes(self)
+
+    def substitutions(self):
+        return codec.loads(self.section("substitutions").tobytes() or b"{}")
+
+    def index(self):
+        return PackedIndex(self)
+
+
+def open_pack(path=PACK_PATH, sources=CORPUS_SOURCES):
+    """The pack at path if it exists and is fresh with respect to sources, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        corpus = PackedCorpus(path)
+    except (OSError, ValueError):
+        return None
+    return corpus if corpus.isFresh(sources) else None
+
+
+class _Strings:
+    """The i-th string of a packed string table; sorted tables can be searched with find()."""
+
+    def __init__(self, corpus, name):
+        self.offsets = corpus.section(name + ".offsets")
+        self.blob = corpus.section(name + ".blob")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        return str(self.raw(i), "utf-8")
+
+    def find(self, key: str) -> int:
+        needle = key.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid).tobytes() < needle:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo) == needle else -1
+
+
+class _Postings:
+
+    def __init__(self, corpus, name):
+        self.offsets = corpus.section(name + ".offsets")
+        self.values = corpus.section(name + ".values")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i) -> set:
+        return set(self.values[self.offsets[i]:self.offsets[i + 1]])
+
+
+# -----------------------------------------------------------
+# COPY-ON-WRITE VIEWS
+# -----------------------------------------------------------
+
+class _SharedMap:
+    """
+    dict-like view of a packed table. Writes, deletes and setdefault on a
+    packed key go to a private overlay that shadows the packed value.
+    Iterating yields the packed keys still present, then the added ones.
+    """
+
+    def __init__(self, find, value, encode=str, keys=(), decode=str):
+        self._find = find        # encoded key -> table position or -1
+        self._value = value      # table position -> value (a fresh object)
+        self._encode = encode
+        self._keys = keys        # table position -> encoded key
+        self._decode = decode    # encoded key -> key
+        self.overlay = {}
+
+    def _packed(self, key):
+        i = self._find(self._encode(key))
+        return _MISSING if i < 0 else self._value(i)
+
+    def get(self, key, default=None):
+        value = self.overlay[key] if key in self.overlay else self._packed(key)
+        return default if value is _MISSING or value is _DELETED else value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.overlay[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overlay[key] = _DELETED
+
+    def setdefault(self, key, default=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = default
+        self.overlay[key] = value
+        return value
+
+    def __iter__(self):
+        for i in range(len(self._keys)):
+            key = self._decode(self._keys[i])
+            if self.overlay.get(key) is not _DELETED:
+                yield key
+        for key, value in list(self.overlay.items()):
+            if value is not _DELETED and self._find(self._encode(key)) < 0:
+                yield key
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for key in self:
+            yield key, self[key]
+
+    def __copy__(self):
+        clone = _SharedMap(self._find, self._value, self._encode, self._keys, self._decode)
+        clone.overlay = dict(self.overlay)
+        return clone
+
+
+class _SharedSlots:
+    """slot -> value view of a packed per-slot table, with changes kept privately."""
+
+    def __init__(self, packed):
+        self.packed = packed
+        self.overlay = {}
+        self._deleted = 0  # packed slots shadowed by _DELETED
+
+    def __len__(self):
+        n = len(self.packed)
+        return n - self._deleted + sum(1 for slot in self.overlay if slot >= n)
+
+    def __getitem__(self, slot):
+        value = self.overlay.get(slot, _MISSING)
+        if value is _MISSING and 0 <= slot < len(self.packed):
+            value = self.packed[slot]
+        if value is _MISSING or value is _DELETED:
+            raise KeyError(slot)
+        return value
+
+    def __setitem__(self, slot, value):
+        if self.overlay.get(slot) is _DELETED:
+            self._deleted -= 1
+        self.overlay[slot] = value
+
+    def __delitem__(self, slot):
+        self[slot]  # KeyError if absent
+        if slot < len(self.packed):
+            self.overlay[slot] = _DELETED
+            self._deleted += 1
+        else:
+            del self.overlay[slot]
+
+    def __contains__(self, slot):
+        return self.get(slot, _MISSING) is not _MISSING
+
+    def get(self, slot, default=None):
+        try:
+            return self[slot]
+        except KeyError:
+            return default
+
+    def pop(self, slot, default=None):
+        value = self.get(slot, default)
+        if slot in self:
+            del self[slot]
+        return value
+
+    def items(self):
+        n = len(self.packed)
+        for slot in range(n):
+            value = self.overlay.get(slot, _MISSING)
+            if value is _MISSING:
+                value = self.packed[slot]
+            if value is not _DELETED:
+                yield slot, value
+        for slot in sorted(s for s in self.overlay if s >= n):
+            yield slot, self.overlay[slot]
+
+    def __copy__(self):
+        clone = _SharedSlots(self.packed)
+        clone.overlay = dict(self.overlay)
+        clone._deleted = self._deleted
+        return clone
+
+
+class _SharedList:
+    """Append-only list view of a packed table."""
+
+    def __init__(self, packed, convert):
+        self.packed = packed
+        self._convert = convert
+        self.extra = []
+
+    def __len__(self):
+        return len(self.packed) + len(self.extra)
+
+    def __getitem__(self, i):
+        n = len(self.packed)
+        return self._convert(self.packed[i]) if i < n else self.extra[i - n]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, value):
+        self.extra.append(value)
+
+    def __copy__(self):
+        clone = _SharedList(self.packed, self._convert)
+        clone.extra = list(self.extra)
+        return clone
+
+
+class PackedRecipes:
+    """
+    Sequence of recipe dicts, decoded from the pack on access and kept in
+    a small LRU. Recipes appended or replaced later are written to a
+    private append-only BodyFile, so only their offsets stay in memory.
+    copy() is cheap and independent; copies share the cache and the file.
+    Returned dicts may be shared between callers and must not be modified.
+    """
+
+    def __init__(self, corpus: PackedCorpus, cache_size=BODY_CACHE_SIZE):
+        self.records = corpus.strings("records")
+        self.overlay = {}  # slot -> record in self.extra (or None for a removed recipe)
+        self.size = len(self.records)
+        self.extra = BodyFile()
+        self.cache = BodyCache(cache_size)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, slot):
+        if slot < 0:
+            slot += self.size
+        if slot in self.overlay:
+            record = self.overlay[slot]
+            if record is None:
+                return None
+            return self.cache.get(("extra", record), lambda: self.extra.read(record))
+        if 0 <= slot < len(self.records):
+            return self.cache.get(slot, lambda: codec.loads(self.records.raw(slot).tobytes()))
+        raise IndexError(slot)
+
+    def __setitem__(self, slot, recipe):
+        if not 0 <= slot < self.size:
+            raise IndexError(slot)
+        self.overlay[slot] = None if recipe is None else self.extra.append(recipe)
+
+    def __iter__(self):
+        for slot in range(self.size):
+            yield self[slot]
+
+    def append(self, recipe):
+        self.overlay[self.size] = self.extra.append(recipe)
+        self.size += 1
+
+    def copy(self):
+        clone = copy.copy(self)
+        clone.overlay = dict(self.overlay)
+        return clone
+
+
+class PackedIndex(RecipeIndex):
+    """
+    RecipeIndex whose tables are views on a PackedCorpus. All lookups and
+    updates go through the inherited methods; only the diet flags (4 bytes
+    per recipe) are copied so they stay a plain array.
+    """
+
+    def __init__(self, corpus: PackedCorpus):
+        self.corpus = corpus
+        self._cow = False
+        self._owned = set()
+
+        def sorted_map(name, value, **kwargs):
+            keys = corpus.strings(name + ".keys")
+            return _SharedMap(keys.find, value, keys=keys, **kwargs)
+
+        by_name = corpus.section("by_name.values")
+        self.by_name = sorted_map("by_name", lambda i: by_name[i])
+        by_id = corpus.section("by_id.values")
+        self.by_id = sorted_map("by_id", lambda i: by_id[i], decode=_recipe_id)
+
+        tokens = _Postings(corpus, "tokens")
+        self.tokens = sorted_map("tokens", tokens.__getitem__)
+
+        self.names = _SharedSlots(corpus.strings("names"))
+        self.diet_flags = array("I")
+        self.diet_flags.frombytes(corpus.section("diet_flags").cast("B"))
+
+        ingredient_ids = corpus.section("ingredient_ids.values")
+        self.ingredient_ids = sorted_map("ingredient_ids", lambda i: ingredient_ids[i],
+                                         encode=_ingredient_key, decode=_ingredient_words)
+        self.ingredient_words = _SharedList(corpus.strings("ingredient_words"), _ingredient_words)
+        word_ingredients = _Postings(corpus, "word_ingredients")
+        self.word_ingredients = sorted_map("word_ingredients", word_ingredients.__getitem__)
+
+        ingredient_slots = _Postings(corpus, "ingredient_slots")
+        self.ingredient_slots = _SharedMap(
+            lambda iid: iid if 0 <= iid < len(ingredient_slots) else -1,
+            ingredient_slots.__getitem__,
+            encode=int,
+            keys=range(len(ingredient_slots)),
+            decode=int,
+        )
+        self.ingredient_counts = _SharedSlots(corpus.section("ingredient_counts"))
+
+    def _scanNames(self, dish: str):
+        # substring search straight over the packed names; names changed
+        # or added since packing are in the overlay
+        names = self.names.packed
+        needle = dish.encode("utf-8")
+        found = None
+        pos = self.corpus.find("names.blob", needle)
+        while pos >= 0:
+            slot = bisect_right(names.offsets, pos) - 1
+            if pos + len(needle) <= names.offsets[slot + 1] and slot not in self.names.overlay:
+                found = slot
+                break
+            pos = self.corpus.find("names.blob", needle, pos + 1)
+
+        for slot, name in self.names.overlay.items():
+            if name is not _DELETED and dish in name and (found is None or slot < found):
+                found = slot
+        return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the recipe corpus for shared, read-only use.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="pack recipes, substitutions and indexes into one file")
+    build.add_argument("--recipes", default=RECIPES_PATH)
+    build.add_argument("--subs", default=SUBSTITUTIONS_PATH)
+    build.add_argument("--out", default=PACK_PATH)
+
+    args = parser.parse_args(argv)
+
+    def load(path, default):
+        try:
+            return codec.load(path)
+        except (OSError, ValueError):
+            return default
+
+    recipes = load(args.recipes, [])
+    pack_corpus(recipes, load(args.subs, {}), args.out, sources=(args.recipes, args.subs, DIETS_PATH))
+    print(f"Packed {len(recipes)} recipes into {args.out} ({os.path.getsize(args.out)} bytes).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
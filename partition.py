@@ -0,0 +1,179 @@
+# partition.py
+"""
+Consistent-hash partitioning of per-user state (users, preferences and
+history shards) across several data roots, e.g. one per disk:
+
+    RECIPE_DATA_ROOTS=data:/mnt/disk2/data:/mnt/disk3/data python main.py
+
+Every root holds its own users.json, preferences.json and history/ for the
+users the ring assigns to it. The recipe corpus (recipes.json, its
+ingest journal, substitutions.json, diets.json) and the recipe store are
+shared and always live in ./data, whatever the roots are. Adding or
+removing a root only moves the users whose arc of the ring changed; move
+them with
+
+    python partition.py rebalance data data2 data3 [--retire old_root] [--dry-run]
+"""
+import argparse
+import hashlib
+import os
+import sys
+from bisect import bisect_right
+from collections import Counter
+
+import codec
+
+DEFAULT_ROOT = "data"
+
+# Per-user JSON files: {username: record}, one per root.
+USER_FILES = ("users.json", "preferences.json")
+HISTORY_SUBDIR = "history"
+
+# Virtual nodes per root, so users spread evenly over a handful of roots.
+VNODES = 128
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Maps usernames to data roots. Each root owns VNODES points on a 64-bit
+    ring and a username belongs to the first point after its own hash.
+    Points depend only on the root's path, so the order roots are listed
+    in does not matter.
+    """
+
+    def __init__(self, roots, vnodes=VNODES):
+        self.roots = list(dict.fromkeys(os.path.normpath(r) for r in roots))
+        if not self.roots:
+            raise ValueError("HashRing needs at least one data root")
+
+        points = sorted(
+            (_hash(f"{root}#{i}"), root)
+            for root in self.roots
+            for i in range(vnodes)
+        )
+        self._points = [p for p, _ in points]
+        self._owners = [root for _, root in points]
+
+    def rootFor(self, username: str) -> str:
+        if len(self.roots) == 1:
+            return self.roots[0]
+        i = bisect_right(self._points, _hash(username)) % len(self._points)
+        return self._owners[i]
+
+    def path(self, root: str, filename: str) -> str:
+        return os.path.join(root, filename)
+
+    def pathFor(self, username: str, filename: str) -> str:
+        """Where a per-user file (users.json, preferences.json, history/) lives for username."""
+        return self.path(self.rootFor(username), filename)
+
+
+def ring_from_env():
+    """Ring over the roots in RECIPE_DATA_ROOTS (os.pathsep-separated), or just data/."""
+    roots = [r for r in os.environ.get("RECIPE_DATA_ROOTS", "").split(os.pathsep) if r.strip()]
+    return HashRing(roots or [DEFAULT_ROOT])
+
+
+# -----------------------------------------------------------
+# REBALANCE
+# -----------------------------------------------------------
+
+def _load(path):
+    try:
+        return codec.load(path)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    codec.dump(data, path)
+
+
+def _merge_history(path, entries):
+    # entries are kept in time order; entries without a timestamp (migrated) go first
+    existing = _load(path).get("entries", [])
+    return sorted(existing + entries, key=lambda e: e.get("timestamp") or "")
+
+
+def rebalance(ring: HashRing, retired=(), dry_run=False):
+    """
+    Move every user's records to the root the ring assigns them. retired
+    roots are drained completely. Returns a Counter of moved records per
+    kind ("users.json", "preferences.json", "history").
+    """
+    roots = ring.roots + [r for r in map(os.path.normpath, retired) if r not in ring.roots]
+    moved = Counter()
+
+    for filename in USER_FILES:
+        files = {root: _load(ring.path(root, filename)) for root in roots}
+        dirty = set()
+        for root in roots:
+            for username in list(files[root]):
+                dest = ring.rootFor(username)
+                if dest == root:
+                    continue
+                # a record already at the destination is newer than a stray copy
+                files[dest].setdefault(username, files[root][username])
+                del files[root][username]
+                dirty.update((root, dest))
+                moved[filename] += 1
+        if not dry_run:
+            for root in dirty:
+                _save(ring.path(root, filename), files[root])
+
+    for root in roots:
+        shard_dir = ring.path(root, HISTORY_SUBDIR)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in sorted(os.listdir(shard_dir)):
+            src = os.path.join(shard_dir, name)
+            username = _load(src).get("username") if name.endswith(".json") else None
+            if username is None:
+                continue
+            dest = ring.rootFor(username)
+            if dest == root:
+                continue
+            moved[HISTORY_SUBDIR] += 1
+            if dry_run:
+                continue
+            target = os.path.join(ring.path(dest, HISTORY_SUBDIR), name)
+            entries = _merge_history(target, _load(src).get("entries", []))
+            _save(target, {"username": username, "entries": entries})
+            os.remove(src)
+
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partition user data across data roots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    reb = sub.add_parser("rebalance", help="move user data to the roots a new ring assigns")
+    reb.add_argument("roots", nargs="+", help="the data roots after rebalancing")
+    reb.add_argument("--retire", nargs="*", default=[], help="roots to drain and stop using")
+    reb.add_argument("--dry-run", action="store_true")
+
+    where = sub.add_parser("where", help="show which root holds a user's data")
+    where.add_argument("username")
+    where.add_argument("roots", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "where":
+        print(HashRing(args.roots).rootFor(args.username))
+        return 0
+
+    moved = rebalance(HashRing(args.roots), args.retire, args.dry_run)
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"{verb} {moved['users.json']} users, {moved['preferences.json']} preference sets "
+          f"and {moved[HISTORY_SUBDIR]} history shards.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# planner.py
+"""
+Weekly meal plans from the local corpus.
+
+Feasibility comes from what the RecipeIndex already keeps per recipe (diet
+bitmask, ingredient postings for exclusions), so building the candidate
+list is one pass over an int array. The plan itself is filled greedily:
+each meal draws random feasible candidates and takes the first one that
+keeps the constraints (no repeated dish, main ingredient not overused,
+not cooked recently). When a meal cannot be filled that way the
+constraints are repaired one at a time, most negotiable first.
+"""
+import random
+from collections import Counter
+
+from index import diet_bit
+from ingredients import canonical_name, parse_ingredient
+
+MEALS = ["breakfast", "lunch", "dinner"]
+
+# Ingredients that are in almost everything and say nothing about the dish.
+STAPLES = {
+    "salt", "pepper", "black pepper", "water", "oil", "olive oil", "vegetable oil",
+    "sugar", "flour", "butter", "garlic", "onion", "baking powder", "baking soda",
+}
+
+# Random draws per meal before falling back to a scan of all candidates.
+DRAWS_PER_MEAL = 64
+
+
+def main_ingredient(recipe: dict) -> str:
+    """Canonical name of the first ingredient that is not a staple, e.g. 'chicken thigh'."""
+    names = [canonical_name(ing.get("canonical") or ing.get("name", ""))
+             for ing in recipe.get("ingredients", [])]
+    for name in names:
+        if name and name not in STAPLES:
+            return name
+    return next((name for name in names if name), "")
+
+
+class MealPlanner:
+
+    def __init__(self, recipes, index):
+        self.recipes = recipes
+        self.index = index
+        self._main = {}             # slot -> main ingredient, filled as slots are considered
+        self._feasible_cache = {}
+
+    def feasible(self, diet="none", exclusions=()):
+        """Slots that fit a diet and contain none of the exclusions."""
+        key = (diet, tuple(sorted(e.lower() for e in exclusions if e.strip())))
+        if key not in self._feasible_cache:
+            bit = diet_bit(diet)
+            excluded = self.index.excludedSlots(key[1]) if key[1] else set()
+            flags, live = self.index.diet_flags, self.index.names
+            self._feasible_cache[key] = [
+                slot for slot in range(len(self.recipes))
+                if (bit is None or flags[slot] & bit) and slot not in excluded and slot in live
+            ]
+        return self._feasible_cache[key]
+
+    def main(self, slot: int) -> str:
+        if slot not in self._main:
+            self._main[slot] = main_ingredient(self.recipes[slot])
+        return self._main[slot]
+
+    def plan(self, preferences: dict, days=7, meals_per_day=3, recent=(),
+             max_main_repeats=2, accept=None, seed=None):
+        """
+        Pick days * meals_per_day distinct recipes. recent holds slots to
+        avoid (e.g. recently cooked dishes) and accept, if given, gets the
+        final say on each slot.
+
+        Returns (plan, relaxed): plan is a list of days, each a list of
+        slots (None where nothing fits), and relaxed names the constraints
+        that had to be dropped for some meal.
+        """
+        candidates = self.feasible(preferences.get("diet_mode", "none"),
+                                   preferences.get("exclusions", []))
+        rng = random.Random(seed)
+        recent = set(recent)
+        used = set()
+        mains = Counter()
+        rejected = set()  # slots accept() turned down
+        relaxed = []
+
+        def allowed(slot, level):
+            if slot in used or slot in rejected:
+                return False
+            if level < 2 and slot in recent:
+                return False
+            if level < 1 and mains[self.main(slot)] >= max_main_repeats:
+                return False
+            if accept is not None and not accept(slot):
+                rejected.add(slot)
+                return False
+            return True
+
+        def pick():
+            if not candidates:
+                return None
+            for _ in range(DRAWS_PER_MEAL):
+                slot = rng.choice(candidates)
+                if allowed(slot, 0):
+                    return slot
+            # repair: scan everything, dropping the variety rule, then history
+            for level, rule in enumerate(["", "main ingredient variety", "avoid recent history"]):
+                slot = next((s for s in candidates if allowed(s, level)), None)
+                if slot is not None:
+                    if rule and rule not in relaxed:
+                        relaxed.append(rule)
+                    return slot
+            return None
+
+        plan = []
+        for _ in range(days):
+            day = []
+            for _ in range(meals_per_day):
+                slot = pick()
+                if slot is not None:
+                    used.add(slot)
+                    mains[self.main(slot)] += 1
+                day.append(slot)
+            plan.append(day)
+        return plan, relaxed
+
+
+def shopping_list(recipes):
+    """
+    Ingredients of the given recipes added up per canonical name and unit,
+    as [{"name", "amount", "unit", "recipes"}] sorted by name. amount is
+    None when no quantity was known.
+    """
+    totals = {}
+    for recipe in recipes:
+        for ing in recipe.get("ingredients", []):
+            parsed = parse_ingredient(f"{ing.get('quantity') or ''} {ing.get('name', '')}")
+            name = canonical_name(ing.get("canonical") or parsed.name)
+            if not name:
+                continue
+            amount = ing.get("amount", parsed.amount)
+            unit = ing.get("unit", parsed.unit) or ""
+
+            item = totals.setdefault((name, unit), {"name": name, "amount": None, "unit": unit, "recipes": 0})
+            if amount is not None:
+                item["amount"] = (item["amount"] or 0) + amount
+            item["recipes"] += 1
+    return sorted(totals.values(), key=lambda item: (item["name"], item["unit"]))
@@ -0,0 +1,99 @@
+# recommender.py
+"""
+"More like this" recommendations from a user's history.
+
+The corpus is turned once into a sparse TF-IDF matrix over ingredient
+terms (CSR arrays, no SciPy needed). A user's history becomes one profile
+vector, and scoring the whole corpus is a gather, a multiply and a
+bincount, followed by argpartition for the top k. Requires numpy.
+"""
+import numpy as np
+
+from index import diet_bit, ingredient_words
+
+
+def ingredient_terms(recipe: dict):
+    """Set of ingredient terms for a recipe, e.g. 'Cheese curds' -> {'cheese', 'curd'}."""
+    terms = set()
+    for ing in recipe.get("ingredients", []):
+        terms |= ingredient_words(ing.get("canonical") or ing.get("name", ""))
+    return terms
+
+
+class Recommender:
+
+    def __init__(self, recipes, index):
+        self.index = index
+        self.vocab = {}
+
+        rows, cols = [], []
+        for slot, recipe in enumerate(recipes):
+            if recipe is None:  # removed by RecipeService.reload()
+                continue
+            for term in ingredient_terms(recipe):
+                rows.append(slot)
+                cols.append(self.vocab.setdefault(term, len(self.vocab)))
+
+        self.n_recipes = len(recipes)
+        self.rows = np.array(rows, dtype=np.int32)
+        self.cols = np.array(cols, dtype=np.int32)
+
+        # idf weights, then L2-normalize every recipe row
+        df = np.bincount(self.cols, minlength=len(self.vocab)).astype(np.float32)
+        self.idf = np.log((1 + self.n_recipes) / (1 + df)).astype(np.float32) + 1
+        weights = self.idf[self.cols]
+        norms = np.sqrt(np.bincount(self.rows, weights=weights ** 2, minlength=self.n_recipes))
+        self.data = (weights / np.where(norms == 0, 1, norms)[self.rows]).astype(np.float32)
+
+        self.diet_flags = np.array(index.diet_flags, dtype=np.uint32)
+        self._excluded_cache = {}
+
+    def profile(self, history_recipes):
+        """Sum of the (normalized) ingredient vectors of the recipes in a history."""
+        q = np.zeros(len(self.vocab), dtype=np.float32)
+        for recipe in history_recipes:
+            cols = [self.vocab[t] for t in ingredient_terms(recipe) if t in self.vocab]
+            if cols:
+                w = self.idf[cols]
+                q[cols] += w / np.sqrt((w ** 2).sum())
+        return q
+
+    def _excluded_rows(self, exclusions):
+        key = tuple(sorted(exclusions))
+        if key not in self._excluded_cache:
+            # the same rule as the feasibility check, applied through the index
+            rows = np.zeros(self.n_recipes, dtype=bool)
+            rows[[slot for slot in self.index.excludedSlots(key) if slot < self.n_recipes]] = True
+            self._excluded_cache[key] = rows
+        return self._excluded_cache[key]
+
+    def recommend(self, history_recipes, preferences: dict, k=5):
+        """
+        Top-k (slot, score) pairs most similar to the history that fit the
+        preferences and are not already in the history.
+        """
+        history_recipes = list(history_recipes)
+        q = self.profile(history_recipes)
+        if not q.any() or self.n_recipes == 0:
+            return []
+
+        scores = np.bincount(self.rows, weights=self.data * q[self.cols],
+                             minlength=self.n_recipes).astype(np.float32)
+
+        bit = diet_bit(preferences.get("diet_mode", "none"))
+        if bit is not None:
+            scores[(self.diet_flags & bit) == 0] = -np.inf
+
+        exclusions = [e.lower() for e in preferences.get("exclusions", []) if e.strip()]
+        if exclusions:
+            scores[self._excluded_rows(exclusions)] = -np.inf
+
+        seen = [self.index.lookup(r) for r in history_recipes]
+        seen = [slot for slot in seen if slot is not None]
+        if seen:
+            scores[seen] = -np.inf
+
+        k = min(k, self.n_recipes)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(slot), float(scores[slot])) for slot in top if scores[slot] > 0]
@@ -0,0 +1,300 @@
+# resilience.py
+"""
+Keeping recipe lookups fast while the recipe API is slow or down.
+
+CircuitBreaker counts consecutive failed (or too slow) upstream calls.
+After FAILURE_THRESHOLD of them it opens and calls fail immediately; once
+RESET_TIMEOUT has passed it lets a single probe through (half-open) and
+closes again if the probe succeeds.
+
+ScraperCache remembers what the API answered for each query, including
+"nothing found". ResilientScraper puts both in front of a RecipeScraper:
+
+- a fresh cached answer is returned without calling the API;
+- a stale one is returned immediately too and refreshed in the
+  background, right away if the circuit is closed, or as soon as it
+  closes again (stale-while-revalidate);
+- without a cached answer the API is called, unless the circuit is open,
+  in which case the lookup fails fast instead of waiting on it.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+import codec
+from index import normalize_name
+from tracing import current_span
+
+# Consecutive failures that open the circuit, and how long it stays open.
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30.0
+
+# A call slower than this counts as a failure even if it returned.
+SLOW_CALL = float(os.environ.get("RECIPE_API_TIMEOUT", 10))
+
+# How long an API answer is served without revalidating it.
+CACHE_TTL = 7 * 24 * 3600
+NEGATIVE_TTL = 3600  # for "no recipe found"
+MAX_CACHE_ENTRIES = 5000
+
+DEFAULT_CACHE_PATH = "data/scraper_cache.json"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 slow_call=SLOW_CALL, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call = slow_call
+        self.clock = clock
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._on_close = []
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def onClose(self, callback):
+        """Call callback() (without arguments) every time the circuit closes after being open."""
+        self._on_close.append(callback)
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now. In half-open state only one probe is let through."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._probing or self.clock() - self._opened_at < self.reset_timeout:
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return True
+
+    def recordSuccess(self, duration=0.0):
+        if duration > self.slow_call:
+            return self.recordFailure()
+        with self._lock:
+            reopened = self._state != self.CLOSED
+            self._state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+        if reopened:
+            for callback in self._on_close:
+                callback()
+
+    def recordFailure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) through the breaker; CircuitOpenError if the circuit is open."""
+        if not self.allow():
+            raise CircuitOpenError("recipe API circuit is open")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.recordFailure()
+            raise
+        self.recordSuccess(time.perf_counter() - start)
+        return result
+
+
+class ScraperCache:
+    """
+    {normalized query: {"recipe": dict or None, "fetched_at": epoch seconds,
+    "requests": lookups so far}}, saved to a JSON file so answers survive
+    restarts. Lookups are counted in memory and saved with the next put().
+    The file is replaced whole, never rewritten in place, so a crash while
+    saving leaves the previous version.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=CACHE_TTL, negative_ttl=NEGATIVE_TTL,
+                 max_entries=MAX_CACHE_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = Counter()  # normalized query -> answers served from the cache
+        self._requests = Counter()  # normalized query -> lookups not saved yet
+        self._entries = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # one save at a time, the newest version last
+        self._version = 0  # bumped by every put()
+        self._saved = 0    # version last written to path
+
+    @property
+    def entries(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            if self.path:
+                try:
+                    self._entries = codec.load(self.path)
+                except (OSError, ValueError):
+                    pass
+        return self._entries
+
+    def get(self, query):
+        """The cached entry for query (fresh or stale), or None."""
+        return self.entries.get(normalize_name(query))
+
+    def isFresh(self, entry, margin=0.0) -> bool:
+        """True if entry is younger than its TTL, minus margin (a fraction of the TTL)."""
+        ttl = self.ttl if entry["recipe"] is not None else self.negative_ttl
+        return self.clock() - entry["fetched_at"] < ttl * (1 - margin)
+
+    def recordHit(self, query):
+        with self._lock:
+            self.hits[normalize_name(query)] += 1
+
+    def recordRequest(self, query):
+        """Count a lookup of query (one the local corpus did not answer)."""
+        with self._lock:
+            self._requests[normalize_name(query)] += 1
+
+    def popular(self):
+        """Cached queries, most requested first."""
+        with self._lock:
+            counts = {key: entry.get("requests", 0) + self._requests[key] for key, entry in self.entries.items()}
+        return sorted(counts, key=lambda key: -counts[key])
+
+    def put(self, query, recipe):
+        with self._lock:
+            entries = self.entries
+            key = normalize_name(query)
+            requests = entries[key].get("requests", 0) if key in entries else 0
+            entries[key] = {"recipe": recipe, "fetched_at": self.clock(), "requests": requests}
+            for key, count in self._requests.items():
+                if key in entries:
+                    entries[key]["requests"] = entries[key].get("requests", 0) + count
+            self._requests = Counter({key: n for key, n in self._requests.items() if key not in entries})
+            while len(entries) > self.max_entries:
+                del entries[min(entries, key=lambda k: entries[k]["fetched_at"])]
+            if not self.path:
+                return
+            self._version += 1
+            version = self._version
+            data = codec.dumps(entries, codec.pretty_from_env())
+        self._save(data, version)
+
+    def _save(self, data: bytes, version: int):
+        # written outside _lock, so lookups do not wait for the disk
+        with self._write_lock:
+            if version < self._saved:
+                return  # a newer put() saved already
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+            self._saved = version
+
+
+class ResilientScraper:
+    """Same fetch() as RecipeScraper, behind a ScraperCache and a CircuitBreaker."""
+
+    def __init__(self, scraper, cache: ScraperCache = None, breaker: CircuitBreaker = None):
+        self.scraper = scraper
+        self.cache = cache if cache is not None else ScraperCache()
+        self.breaker = breaker or CircuitBreaker()
+        self.breaker.onClose(self._refreshPending)
+        self._pending = set()       # queries to revalidate once the circuit closes
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def keys(self):
+        """The wrapped scraper's API key pool."""
+        return self.scraper.keys
+
+    def fetch(self, dish_name: str):
+        span = current_span()
+        self.cache.recordRequest(dish_name)
+        entry = self.cache.get(dish_name)
+        if entry is not None and self.cache.isFresh(entry):
+            span.set(cache="fresh")
+            self.cache.recordHit(dish_name)
+            return entry["recipe"]
+
+        if entry is not None:
+            # serve what we have now, revalidate off the caller's time
+            span.set(cache="stale", circuit=self.breaker.state)
+            self.cache.recordHit(dish_name)
+            self._revalidate(dish_name)
+            return entry["recipe"]
+
+        span.set(cache="miss", circuit=self.breaker.state)
+        try:
+            return self._fetchAndStore(dish_name)
+        except Exception as e:
+            # the exception text can carry the request URL, and with it the API key
+            print(f"[API] Unavailable ({type(e).__name__}); no cached answer for: {dish_name}")
+            return None
+
+    def refresh(self, dish_name: str):
+        """Ask the API now (through the breaker) and cache the answer. Raises if the call fails."""
+        return self._fetchAndStore(dish_name)
+
+    def _fetchAndStore(self, dish_name):
+        recipe = self.breaker.call(self.scraper.fetch, dish_name)
+        self.cache.put(dish_name, recipe)
+        return recipe
+
+    def _revalidate(self, dish_name):
+        if self.breaker.state == CircuitBreaker.OPEN:
+            with self._lock:
+                self._pending.add(dish_name)
+            return
+        self._refreshInBackground([dish_name])
+
+    def _refreshPending(self):
+        with self._lock:
+            pending, self._pending = list(self._pending), set()
+        if pending:
+            self._refreshInBackground(pending)
+
+    def _refreshInBackground(self, queries):
+        with self._lock:
+            queries = [q for q in queries if q not in self._refreshing]
+            self._refreshing.update(queries)
+        if queries:
+            threading.Thread(target=self._refresh, args=(queries,), daemon=True).start()
+
+    def _refresh(self, queries):
+        failed = []
+        for query in queries:
+            if failed:
+                failed.append(query)
+                continue
+            try:
+                self._fetchAndStore(query)
+            except Exception:
+                # still failing: keep serving the stale answer and retry after the next close
+                failed.append(query)
+        with self._lock:
+            self._pending.update(failed)
+            self._refreshing.difference_update(queries)
+
+    def idle(self) -> bool:
+        """True when no background refresh is running."""
+        with self._lock:
+            return not self._refreshing
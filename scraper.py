@@ -1,11 +1,41 @@
 # scraper.py
-import requests
+import os
+
+from ingredients import canonical_name, normalize_unit
+from keypool import KEY_REJECTED, KeyPool, key_pool_from_env
+from tracing import span, traced
+from transport import TransportError, transport_from_env
+
+# Point this at fake_server.py to run without the real API.
+BASE_URL = os.environ.get("SPOONACULAR_BASE_URL", "https://api.spoonacular.com")
+
+def _check(res, url):
+    # 404 means "no such recipe"; anything else in 4xx/5xx (bad key, over quota,
+    # rate limited, server error) is the API failing, not an answer
+    if res.status >= 400 and res.status != 404:
+        raise TransportError(f"{url} returned HTTP {res.status}")
+    return res
 
-# API_KEY = "923046629bdc41b58280d5db449aae9c"
-API_KEY = "75dd9a22d7dd4f0e9b963531edf71eff"
 
 class RecipeScraper:
 
+    def __init__(self, transport=None, base_url: str = BASE_URL, api_key: str = None, keys: KeyPool = None):
+        """Calls use keys (default: key_pool_from_env()), or only api_key if one is given."""
+        self.transport = transport or transport_from_env()
+        self.base_url = base_url.rstrip("/")
+        self.keys = keys or (KeyPool([api_key]) if api_key else key_pool_from_env())
+
+    def _get(self, url, params):
+        """GET with a key from the pool; a key the API turns away is rested and the next one tried."""
+        for _ in range(max(len(self.keys), 1)):
+            key = self.keys.acquire()
+            res = self.transport.get(url, dict(params, apiKey=key))
+            self.keys.record(key, res.status, res.headers)
+            if res.status not in KEY_REJECTED:
+                break
+        return res
+
+    @traced("RecipeScraper.fetch")
     def fetch(self, dish_name: str):
         """
         Fetch a recipe using Spoonacular API.
@@ -14,14 +44,17 @@ class RecipeScraper:
         print(f"[API] Searching for: {dish_name}")
 
         # 1. Search for recipe ID
-        search_url = "https://api.spoonacular.com/recipes/complexSearch"
+        search_url = f"{self.base_url}/recipes/complexSearch"
         params = {
             "query": dish_name,
             "number": 1,
-            "apiKey": API_KEY
         }
 
-        search_res = requests.get(search_url, params=params).json()
+        with span("GET complexSearch", query=dish_name) as phase:
+            res = self._get(search_url, params)
+            phase.set(status=res.status)
+            _check(res, search_url)
+        search_res = res.data
 
         if not search_res.get("results"):
             print("[API] No recipe found in search results.")
@@ -30,16 +63,27 @@ class RecipeScraper:
         recipe_id = search_res["results"][0]["id"]
 
         # 2. Get full recipe info
-        info_url = f"https://api.spoonacular.com/recipes/{recipe_id}/information"
-        params = {"apiKey": API_KEY}
-
-        info = requests.get(info_url, params=params).json()
+        info_url = f"{self.base_url}/recipes/{recipe_id}/information"
+        with span("GET information", recipe_id=recipe_id) as phase:
+            res = self._get(info_url, {})
+            phase.set(status=res.status)
+            _check(res, info_url)
+        info = res.data
 
         # Extract data
         title = info.get("title", dish_name)
         ingredients = []
         for item in info.get("extendedIngredients", []):
-            ingredients.append({"name": item["original"], "quantity": ""})
+            # Spoonacular already splits amount, unit and ingredient name
+            amount = item.get("amount")
+            unit = normalize_unit(item.get("unit", ""))
+            ingredients.append({
+                "name": item["original"],
+                "quantity": f"{amount:g} {unit}".strip() if amount else "",
+                "canonical": canonical_name(item.get("name") or item["original"]),
+                "amount": amount,
+                "unit": unit,
+            })
 
         steps = []
         try:
@@ -51,6 +95,7 @@ class RecipeScraper:
 
         return {
             "dish_name": title,
+            "spoonacular_id": recipe_id,
             "ingredients": ingredients,
             "steps": steps
         }
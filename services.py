@@ -1,6 +1,32 @@
+import contextvars
+import hashlib
 import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime
+from threading import Lock
+from types import MappingProxyType
+from typing import NamedTuple
+import codec
+import journal
+from bodies import BodyCache
+from diets import taxonomy
+from index import RecipeIndex, ingredient_words, normalize_name
+from packed import CORPUS_SOURCES, PACK_PATH, PackedCorpus, open_pack, pack_corpus
+import snapshot
+from tracing import current_span, traced
+from partition import HISTORY_SUBDIR, HashRing, ring_from_env
+from ingredients import (
+    canonical_name, excluded_by, first_match, ingredient_id, ingredient_term_ids, parse_ingredient, term_ids
+)
+from resilience import ResilientScraper
 from scraper import RecipeScraper
-from models import CompletedRecipe, RecipeRequest, User, Preferences, Recipe, Ingredient
+from models import (
+    CompletedRecipe, RecipeRequest, User, Preferences, Recipe, Ingredient, SubstitutionOverlay
+)
 
 
 # -----------------------------------------------------------
@@ -9,51 +35,96 @@ from models import CompletedRecipe, RecipeRequest, User, Preferences, Recipe, In
 
 def _load_json(path):
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return codec.load(path)
     except:
         return {}
 
 def _save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    codec.dump(data, path)
 
 
 def _load_recipes():
     return _load_json("data/recipes.json")
 
-def _load_users():
-    return _load_json("data/users.json")
-
-def _load_history():
-    return _load_json("data/history.json")
-
-def _load_prefs():
-    return _load_json("data/preferences.json")
+def _fold_journal(recipes, size):
+    """Write recipes (which include the journal's size bytes) to recipes.json and empty the journal."""
+    try:
+        _save_json("data/recipes.json", [r for r in recipes if r is not None])
+    except OSError:
+        return False
+    journal.clear(size)
+    return True
+
+def _load_partitions(ring: HashRing, filename):
+    """{root: {username: record}} for a per-user file on every data root."""
+    return {root: snapshot.load_json(ring.path(root, filename)) for root in ring.roots}
+
+def _save_partitioned(ring: HashRing, partitions, filename, username, record):
+    """Store a user's record on the root the ring assigns, dropping copies left on other roots."""
+    home = ring.rootFor(username)
+    partitions[home][username] = record
+    _save_json(ring.path(home, filename), partitions[home])
+
+    for root, records in partitions.items():
+        if root != home and records.pop(username, None) is not None:
+            _save_json(ring.path(root, filename), records)
 
 def _load_subs():
     return _load_json("data/substitutions.json")
 
+def _with(mapping, key, value):
+    """A read-only copy of mapping with key set to value (copy-on-write update)."""
+    updated = dict(mapping)
+    updated[key] = value
+    return MappingProxyType(updated)
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+HISTORY_DIR = "data/history"
+LEGACY_HISTORY_PATH = "data/history.json"
+
+# HistoryService spreads users over this many shard locks.
+HISTORY_LOCK_STRIPES = 64
+
+# How long generateCompliantRecipe waits for the recipe API before answering
+# from the local corpus (0: wait as long as the API takes).
+LATENCY_BUDGET = float(os.environ.get("RECIPE_LATENCY_BUDGET", 3))
+FALLBACK_CANDIDATES = 5
+
 # -----------------------------------------------------------
 # SERVICES
 # -----------------------------------------------------------
 
 class AuthService: 
-    def __init__(self):
-        self.users = _load_users()
+    def __init__(self, ring: HashRing = None):
+        self.ring = ring or ring_from_env()
+        self._partitions = _load_partitions(self.ring, "users.json")
+        users = {}
+        for records in self._partitions.values():
+            users.update(records)
+        # read-only for readers; registerUser swaps in an updated copy
+        self.users = MappingProxyType(users)
         self.current_user = None
+        self._write_lock = Lock()
 
     def registerUser(self, username, password):        
         if not username or not password:
             return False, "Username / Password cannot be empty."
         
-        if username in self.users:
-            return False, "Username already exists."
-        
-        user = User(username=username, password=password)
-        self.users[user.username] = {"password": user.password}
-        _save_json("data/users.json", self.users)
-        
+        with self._write_lock:
+            if username in self.users:
+                return False, "Username already exists."
+
+            user = User(username=username, password=password)
+            record = {"password": user.password}
+            self.users = _with(self.users, user.username, record)
+            _save_partitioned(self.ring, self._partitions, "users.json", user.username, record)
+
         return True, "Registration successful."
 
     def authenticate(self, username, password):
@@ -69,17 +140,27 @@ class AuthService:
 
 class PreferencesService:
 
-    def __init__(self):
-        self.preferences = _load_prefs()
-        raw = _load_prefs() 
-        self.preferences = {}
-
-        for username, data in raw.items():
-            self.preferences[username] = Preferences(
+    def __init__(self, ring: HashRing = None):
+        self.ring = ring or ring_from_env()
+        self._partitions = _load_partitions(self.ring, "preferences.json")
+        raw = {}
+        for records in self._partitions.values():
+            raw.update(records)
+        self._write_lock = Lock()
+
+        # read-only for readers; updatePreferences swaps in an updated copy
+        self.preferences = MappingProxyType({
+            username: Preferences(
                 username=username,
                 diet_mode=data.get("diet_mode", "none"),
                 exclusions=data.get("exclusions", []),
             )
+            for username, data in raw.items()
+        })
+
+    def dietModes(self):
+        """Diet modes a user can choose: "none", then the diets of the diet file."""
+        return ["none"] + taxonomy().diets
 
     def viewPreferences(self, username):
         prefs = self.preferences.get(username)
@@ -102,40 +183,122 @@ class PreferencesService:
             diet_mode=diet_mode,
             exclusions=exclusions
         )
-        self.preferences[username] = prefs
-
 
         raw = {
-            uname: {
-                "diet_mode": p.diet_mode,
-                "exclusions": p.exclusions
-            }
-            for uname, p in self.preferences.items()
+            "diet_mode": prefs.diet_mode,
+            "exclusions": prefs.exclusions
         }
 
-        _save_json("data/preferences.json", raw)
+        with self._write_lock:
+            self.preferences = _with(self.preferences, username, prefs)
+            _save_partitioned(self.ring, self._partitions, "preferences.json", username, raw)
+
+
+class CorpusSnapshot(NamedTuple):
+    """
+    What RecipeService readers see: recipes, their index and the
+    substitutions, from one moment. parsed holds the Recipe objects built
+    from recently used slots; they are frozen, so every request shares them.
+    """
+    recipes: list
+    index: RecipeIndex
+    subs: dict
+    parsed: BodyCache
 
 
 class RecipeService:
+    """
+    Readers take self._snapshot once and use only that CorpusSnapshot, so
+    they never lock. Writers (ingestRecipe, reload) hold _write_lock, make
+    their changes on copies (recipes.copy(), index.fork()) and publish them
+    by replacing _snapshot in one assignment.
+
+    The corpus is recipes.json plus the recipes ingested since it was last
+    written, which are kept in an append-only journal (see journal.py).
+    """
+
+    # diet flags are packed with the corpus, so a changed diets file invalidates the pack
+    SOURCES = CORPUS_SOURCES
+    # files reload() watches; the journal is not a pack source, ingests would make the pack stale
+    WATCHED = SOURCES + (journal.JOURNAL_PATH,)
     
-    def __init__(self):
-        self.recipes = _load_recipes()
-        self.subs = _load_subs()
-        self.scraper = RecipeScraper()
+    def __init__(self, pack_path=PACK_PATH):
+        # stat before reading, so a write racing the load is picked up by reload()
+        self._sources = {path: _file_stat(path) for path in self.WATCHED}
+
+        # A fresh corpus pack (see packed.py) is mapped instead of parsing the JSON files,
+        # so worker processes share one copy of the recipes and indexes and recipe
+        # bodies are only decoded when used. After a cold load the pack is written
+        # and the parsed JSON dropped for it, so the next start is warm as well.
+        corpus = open_pack(pack_path, self.SOURCES) if snapshot.enabled() else None
+        if corpus is None:
+            head = snapshot.header(self.SOURCES) if snapshot.enabled() else None
+            recipes = _load_recipes()
+            if not isinstance(recipes, list):
+                recipes = []
+            subs = _load_subs()
+            ingested, size = journal.read()
+            if ingested:
+                # the whole corpus is parsed anyway: fold the journal into recipes.json
+                recipes = list(journal.merge(recipes, ingested))
+                if _fold_journal(recipes, size):
+                    self._sources = {path: _file_stat(path) for path in self.WATCHED}
+                    if head is not None:
+                        head = snapshot.header(self.SOURCES)
+            index = RecipeIndex.build(recipes)
+            if head is not None:
+                try:
+                    corpus = PackedCorpus(pack_corpus(recipes, subs, pack_path, index=index, head=head))
+                except (OSError, ValueError):
+                    pass  # a read-only data dir just means no warm start
+        if corpus is not None:
+            recipes = corpus.recipes()
+            subs = corpus.substitutions()
+            index = corpus.index()
+
+        # Removed recipes leave a None slot.
+        self._snapshot = CorpusSnapshot(recipes, index, MappingProxyType(subs), BodyCache())
+        self._hashes = None  # content hash per slot, computed by the first reload()
+        self._write_lock = Lock()
+
+        # recipes ingested since the pack was written (a no-op after a fold)
+        self._addRecipes(journal.read()[0])
+
+        # cached API answers and a circuit breaker keep misses fast while the API is down
+        self.scraper = ResilientScraper(RecipeScraper())
         self.validator = Validator()
+        self._recommender = None
+        self._planner = None
+
+    @property
+    def recipes(self):
+        return self._snapshot.recipes
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    @property
+    def subs(self):
+        return self._snapshot.subs
 
     def _dict_to_recipe(self, data: dict) -> Recipe:
         """Convert a raw dict (from JSON/API) into a Recipe object."""
         return Recipe(
             dish_name=data.get("dish_name", ""),
-            ingredients=[
-                Ingredient(
-                    name=ing.get("name", ""),
-                    quantity=ing.get("quantity", "")
-                )
-                for ing in data.get("ingredients", [])
-            ],
-            steps=data.get("steps", []),
+            ingredients=tuple(self._dict_to_ingredient(ing) for ing in data.get("ingredients", [])),
+            steps=tuple(data.get("steps", [])),
+        )
+
+    def _dict_to_ingredient(self, ing: dict) -> Ingredient:
+        """Fill in canonical name, amount and unit when the source did not provide them."""
+        parsed = parse_ingredient(f"{ing.get('quantity') or ''} {ing.get('name', '')}")
+        return Ingredient(
+            name=ing.get("name", ""),
+            quantity=ing.get("quantity", ""),
+            canonical=canonical_name(ing.get("canonical") or parsed.name),
+            amount=ing.get("amount", parsed.amount),
+            unit=ing.get("unit", parsed.unit),
         )
 
     def _recipe_to_dict(self, recipe: Recipe) -> dict:
@@ -143,35 +306,292 @@ class RecipeService:
         return {
             "dish_name": recipe.dish_name,
             "ingredients": [
-                {"name": ing.name, "quantity": ing.quantity}
+                {
+                    "name": ing.name,
+                    "quantity": ing.quantity,
+                    "canonical": ing.canonical,
+                    "amount": ing.amount,
+                    "unit": ing.unit,
+                }
                 for ing in recipe.ingredients
             ],
-            "steps": recipe.steps,
+            "steps": list(recipe.steps),
         }
 
+    def _recipeAt(self, snap: CorpusSnapshot, slot: int) -> Recipe:
+        """The shared Recipe for a slot of snap, built on first use."""
+        return snap.parsed.get(slot, lambda: self._dict_to_recipe(snap.recipes[slot]))
+
+    def packCorpus(self, path=PACK_PATH):
+        """
+        Write the current corpus to a pack that later RecipeServices (e.g.
+        worker processes) map. The ingest journal is folded into
+        recipes.json first, so the pack holds every recipe it knows of.
+        """
+        self.reload()
+        with self._write_lock:
+            snap = self._snapshot
+            ingested = self._sources[journal.JOURNAL_PATH]
+            if ingested is not None and _fold_journal(snap.recipes, ingested[0]):
+                self._sources = {path: _file_stat(path) for path in self.WATCHED}
+            return pack_corpus(snap.recipes, dict(snap.subs), path, index=snap.index, sources=self.SOURCES)
+
     # ------------------------------
     # FIND RECIPE
     # ------------------------------
+    @traced("RecipeService.findRecipe")
     def findRecipe(self, dish_name: str):
-        dish = dish_name.lower().strip()
-
         # 1. Search local DB
-        for r in self.recipes:
-            if dish in r.get("dish_name", "").lower():
-                # return r
-                return self._dict_to_recipe(r)
+        snap = self._snapshot
+        slot = snap.index.search(dish_name)
+        if slot is not None:
+            current_span().set(source="local")
+            return self._recipeAt(snap, slot)
 
-        # 2. Try API
+        # 2. Try API, and keep the result so the next lookup is local
         scraped = self.scraper.fetch(dish_name)
         if scraped:
-            return self._dict_to_recipe(scraped)
+            current_span().set(source="api")
+            slot = self.ingestRecipe(scraped)
+            return self._recipeAt(self._snapshot, slot)
 
+        current_span().set(source="none")
         return None
 
+    # ------------------------------
+    # WRITE-THROUGH INGESTION
+    # ------------------------------
+    def ingestRecipe(self, data: dict) -> int:
+        """
+        Store a fetched recipe in the local corpus unless an entry with the
+        same Spoonacular id or normalized name already exists. The recipe
+        is appended to the ingest journal; recipes.json is not rewritten.
+        Returns the slot of the stored (or existing) recipe.
+        """
+        with self._write_lock:
+            slot = self._snapshot.index.lookup(data)
+            if slot is not None:
+                return slot
+
+            (slot,) = self._addRecipes([data])
+            journal.append(data)
+            self._sources[journal.JOURNAL_PATH] = _file_stat(journal.JOURNAL_PATH)
+
+        return slot
+
+    def _addRecipes(self, new) -> list:
+        """Append the recipes of new not in the corpus yet and publish them at once. Returns their slots."""
+        snap = self._snapshot
+        recipes, index = snap.recipes, snap.index
+        slots = []
+        for data in new:
+            slot = index.lookup(data)
+            if slot is None:
+                if index is snap.index:
+                    recipes, index = recipes.copy(), index.fork()
+                slot = len(recipes)
+                recipes.append(data)
+                index.add(slot, data)
+                if self._hashes is not None:
+                    self._hashes.append(RecipeStore.contentHash(data))
+            slots.append(slot)
+
+        if index is not snap.index:
+            self._snapshot = snap._replace(recipes=recipes, index=index)
+            self._recommender = None  # rebuilt with the new recipes on next use
+            self._planner = None
+        return slots
+
+    # ------------------------------
+    # RELOAD
+    # ------------------------------
+    def reload(self):
+        """
+        Apply changes made to recipes.json, the ingest journal and
+        substitutions.json since they were loaded. A file whose size and
+        mtime are unchanged is not read; otherwise recipes are matched by content hash, and only the
+        added, removed and changed ones touch the index. Changes are made
+        on a fork of the index and swapped in with the recipes at once, so
+        readers never wait and never see a half-applied update.
+
+        Returns {"added": n, "removed": n, "changed": n, "substitutions": bool}.
+        """
+        stats = {"added": 0, "removed": 0, "changed": 0, "substitutions": False}
+
+        with self._write_lock:
+            sources = {path: _file_stat(path) for path in self.WATCHED}
+
+            if sources["data/substitutions.json"] != self._sources["data/substitutions.json"]:
+                subs = _load_subs()
+                stats["substitutions"] = subs != self.subs
+                self._snapshot = self._snapshot._replace(subs=MappingProxyType(subs))
+
+            if any(sources[path] != self._sources[path] for path in ("data/recipes.json", journal.JOURNAL_PATH)):
+                loaded = _load_recipes()
+                loaded = journal.merge(loaded if isinstance(loaded, list) else [], journal.read()[0])
+                self._applyRecipes(list(loaded), stats)
+
+            self._sources = sources
+        return stats
+
+    def _applyRecipes(self, loaded, stats):
+        snap = self._snapshot
+        recipes, index = snap.recipes, snap.index
+        if self._hashes is None:
+            self._hashes = [RecipeStore.contentHash(r) if r is not None else None for r in recipes]
+
+        # unchanged recipes keep their slot
+        by_hash = {}
+        for slot, h in enumerate(self._hashes):
+            if h is not None:
+                by_hash.setdefault(h, []).append(slot)
+        incoming = []
+        for recipe in loaded:
+            h = RecipeStore.contentHash(recipe)
+            if by_hash.get(h):
+                by_hash[h].pop(0)
+            else:
+                incoming.append((h, recipe))
+
+        stale = sorted(slot for slots in by_hash.values() for slot in slots)
+        if not incoming and not stale:
+            return
+
+        recipes, index, hashes = recipes.copy(), index.fork(), list(self._hashes)
+
+        # a stale slot whose id or name comes back is a changed recipe
+        by_key = {}
+        for slot in stale:
+            by_key.setdefault(_recipeKey(recipes[slot]), slot)
+
+        for h, recipe in incoming:
+            slot = by_key.pop(_recipeKey(recipe), None)
+            if slot is not None:
+                index.remove(slot, recipes[slot])
+                recipes[slot] = recipe
+                hashes[slot] = h
+                stats["changed"] += 1
+            else:
+                slot = len(recipes)
+                recipes.append(recipe)
+                hashes.append(h)
+                stats["added"] += 1
+            index.add(slot, recipe)
+
+        for slot in by_key.values():
+            index.remove(slot, recipes[slot])
+            recipes[slot] = None
+            hashes[slot] = None
+            stats["removed"] += 1
+
+        # slots were reused, so Recipe objects built from the old ones go
+        self._snapshot = snap._replace(recipes=recipes, index=index, parsed=BodyCache())
+        self._hashes = hashes
+        self._recommender = None
+        self._planner = None
+
+    # ------------------------------
+    # PANTRY SEARCH
+    # ------------------------------
+    def findByIngredients(self, on_hand, preferences: dict, limit=10):
+        """
+        Recipes ranked by coverage (the fraction of their ingredients found in
+        on_hand) that fit the preferences, as
+        [{"recipe": dict, "coverage": float, "missing": [ingredient names]}].
+        """
+        snap = self._snapshot
+        recipes, index = snap.recipes, snap.index
+        ranked, covered = index.pantry(
+            on_hand,
+            diet=preferences.get("diet_mode", "none"),
+            exclusions=preferences.get("exclusions", []),
+            limit=limit,
+        )
+
+        results = []
+        for slot, coverage in ranked:
+            recipe = recipes[slot]
+            # keyed like the index (match_data): the canonical name when the source gave one
+            missing = [
+                ing["name"] for ing in recipe.get("ingredients", [])
+                if index.ingredient_ids.get(ingredient_words(ing.get("canonical") or ing["name"])) not in covered
+            ]
+            results.append({"recipe": recipe, "coverage": coverage, "missing": missing})
+        return results
+
+    # ------------------------------
+    # RECOMMENDATIONS
+    # ------------------------------
+    def recommendRecipes(self, history_recipes, preferences: dict, k=5):
+        """
+        Up to k corpus recipes most similar to the given history recipes that
+        fit the preferences, as [{"recipe": dict, "score": float}].
+        """
+        snap = self._snapshot
+        recipes, index = snap.recipes, snap.index
+        recommender = self._recommender
+        if recommender is None or recommender.index is not index:
+            from recommender import Recommender  # needs numpy; only loaded when used
+            recommender = self._recommender = Recommender(recipes, index)
+
+        return [
+            {"recipe": recipes[slot], "score": score}
+            for slot, score in recommender.recommend(history_recipes, preferences, k)
+        ]
+
+    # ------------------------------
+    # MEAL PLANS
+    # ------------------------------
+    def planMeals(self, preferences: dict, days=7, meals_per_day=3, recent_recipes=(), seed=None):
+        """
+        A plan of distinct corpus recipes that fit the preferences, avoiding
+        recent_recipes where possible, with its aggregated shopping list:
+        {"days": [[{"meal", "recipe"}]], "shopping_list": [...], "relaxed": [...]}.
+        """
+        from planner import MEALS, MealPlanner, shopping_list
+
+        snap = self._snapshot
+        recipes, index = snap.recipes, snap.index
+        planner = self._planner
+        if planner is None or planner.index is not index:
+            planner = self._planner = MealPlanner(recipes, index)
+
+        recent = [index.lookup(r) for r in recent_recipes]
+
+        def accept(slot):
+            # the index is only a prefilter; the Validator has the last word
+            recipe = self._dict_to_recipe(recipes[slot])
+            return self.validator.checkFeasibility(recipe, preferences)["feasible"]
+
+        plan, relaxed = planner.plan(
+            preferences, days, meals_per_day,
+            recent=[slot for slot in recent if slot is not None],
+            accept=accept, seed=seed,
+        )
+
+        meal_names = MEALS if meals_per_day == len(MEALS) else [f"meal {i}" for i in range(1, meals_per_day + 1)]
+        chosen = [recipes[slot] for day in plan for slot in day if slot is not None]
+        return {
+            "days": [
+                [
+                    {"meal": meal, "recipe": recipes[slot] if slot is not None else None}
+                    for meal, slot in zip(meal_names, day)
+                ]
+                for day in plan
+            ],
+            "shopping_list": shopping_list(chosen),
+            "relaxed": relaxed,
+        }
+
     # ------------------------------
     # FEASIBILITY CHECK
     # ------------------------------
-    def validateRecipe(self, recipe: dict, preferences: dict):
+    def validateRecipe(self, recipe: Recipe, preferences: dict):
+        """
+        Check recipe against preferences without changing it. A feasible
+        result carries "overlay", the SubstitutionOverlay to apply when the
+        recipe is shown or saved.
+        """
         result = self.validator.checkFeasibility(recipe, preferences)
 
         if not result["feasible"]:
@@ -181,7 +601,8 @@ class RecipeService:
             }
 
         exclusions = [e.lower() for e in preferences.get("exclusions", [])]
-        applied_subs = []
+        subs = self.subs
+        replacements, applied_subs = {}, []
 
         # for ing in recipe["ingredients"]:
         #     name = ing["name"].lower()
@@ -190,23 +611,41 @@ class RecipeService:
         #             ing["name"] = self.subs[banned]
         #             applied_subs.append((banned, self.subs[banned]))
 
-        for ing in recipe.ingredients:
-            name = ing.name.lower()
+        for i, ing in enumerate(recipe.ingredients):
+            ids = term_ids(canonical_name(ing.canonical or ing.name))
             for banned in exclusions:
-                if banned in name and banned in self.subs:
-                    ing.name = self.subs[banned]
-                    applied_subs.append((banned, self.subs[banned]))
+                if ingredient_id(canonical_name(banned)) in ids and banned in subs:
+                    replacements[i] = subs[banned]
+                    applied_subs.append((banned, subs[banned]))
 
         return {
             "feasible": True,
-            "substitutions": applied_subs
+            "substitutions": applied_subs,
+            "overlay": SubstitutionOverlay(replacements, tuple(applied_subs)),
         }
 
     # ------------------------------
     # GENERATE RECIPE
     # ------------------------------
     def generateCompliantRecipe(self, request: RecipeRequest):
-        recipe = self.findRecipe(request.dish_name)
+        """
+        Waits at most request.budget seconds (default LATENCY_BUDGET) for
+        a recipe that has to come from the API. Past that, the closest
+        local recipe that fits the preferences is returned with
+        "provisional": True, or a failure if none does. The API lookup
+        carries on in the background, so asking again later finds the
+        recipe locally.
+        """
+        preferences = {
+            "diet_mode": request.diet_mode,
+            "exclusions": request.exclusions
+        }
+
+        budget = LATENCY_BUDGET if request.budget is None else request.budget
+        recipe = self._findWithin(request.dish_name, budget)
+        if recipe is _TIMED_OUT:
+            current_span().set(provisional=True)
+            return self._provisionalRecipe(request.dish_name, preferences)
 
         if not recipe:
             return {
@@ -214,11 +653,6 @@ class RecipeService:
                 "message": "Could not find a recipe online or locally."
             }
 
-        preferences = {
-            "diet_mode": request.diet_mode,
-            "exclusions": request.exclusions
-        }
-
         feasibility = self.validateRecipe(recipe, preferences)
 
         if not feasibility["feasible"]:
@@ -227,6 +661,8 @@ class RecipeService:
                 "message": feasibility["reason"]
             }
 
+        # the found recipe is shared; this request's substitutions are applied to a copy
+        recipe = feasibility["overlay"].apply(recipe)
         completed = CompletedRecipe(
             dish_name=recipe.dish_name,
             ingredients=recipe.ingredients,
@@ -242,58 +678,342 @@ class RecipeService:
             "recipe": recipe_dict,
             "substitutions": feasibility.get("substitutions", [])
         }
-    
+
+    def _findWithin(self, dish_name, budget):
+        """
+        findRecipe(dish_name), or _TIMED_OUT when it needs the API and
+        takes longer than budget seconds; the lookup then finishes in the
+        background and stores what it finds.
+        """
+        if budget <= 0 or self._snapshot.index.search(dish_name) is not None:
+            return self.findRecipe(dish_name)
+
+        future = Future()
+        context = contextvars.copy_context()  # the lookup stays part of this request's trace
+
+        def lookup():
+            try:
+                future.set_result(context.run(self.findRecipe, dish_name))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=lookup, name="recipe-lookup", daemon=True).start()
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeout:
+            return _TIMED_OUT
+
+    def _provisionalRecipe(self, dish_name, preferences):
+        snap = self._snapshot
+        for slot in snap.index.similar(dish_name, FALLBACK_CANDIDATES):
+            recipe = self._recipeAt(snap, slot)
+            feasibility = self.validateRecipe(recipe, preferences)
+            if feasibility["feasible"]:
+                return {
+                    "success": True,
+                    "provisional": True,
+                    "recipe": self._recipe_to_dict(feasibility["overlay"].apply(recipe)),
+                    "substitutions": feasibility.get("substitutions", []),
+                }
+
+        # a stand-in that breaks the user's diet or exclusions is no answer
+        return {
+            "success": False,
+            "provisional": True,
+            "message": "The recipe service is slow to answer; try again in a moment."
+        }
+
+
+# findRecipe did not answer within the latency budget
+_TIMED_OUT = object()
+
+
+def _recipeKey(recipe: dict):
+    """What identifies a recipe across edits: its Spoonacular id, else its normalized name."""
+    recipe_id = recipe.get("spoonacular_id")
+    return ("id", recipe_id) if recipe_id is not None else ("name", normalize_name(recipe.get("dish_name", "")))
+
+
 class Validator:
+    @traced("Validator.checkFeasibility")
     def checkFeasibility(self, recipe: dict, preferences: dict):
         diet = preferences.get("diet_mode", "none")
         exclusions = [e.lower() for e in preferences.get("exclusions", [])]
 
-        ingredient_names = [ing.name.lower() for ing in recipe.ingredients]
+        # canonical term ids of the whole recipe: most checks below are a set lookup
+        recipe_ids = ingredient_term_ids(recipe.ingredients)
+        words = None
 
         # --- Check exclusions ---
         for banned in exclusions:
-            for name in ingredient_names:
-                if banned in name:
-                    return {
-                        "feasible": False,
-                        "reason": f"Contains excluded ingredient: {banned}"
-                    }
-
-        # --- Diet rules ---
-        restricted = {
-            "vegetarian": ["chicken", "beef", "pork", "fish", "shrimp"],
-            "vegan": ["chicken", "beef", "pork", "fish", "shrimp", "egg", "milk", "cheese", "butter"]
-        }
+            if not first_match(recipe_ids, [banned]):
+                # not a whole term of an ingredient; it may still be part of a word ("nuts" in "walnuts")
+                if words is None:
+                    words = [canonical_name(ing.canonical or ing.name).split() for ing in recipe.ingredients]
+                if not any(excluded_by(banned, ing_words) for ing_words in words):
+                    continue
+            return {
+                "feasible": False,
+                "reason": f"Contains excluded ingredient: {banned}"
+            }
 
-        if diet in restricted:
-            for bad in restricted[diet]:
-                if any(bad in name for name in ingredient_names):
-                    return {
-                        "feasible": False,
-                        "reason": f"Recipe violates {diet} diet (contains: {bad})"
-                    }
+        # --- Diet rules (compiled from data/diets.json, see diets.py) ---
+        diets = taxonomy()
+        if diet in diets:
+            bad = diets.violation(recipe.ingredients, diet)
+            if bad:
+                return {
+                    "feasible": False,
+                    "reason": f"Recipe violates {diet} diet (contains: {bad})"
+                }
 
         return {
             "feasible": True,
             "reason": ""
         }
 
-class HistoryService:
-    def __init__(self):
-        self.history = _load_history()
+class RecipeStore:
+    """
+    Content-addressed recipe bodies: each distinct recipe is stored once,
+    keyed by a hash of its content, and history entries refer to that key.
+    The file is only read the first time a recipe is stored or resolved.
+    """
+
+    def __init__(self, path="data/recipe_store.json"):
+        self.path = path
+        self._recipes = None
+        self._write_lock = Lock()
+
+    @staticmethod
+    def contentHash(recipe: dict) -> str:
+        canonical = json.dumps(recipe, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def recipes(self):
+        if self._recipes is None:
+            self._recipes = MappingProxyType(snapshot.load_json(self.path))
+        return self._recipes
+
+    def put(self, recipe: dict) -> str:
+        key = self.contentHash(recipe)
+        if key not in self.recipes:
+            with self._write_lock:
+                if key not in self.recipes:
+                    self._recipes = _with(self.recipes, key, recipe)
+                    _save_json(self.path, dict(self._recipes))
+        return key
+
+    def get(self, key: str):
+        return self.recipes.get(key)
+
+
+class UserHistoryIndex:
+    """
+    Per-user lookup structures over a history list, kept in step with it.
+    Entries are appended in time order, so timestamps stay sorted and a
+    time range is two bisects; dish counts answer top-N queries without
+    scanning the history.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.timestamps = []
+        self.counts = Counter()
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        self.timestamps.append(entry.get("timestamp") or "")
+        self.counts[entry.get("dish_name", "")] += 1
+
+    def between(self, start=None, end=None):
+        lo = bisect_left(self.timestamps, _isoformat(start)) if start else 0
+        hi = bisect_left(self.timestamps, _isoformat(end)) if end else len(self.timestamps)
+        return self.entries[lo:hi]
+
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return value
+
+
+def _shard_path(shard_dir, username):
+    # hashed so any username is a safe file name
+    digest = hashlib.sha1(username.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(shard_dir, f"{digest}.json")
+
+
+def migrateLegacyHistory(legacy_path=LEGACY_HISTORY_PATH, shard_dir=HISTORY_DIR):
+    """
+    Split the old single history.json into per-user shards. Entries from
+    the old file go before any already in a user's shard. The old file is
+    kept as history.json.migrated. Returns the number of users migrated.
+
+    shard_dir is a directory or a function from username to directory.
+    """
+    legacy = _load_json(legacy_path) if os.path.exists(legacy_path) else {}
+    if not isinstance(legacy, dict) or not legacy:
+        return 0
+
+    dir_for = shard_dir if callable(shard_dir) else (lambda _: shard_dir)
+
+    for username, entries in legacy.items():
+        os.makedirs(dir_for(username), exist_ok=True)
+        path = _shard_path(dir_for(username), username)
+        existing = _load_json(path).get("entries", [])
+        _save_json(path, {"username": username, "entries": entries + existing})
+
+    os.replace(legacy_path, legacy_path + ".migrated")
+    return len(legacy)
+
 
-        if isinstance(self.history, list):
-            self.history = {}
-            _save_json("data/history.json", self.history)
+class HistoryService:
+    """
+    History is sharded into one file per user under history/ on the user's
+    data root, so adding an entry only reads and writes that user's shard.
+    Shards are loaded on demand and the least recently used are evicted
+    from memory once more than max_resident are loaded.
+
+    Passing shard_dir keeps every shard in that one directory instead.
+
+    A user's shard is only loaded or written while holding that user's
+    lock, so concurrent addEntry calls cannot lose an entry, even when
+    the shard is evicted and reloaded in between. Users hash onto a fixed
+    set of HISTORY_LOCK_STRIPES locks, so the locks do not grow with the
+    number of users.
+    """
+
+    def __init__(self, store: RecipeStore = None, shard_dir=None, max_resident=256, ring: HashRing = None):
+        self.store = store or RecipeStore()
+        self.ring = ring or ring_from_env()
+        self.shard_dir = shard_dir
+        self.max_resident = max_resident
+        self._shards = OrderedDict()  # username -> UserHistoryIndex, least recently used first
+        self._lock = Lock()           # guards _shards
+        # held across loading or changing a shard; a user always gets the same one
+        self._user_locks = [threading.RLock() for _ in range(HISTORY_LOCK_STRIPES)]
+
+        for root in ([shard_dir] if shard_dir else [self.ring.path(r, HISTORY_SUBDIR) for r in self.ring.roots]):
+            os.makedirs(root, exist_ok=True)
+        migrateLegacyHistory(shard_dir=self.shardDir)
+
+    def shardDir(self, username):
+        return self.shard_dir or self.ring.pathFor(username, HISTORY_SUBDIR)
+
+    def shardPath(self, username):
+        return _shard_path(self.shardDir(username), username)
+
+    def _userLock(self, username):
+        return self._user_locks[hash(username) % len(self._user_locks)]
+
+    def _shard(self, username) -> UserHistoryIndex:
+        with self._lock:
+            shard = self._shards.get(username)
+            if shard is not None:
+                self._shards.move_to_end(username)
+                return shard
+
+        # loaded under the user's lock, so the file read is never older than a save in progress
+        with self._userLock(username):
+            with self._lock:
+                shard = self._shards.get(username)
+            if shard is None:
+                shard = UserHistoryIndex(self._loadShard(username))
+
+            with self._lock:
+                shard = self._shards.setdefault(username, shard)
+                self._shards.move_to_end(username)
+                while len(self._shards) > self.max_resident:
+                    self._shards.popitem(last=False)
+        return shard
+
+    def _loadShard(self, username):
+        entries = _load_json(self.shardPath(username)).get("entries", [])
+
+        # Older history files stored a full recipe copy per entry; move them into the store.
+        if any("recipe_id" not in entry for entry in entries):
+            entries = [
+                entry if "recipe_id" in entry else self._makeEntry(entry, [], timestamp=None)
+                for entry in entries
+            ]
+            self._saveShard(username, entries)
+        return entries
+
+    def _saveShard(self, username, entries):
+        _save_json(self.shardPath(username), {"username": username, "entries": entries})
+
+    def _makeEntry(self, recipe, substitutions, timestamp):
+        return {
+            "recipe_id": self.store.put(recipe),
+            "dish_name": recipe.get("dish_name", ""),
+            "timestamp": timestamp,
+            "substitutions": [list(sub) for sub in substitutions or []],
+        }
 
-    def addEntry(self, username, recipe):
-        if username not in self.history:
-            self.history[username] = []
+    @traced("HistoryService.addEntry")
+    def addEntry(self, username, recipe, substitutions=None):
+        with self._userLock(username):
+            shard = self._shard(username)
 
-        self.history[username].append(recipe)
-        _save_json("data/history.json", self.history)
+            timestamp = datetime.now().isoformat(timespec="seconds")
+            entry = self._makeEntry(recipe, substitutions, timestamp)
+            shard.entries.append(entry)
+            shard.add(entry)
+            self._saveShard(username, shard.entries)
 
     def getHistory(self, username):
-        if isinstance(self.history, list):  
-            return []
-        return self.history.get(username, [])
\ No newline at end of file
+        """Entries carry the dish name for listing; use getRecipe() for the full recipe."""
+        return self._shard(username).entries
+
+    def getRecipe(self, entry):
+        return self.store.get(entry.get("recipe_id"))
+
+    # ------------------------------
+    # QUERIES
+    # ------------------------------
+    def _index(self, username) -> UserHistoryIndex:
+        return self._shard(username)
+
+    def getPage(self, username, page=1, page_size=10, newest_first=True):
+        """One page of a user's history; the cost depends on page_size, not history length."""
+        entries = self.getHistory(username)
+        total = len(entries)
+        pages = max((total + page_size - 1) // page_size, 1)
+        page = min(max(page, 1), pages)
+
+        if newest_first:
+            hi = total - (page - 1) * page_size
+            items = entries[max(hi - page_size, 0):hi][::-1]
+        else:
+            lo = (page - 1) * page_size
+            items = entries[lo:lo + page_size]
+
+        return {
+            "entries": items,
+            "page": page,
+            "pages": pages,
+            "page_size": page_size,
+            "total": total,
+        }
+
+    def getEntriesBetween(self, username, start=None, end=None):
+        """Entries with start <= timestamp < end (datetimes or ISO strings); either bound may be None."""
+        return self._index(username).between(start, end)
+
+    def topDishes(self, username, n=10):
+        """The user's n most generated dishes as (dish_name, count) pairs."""
+        return self._index(username).counts.most_common(n)
+
+    def getStats(self, username):
+        index = self._index(username)
+        # migrated entries have no timestamp and sort first
+        dated = index.timestamps[bisect_right(index.timestamps, ""):]
+        return {
+            "total": len(index.timestamps),
+            "distinct": len(index.counts),
+            "first": dated[0] if dated else None,
+            "last": dated[-1] if dated else None,
+            "top": index.counts.most_common(5),
+        }
@@ -0,0 +1,161 @@
+# snapshot.py
+"""
+Versioned binary snapshots of loaded state, so a restart does not parse
+the same JSON again.
+
+A snapshot records the files it was built from (size, mtime and sha256).
+It is fresh while size and mtime still match; when only the mtime moved
+(a checkout, a touch) the content hash decides, as it does when the
+file was modified so close to the snapshot that a later write could
+share its mtime. Snapshots live in a
+snapshots/ directory next to their source (data/snapshots/ by default)
+and are skipped entirely with RECIPE_SNAPSHOTS=0.
+
+RecipeService snapshots into a corpus pack (see packed.py); JSON files
+such as users.json are snapshotted with load_json().
+"""
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+import codec
+
+FORMAT_VERSION = 1
+MAGIC = b"RCPSNAP"
+
+# Files modified this close to a snapshot are verified by hash (coarse mtime clocks).
+RACY_NS = 2_000_000_000
+
+
+def enabled() -> bool:
+    return os.environ.get("RECIPE_SNAPSHOTS", "1") != "0"
+
+
+def snapshot_path(source: str, suffix=".snap") -> str:
+    """data/users.json -> data/snapshots/users.json.snap"""
+    directory, name = os.path.split(source)
+    return os.path.join(directory, "snapshots", name + suffix)
+
+
+# -----------------------------------------------------------
+# SOURCE FINGERPRINTS
+# -----------------------------------------------------------
+
+def _sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(paths) -> dict:
+    """{path: {"size", "mtime_ns", "sha256"}} (None for a missing file)."""
+    result = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            result[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _sha256(path)}
+        except OSError:
+            result[path] = None
+    return result
+
+
+def is_fresh(recorded: dict, paths, created_ns=0) -> bool:
+    """True if every path still has the content recorded by fingerprint() at created_ns."""
+    for path in paths:
+        if path not in recorded:
+            return False
+        before = recorded[path]
+        try:
+            st = os.stat(path)
+        except OSError:
+            if before is not None:
+                return False
+            continue
+        if before is None or st.st_size != before["size"]:
+            return False
+        racy = st.st_mtime_ns >= created_ns - RACY_NS
+        if (st.st_mtime_ns != before["mtime_ns"] or racy) and _sha256(path) != before["sha256"]:
+            return False
+    return True
+
+
+def header(sources) -> dict:
+    """What every snapshot records about how it was made."""
+    return {
+        "version": FORMAT_VERSION,
+        "python": sys.version_info[:2],
+        "byteorder": sys.byteorder,
+        "created_ns": time.time_ns(),
+        "sources": fingerprint(sources),
+    }
+
+
+def header_matches(head: dict, sources) -> bool:
+    return (head.get("version") == FORMAT_VERSION
+            and tuple(head.get("python", ())) == sys.version_info[:2]
+            and head.get("byteorder") == sys.byteorder
+            and is_fresh(head.get("sources", {}), sources, head.get("created_ns", 0)))
+
+
+# -----------------------------------------------------------
+# PICKLED STATE
+# -----------------------------------------------------------
+
+def load(path: str, sources):
+    """The state saved at path if it is still fresh for sources, else None."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            if not header_matches(pickle.load(f), sources):
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def save(path: str, sources, state, head=None):
+    """Write state to path. Pass head (from header()) taken before the sources were read."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        pickle.dump(head or header(sources), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_json(path: str, default=None):
+    """
+    codec.load(path) through a snapshot: the parsed value comes from the
+    snapshot while path is unchanged, otherwise path is parsed and the
+    snapshot rewritten. Unreadable files give default ({}).
+    """
+    default = {} if default is None else default
+    if not enabled():
+        return _parse(path, default)
+
+    snap = snapshot_path(path)
+    state = load(snap, [path])
+    if state is not None:
+        return state
+
+    head = header([path]) if os.path.exists(path) else None
+    data = _parse(path, default)
+    if head is not None:
+        try:
+            save(snap, [path], data, head)
+        except OSError:
+            pass  # a read-only data dir just means no warm start
+    return data
+
+
+def _parse(path, default):
+    try:
+        return codec.load(path)
+    except (OSError, ValueError):
+        return default
@@ -1,8 +1,9 @@
 # storage.py
-import json
 import os
 from threading import Lock
 
+import codec
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -16,10 +17,10 @@ def load_json(filename, default):
     if not os.path.exists(path):
         save_json(filename, default)
         return default
-    with _lock, open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with _lock:
+        return codec.load(path)
 
 def save_json(filename, data):
     path = _path(filename)
-    with _lock, open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with _lock:
+        codec.dump(data, path)
@@ -0,0 +1,166 @@
+import os
+import csv
+import json
+import shutil
+import tempfile
+import unittest
+
+from bulk import export_recipes, import_recipes, iter_json_array
+from diets import DIETS_PATH
+from packed import SUBSTITUTIONS_PATH, open_pack
+
+
+class TestBulkImportExport(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Create a scratch directory holding a small existing corpus
+        """
+        self.tmp = tempfile.mkdtemp()
+        self.corpus = os.path.join(self.tmp, "recipes.json")
+        with open(self.corpus, "w", encoding="utf-8") as f:
+            json.dump([{
+                "dish_name": "Poutine",
+                "ingredients": [{"name": "Potato", "quantity": "500 g"}],
+                "steps": ["Fry."]
+            }], f, indent=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write_jsonl(self, rows):
+        path = os.path.join(self.tmp, "dump.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write((row if isinstance(row, str) else json.dumps(row)) + "\n")
+        return path
+
+    # -----------------------------------------
+    # TC-BULK-01: jsonl import with duplicates and bad rows
+    # -----------------------------------------
+    def test_import_jsonl_dedupes_and_validates(self):
+        """
+        TC-BULK-01:
+        Given a dump with a new recipe, duplicates (by name and by id)
+        and invalid rows, when we import it with a process pool,
+        then only the new recipes are appended to the corpus.
+        """
+        src = self._write_jsonl([
+            {"dish_name": "Veggie Chili", "spoonacular_id": 7,
+             "ingredients": [{"name": "Beans", "quantity": "1 can"}], "steps": ["Simmer."]},
+            {"dish_name": "  POUTINE ", "ingredients": ["Potato"], "steps": []},
+            {"dish_name": "Chili (copy)", "spoonacular_id": "7", "ingredients": ["Beans"], "steps": []},
+            {"dish_name": "", "ingredients": ["Water"]},
+            {"dish_name": "No Ingredients", "ingredients": []},
+            "{not json",
+        ])
+
+        stats, index = import_recipes(src, "jsonl", out=self.corpus, workers=2, chunk_size=2)
+
+        self.assertEqual(stats, {"read": 6, "imported": 1, "duplicates": 2, "invalid": 3})
+        self.assertEqual(len(index), 2)
+
+        with open(self.corpus, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual([r["dish_name"] for r in data], ["Poutine", "Veggie Chili"])
+        self.assertEqual(data[1]["spoonacular_id"], 7)
+
+        # indexes were built in the same pass
+        self.assertEqual(index.search("chili"), 1)
+        self.assertTrue(index.fits_diet(1, "vegan"))
+
+    def test_import_csv_with_replace(self):
+        """
+        TC-BULK-02:
+        A CSV dump with ';'-separated ingredients replaces the corpus when
+        replace=True, and the result loads in RecipeService's format.
+        """
+        src = os.path.join(self.tmp, "dump.csv")
+        with open(src, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["dish_name", "spoonacular_id", "ingredients", "steps"])
+            writer.writerow(["Beef Stew", "", "Beef; Carrot; Onion", "Brown beef.;Simmer."])
+
+        stats, index = import_recipes(src, "csv", out=self.corpus, replace=True, workers=1)
+
+        self.assertEqual(stats["imported"], 1)
+        recipes = list(iter_json_array(self.corpus))
+        self.assertEqual(len(recipes), 1)
+        self.assertEqual([i["name"] for i in recipes[0]["ingredients"]], ["Beef", "Carrot", "Onion"])
+        self.assertEqual(recipes[0]["steps"], ["Brown beef.", "Simmer."])
+        self.assertFalse(index.fits_diet(0, "vegetarian"))
+
+    def test_export_round_trip(self):
+        """
+        TC-BULK-03:
+        Exporting the corpus and importing it into an empty corpus
+        should give back the same recipes, for both formats.
+        """
+        for fmt in ("jsonl", "csv"):
+            dump = os.path.join(self.tmp, f"out.{fmt}")
+            copy = os.path.join(self.tmp, f"copy-{fmt}.json")
+
+            self.assertEqual(export_recipes(dump, fmt, src=self.corpus), 1)
+            import_recipes(dump, fmt, out=copy, workers=1)
+
+            self.assertEqual(list(iter_json_array(copy)), list(iter_json_array(self.corpus)))
+
+    def test_streaming_reader_matches_json_load(self):
+        """
+        TC-BULK-04:
+        iter_json_array() should read the hand-edited data/recipes.json
+        exactly like json.load, even with a tiny buffer.
+        """
+        path = os.path.join(os.path.dirname(__file__), "data", "recipes.json")
+        with open(path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+
+        self.assertEqual(list(iter_json_array(path, buffer_size=7)), expected)
+
+    def test_round_trip_keeps_canonical_fields(self):
+        """
+        TC-BULK-05:
+        Canonical name, amount and unit of an ingredient survive an
+        export followed by import --replace, for both formats.
+        """
+        fetched = self._write_jsonl([{
+            "dish_name": "Pancakes", "spoonacular_id": 3,
+            "ingredients": [{"name": "2 large eggs", "quantity": "2", "canonical": "egg", "amount": 2, "unit": ""},
+                            {"name": "Flour", "quantity": "1.5 cup", "canonical": "flour", "amount": "1.5",
+                             "unit": "cup"}],
+            "steps": ["Whisk.", "Fry."]
+        }])
+        import_recipes(fetched, "jsonl", out=self.corpus, replace=True, workers=1)
+        ingredients = list(iter_json_array(self.corpus))[0]["ingredients"]
+        self.assertEqual(ingredients[1], {"name": "Flour", "quantity": "1.5 cup", "canonical": "flour",
+                                          "amount": 1.5, "unit": "cup"})
+
+        for fmt in ("jsonl", "csv"):
+            dump = os.path.join(self.tmp, f"out.{fmt}")
+            copy = os.path.join(self.tmp, f"copy-{fmt}.json")
+            export_recipes(dump, fmt, src=self.corpus)
+            import_recipes(dump, fmt, out=copy, replace=True, workers=1)
+            self.assertEqual(list(iter_json_array(copy))[0]["ingredients"], ingredients)
+
+    def test_import_writes_pack_from_its_index(self):
+        """
+        TC-BULK-06:
+        With a pack path, the imported corpus is packed from the indexes
+        built during the import, and the pack is fresh for the corpus.
+        """
+        src = self._write_jsonl([{"dish_name": "Veggie Chili", "ingredients": ["Beans"], "steps": ["Simmer."]}])
+        pack = os.path.join(self.tmp, "recipes.json.pack")
+
+        stats, index = import_recipes(src, "jsonl", out=self.corpus, workers=1, pack_path=pack)
+
+        corpus = open_pack(pack, (self.corpus, SUBSTITUTIONS_PATH, DIETS_PATH))
+        self.assertIsNotNone(corpus)
+        self.assertEqual(list(corpus.recipes()), list(iter_json_array(self.corpus)))
+        packed = corpus.index()
+        self.assertEqual(packed.search("chili"), index.search("chili"))
+        self.assertTrue(packed.fits_diet(1, "vegan"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestCLIStartup(unittest.TestCase):
+
+    def _run(self, code):
+        return subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.split()
+
+    # -----------------------------------------
+    # TC-CLI-01: nothing is loaded before the login menu
+    # -----------------------------------------
+    def test_cli_construction_is_lazy(self):
+        """
+        TC-CLI-01:
+        Creating the CLI should not build any controller or service,
+        and should not import requests.
+        """
+        out = self._run(
+            "import sys\n"
+            "from cli_view import CLI\n"
+            "cli = CLI()\n"
+            "print(len(vars(cli)), 'requests' in sys.modules)\n"
+        )
+
+        self.assertEqual(out, ["0", "False"])
+
+    def test_service_built_on_first_use(self):
+        """
+        TC-CLI-02:
+        A controller's service is built the first time it is needed
+        and then reused; a local recipe lookup does not import requests.
+        """
+        out = self._run(
+            "import sys\n"
+            "from cli_view import CLI\n"
+            "cli = CLI()\n"
+            "service = cli.recipe_ctrl.service\n"
+            "cli.recipe_ctrl.findRecipe('Poutine')\n"
+            "print(cli.recipe_ctrl.service is service, 'requests' in sys.modules)\n"
+        )
+
+        self.assertEqual(out, ["True", "False"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import codec
+
+SHARD = {
+    "username": "zoë",
+    "entries": [
+        {"recipe_id": "ab12", "dish_name": "Crème brûlée", "timestamp": "2024-05-01T18:30:00",
+         "substitutions": [["butter", "vegan butter"]]},
+        {"recipe_id": "cd34", "dish_name": "Poutine", "timestamp": None, "substitutions": []},
+    ],
+}
+
+
+class TestCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "history.json")
+
+    def tearDown(self):
+        codec.set_codec(None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    # -----------------------------------------
+    # TC-CODEC-01: backends agree
+    # -----------------------------------------
+    def test_backends_round_trip_compact_utf8(self):
+        """
+        TC-CODEC-01:
+        Every installed backend writes compact UTF-8 JSON that the
+        standard library reads back unchanged, and pretty output is
+        indented.
+        """
+        self.assertIn("json", codec.available())
+        for name in codec.available():
+            with self.subTest(codec=name):
+                backend = codec.make_codec(name)
+                data = backend.dumps(SHARD)
+                self.assertNotIn(b"\n", data)
+                self.assertNotIn(b", ", data)
+                self.assertIn("Crème".encode("utf-8"), data)
+                self.assertEqual(json.loads(data), SHARD)
+                self.assertEqual(backend.loads(data), SHARD)
+                self.assertEqual(backend.loads(json.dumps(SHARD, indent=4)), SHARD)
+
+                pretty = backend.dumps(SHARD, pretty=True)
+                self.assertIn(b"\n  ", pretty)
+                self.assertEqual(json.loads(pretty), SHARD)
+
+    # -----------------------------------------
+    # TC-CODEC-02: configuration
+    # -----------------------------------------
+    def test_environment_selects_codec_and_pretty_files(self):
+        """
+        TC-CODEC-02:
+        RECIPE_JSON_CODEC picks the backend, RECIPE_JSON_PRETTY indents
+        files written with dump(), and an unknown backend is an error.
+        """
+        with mock.patch.dict(os.environ, {"RECIPE_JSON_CODEC": "json"}):
+            self.assertEqual(codec.codec_from_env().name, "json")
+        with mock.patch.dict(os.environ, {"RECIPE_JSON_CODEC": "simplejson"}):
+            with self.assertRaises(ValueError):
+                codec.codec_from_env()
+
+        codec.dump(SHARD, self.path)
+        compact = os.path.getsize(self.path)
+        with mock.patch.dict(os.environ, {"RECIPE_JSON_PRETTY": "1"}):
+            codec.dump(SHARD, self.path)
+        self.assertGreater(os.path.getsize(self.path), compact)
+        self.assertEqual(codec.load(self.path), SHARD)
+
+
+if __name__ == "__main__":
+    unittest.main()
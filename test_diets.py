@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+import diets
+from diets import TAXONOMY, DietTaxonomy
+from index import DIET_BITS, diet_flags
+from models import Ingredient, Recipe
+from services import PreferencesService, Validator
+
+
+class TestDietTaxonomy(unittest.TestCase):
+
+    # -----------------------------------------
+    # TC-DIET-01: diets from data/diets.json
+    # -----------------------------------------
+    def test_shipped_diets(self):
+        """
+        TC-DIET-01:
+        Every diet of the diet file gets a flag bit and a menu entry, and
+        inherited exclusions apply: vegan rules out meat like vegetarian,
+        keto rules out wheat like gluten-free.
+        """
+        for diet in ("vegetarian", "vegan", "pescatarian", "gluten-free", "dairy-free", "nut-allergy", "keto"):
+            self.assertIn(diet, TAXONOMY)
+            self.assertIn(diet, DIET_BITS)
+        self.assertEqual(PreferencesService().dietModes(), ["none"] + TAXONOMY.diets)
+
+        salmon = [{"name": "2 salmon fillets"}, {"name": "Lemon"}]
+        self.assertTrue(diet_flags(salmon) & DIET_BITS["pescatarian"])
+        self.assertFalse(diet_flags(salmon) & DIET_BITS["vegetarian"])
+
+        self.assertEqual(TAXONOMY.violation([{"name": "Chicken thighs"}], "vegan"), "chicken")
+        self.assertEqual(TAXONOMY.violation([{"name": "2 cups flour"}], "keto"), "flour")
+        self.assertEqual(TAXONOMY.violation([{"name": "Crushed walnuts"}], "nut-allergy"), "walnut")
+        self.assertIsNone(TAXONOMY.violation([{"name": "Chicken thighs"}], "none"))
+
+    # -----------------------------------------
+    # TC-DIET-02: category exceptions
+    # -----------------------------------------
+    def test_exceptions_apply_per_ingredient(self):
+        """
+        TC-DIET-02:
+        An ingredient naming an exception of a category does not count for
+        it (coconut milk is not dairy), but other ingredients still do.
+        """
+        curry = [{"name": "1 can coconut milk"}, {"name": "Chickpeas"}, {"name": "Peanut butter"}]
+        flags = diet_flags(curry)
+        self.assertTrue(flags & DIET_BITS["vegan"])
+        self.assertTrue(flags & DIET_BITS["dairy-free"])
+        self.assertFalse(flags & DIET_BITS["nut-allergy"])
+
+        self.assertFalse(diet_flags(curry + [{"name": "Milk"}]) & DIET_BITS["dairy-free"])
+
+        recipe = Recipe(dish_name="Curry", ingredients=(Ingredient(name="Coconut milk"), Ingredient(name="Butter")),
+                        steps=())
+        result = Validator().checkFeasibility(recipe, {"diet_mode": "vegan", "exclusions": []})
+        self.assertEqual(result["reason"], "Recipe violates vegan diet (contains: butter)")
+
+    # -----------------------------------------
+    # TC-DIET-03: new diets need no code
+    # -----------------------------------------
+    def test_compiles_custom_definitions(self):
+        """
+        TC-DIET-03:
+        A definition with its own categories and diets compiles to
+        inherited masks; cycles and unknown categories are rejected.
+        """
+        taxonomy = DietTaxonomy({
+            "categories": {"meat": {"terms": ["beef"]}, "allium": {"terms": ["onions", "garlic"]}},
+            "diets": {"jain": {"inherits": ["vegetarian"], "excludes": ["allium"]},
+                      "vegetarian": {"excludes": ["meat"]}},
+        })
+        self.assertEqual(taxonomy.diets, ["jain", "vegetarian"])
+        self.assertEqual(taxonomy.violation([{"name": "1 red onion"}], "jain"), "onion")
+        self.assertEqual(taxonomy.violation([{"name": "Beef"}], "jain"), "beef")
+        self.assertIsNone(taxonomy.violation([{"name": "1 red onion"}], "vegetarian"))
+        self.assertEqual(taxonomy.flags([{"name": "Garlic"}]), taxonomy.bits["vegetarian"])
+
+        with self.assertRaises(ValueError):
+            DietTaxonomy({"diets": {"a": {"inherits": ["b"]}, "b": {"inherits": ["a"]}}})
+        with self.assertRaises(ValueError):
+            DietTaxonomy({"diets": {"a": {"excludes": ["nope"]}}})
+
+    # -----------------------------------------
+    # TC-DIET-04: diet file read on first use
+    # -----------------------------------------
+    def test_missing_diet_file_means_no_diets(self):
+        """
+        TC-DIET-04:
+        The diet file is read on the first diet check, once; without it
+        there are no diets and every recipe passes the diet check.
+        """
+        with mock.patch.object(diets, "_taxonomy", None), \
+                mock.patch.object(DietTaxonomy, "load", side_effect=FileNotFoundError) as load:
+            self.assertEqual(PreferencesService().dietModes(), ["none"])
+            recipe = Recipe(dish_name="Omelette", ingredients=[Ingredient(name="3 eggs")], steps=[])
+            self.assertTrue(Validator().checkFeasibility(recipe, {"diet_mode": "vegan"})["feasible"])
+            self.assertEqual(diet_flags([{"name": "3 eggs"}]), 0)
+            self.assertEqual(load.call_count, 1)
+
+    # -----------------------------------------
+    # TC-DIET-05: unnamed nuts
+    # -----------------------------------------
+    def test_unnamed_nuts_break_nut_allergy(self):
+        """
+        TC-DIET-05:
+        Nuts that are not named by kind (mixed nuts, nut butter) break
+        nut-allergy; words that only contain "nut" do not, and nut butter
+        is not dairy.
+        """
+        validator = Validator()
+        for name in ("1 cup mixed nuts", "2 tbsp nut butter"):
+            with self.subTest(ingredient=name):
+                recipe = Recipe(dish_name="Trail Mix", ingredients=(Ingredient(name=name),), steps=())
+                result = validator.checkFeasibility(recipe, {"diet_mode": "nut-allergy", "exclusions": []})
+                self.assertFalse(result["feasible"])
+                self.assertFalse(diet_flags([{"name": name}]) & DIET_BITS["nut-allergy"])
+
+        self.assertTrue(diet_flags([{"name": "2 tbsp nut butter"}]) & DIET_BITS["dairy-free"])
+        for name in ("Coconut milk", "1 tsp nutmeg", "Butternut squash"):
+            self.assertIsNone(TAXONOMY.violation([{"name": name}], "nut-allergy"))
+
+
+if __name__ == "__main__":
+    unittest.main()
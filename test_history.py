@@ -1,15 +1,22 @@
 import os
 import json
 import shutil
+import threading
 import unittest
+from datetime import datetime
+from unittest import mock
 
 from controllers import HistoryController  
-from services import HistoryService
+from services import HISTORY_LOCK_STRIPES, HistoryService
 
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 HISTORY_PATH = os.path.join(DATA_DIR, "history.json")
 HISTORY_BACKUP_PATH = os.path.join(DATA_DIR, "history_backup.json")
+HISTORY_DIR = os.path.join(DATA_DIR, "history")
+HISTORY_DIR_BACKUP = os.path.join(DATA_DIR, "history_backup")
+STORE_PATH = os.path.join(DATA_DIR, "recipe_store.json")
+STORE_BACKUP_PATH = os.path.join(DATA_DIR, "recipe_store_backup.json")
 
 
 class TestHistoryController(unittest.TestCase):
@@ -17,19 +24,19 @@ class TestHistoryController(unittest.TestCase):
     def setUp(self):
         """
         Runs before each test.
-        - Backup the real history.json (if it exists)
-        - Replace it with an empty JSON object {}
-        - Create a fresh HistoryController that reads this clean file
+        - Move the real history shards (and any legacy history.json) aside
+        - Replace the recipe store with an empty JSON object {}
+        - Create a fresh HistoryController that starts with no history
         """
+        if os.path.exists(HISTORY_DIR):
+            shutil.move(HISTORY_DIR, HISTORY_DIR_BACKUP)
         if os.path.exists(HISTORY_PATH):
-            shutil.copy(HISTORY_PATH, HISTORY_BACKUP_PATH)
-        else:
-            # make sure file exists so HistoryController can load it
-            with open(HISTORY_PATH, "w", encoding="utf-8") as f:
-                json.dump({}, f)
+            shutil.move(HISTORY_PATH, HISTORY_BACKUP_PATH)
 
-        # overwrite with empty dict for a clean state
-        with open(HISTORY_PATH, "w", encoding="utf-8") as f:
+        # same for the recipe store that entries point into
+        if os.path.exists(STORE_PATH):
+            shutil.copy(STORE_PATH, STORE_BACKUP_PATH)
+        with open(STORE_PATH, "w", encoding="utf-8") as f:
             json.dump({}, f)
 
         self.history_service = HistoryController()
@@ -37,10 +44,24 @@ class TestHistoryController(unittest.TestCase):
     def tearDown(self):
         """
         Runs after each test.
-        - Restore the backup history.json (if it exists)
+        - Drop the test shards and restore the backups (if they exist)
         """
+        shutil.rmtree(HISTORY_DIR, ignore_errors=True)
+        for leftover in (HISTORY_PATH, HISTORY_PATH + ".migrated"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+        if os.path.exists(HISTORY_DIR_BACKUP):
+            shutil.move(HISTORY_DIR_BACKUP, HISTORY_DIR)
         if os.path.exists(HISTORY_BACKUP_PATH):
             shutil.move(HISTORY_BACKUP_PATH, HISTORY_PATH)
+        if os.path.exists(STORE_BACKUP_PATH):
+            shutil.move(STORE_BACKUP_PATH, STORE_PATH)
+
+    def _read_shard(self, username):
+        with open(self.history_service.service.shardPath(username), "r", encoding="utf-8") as f:
+            shard = json.load(f)
+        return {shard["username"]: shard["entries"]}
 
     # -----------------------------------------
     # TC-HIST-01: get() for new user -> empty
@@ -84,9 +105,8 @@ class TestHistoryController(unittest.TestCase):
         self.assertEqual(len(items), 1)
         self.assertEqual(items[0]["dish_name"], "Test Dish")
 
-        # Also verify it's persisted in the file
-        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Also verify it's persisted in the user's shard
+        data = self._read_shard(username)
 
         self.assertIn(username, data)
         self.assertEqual(len(data[username]), 1)
@@ -118,9 +138,8 @@ class TestHistoryController(unittest.TestCase):
         self.assertEqual(items[1]["dish_name"], "Second Dish")
         self.assertEqual(items[2]["dish_name"], "Third Dish")
 
-        # Check file content as well
-        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Check shard content as well
+        data = self._read_shard(username)
 
         self.assertIn(username, data)
         self.assertEqual(len(data[username]), 3)
@@ -128,6 +147,199 @@ class TestHistoryController(unittest.TestCase):
         self.assertEqual(data[username][1]["dish_name"], "Second Dish")
         self.assertEqual(data[username][2]["dish_name"], "Third Dish")
 
+    # -----------------------------------------
+    # TC-HIST-04: repeated recipe stored once
+    # -----------------------------------------
+    def test_repeated_recipe_is_stored_once(self):
+        """
+        TC-HIST-04:
+        When the same recipe is generated several times,
+        then history gets one small entry per generation
+        but the recipe body is stored only once.
+        """
+        username = "orion"
+        recipe = {
+            "dish_name": "Poutine",
+            "ingredients": [{"name": "Potato", "quantity": "500 g"}],
+            "steps": ["Fry.", "Add gravy."]
+        }
+
+        self.history_service.addEntry(username, recipe, [("beef gravy", "mushroom gravy")])
+        self.history_service.addEntry(username, dict(recipe))
+
+        items = self.history_service.getHistory(username)
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0]["recipe_id"], items[1]["recipe_id"])
+        self.assertEqual(items[0]["substitutions"], [["beef gravy", "mushroom gravy"]])
+        self.assertIsNotNone(items[0]["timestamp"])
+        self.assertNotIn("ingredients", items[0])
+
+        with open(STORE_PATH, "r", encoding="utf-8") as f:
+            store = json.load(f)
+        self.assertEqual(len(store), 1)
+
+        # the full recipe is resolved on demand
+        self.assertEqual(self.history_service.getRecipe(items[1]), recipe)
+
+    # -----------------------------------------
+    # TC-HIST-05: old single-file history is migrated
+    # -----------------------------------------
+    def test_legacy_history_file_is_migrated(self):
+        """
+        TC-HIST-05:
+        Given an old single history.json holding full recipe copies,
+        when the service starts,
+        then each user gets a shard, entries become references into
+        the store, and the old file is set aside.
+        """
+        old = {"dish_name": "Old Dish", "ingredients": [{"name": "salt", "quantity": ""}], "steps": ["Mix."]}
+        with open(HISTORY_PATH, "w", encoding="utf-8") as f:
+            json.dump({"orion": [old, old], "test": [old]}, f)
+
+        service = HistoryService()
+        items = service.getHistory("orion")
+
+        self.assertEqual([i["dish_name"] for i in items], ["Old Dish", "Old Dish"])
+        self.assertEqual(items[0]["recipe_id"], items[1]["recipe_id"])
+        self.assertEqual(service.getRecipe(items[0]), old)
+        self.assertEqual(len(service.getHistory("test")), 1)
+
+        self.assertFalse(os.path.exists(HISTORY_PATH))
+        self.assertTrue(os.path.exists(HISTORY_PATH + ".migrated"))
+        self.assertEqual(len(os.listdir(HISTORY_DIR)), 2)
+
+    # -----------------------------------------
+    # TC-HIST-09: only the affected shard is written, idle shards evicted
+    # -----------------------------------------
+    def test_shards_are_per_user_and_evicted(self):
+        """
+        TC-HIST-09:
+        Adding an entry writes only that user's shard, and with
+        max_resident=2 the least recently used shard is dropped from
+        memory but reloads from disk intact.
+        """
+        service = HistoryService(max_resident=2)
+        recipe = {"dish_name": "Soup", "ingredients": [], "steps": []}
+
+        service.addEntry("a", recipe)
+        service.addEntry("b", recipe)
+        before = os.path.getmtime(service.shardPath("a"))
+        service.addEntry("c", recipe)
+
+        self.assertEqual(os.path.getmtime(service.shardPath("a")), before)
+        self.assertEqual(list(service._shards), ["b", "c"])
+
+        self.assertEqual([e["dish_name"] for e in service.getHistory("a")], ["Soup"])
+        self.assertNotIn("b", service._shards)
+
+    # -----------------------------------------
+    # TC-HIST-10: concurrent adds for one user
+    # -----------------------------------------
+    def test_concurrent_adds_keep_every_entry(self):
+        """
+        TC-HIST-10:
+        Threads adding entries for the same user while other users' shards
+        keep evicting it lose no entry, in memory or on disk, and the
+        service holds no more locks however many users it has seen.
+        """
+        service = HistoryService(max_resident=1)
+        recipe = {"dish_name": "Soup", "ingredients": [], "steps": []}
+
+        def add(username, n):
+            for _ in range(n):
+                service.addEntry(username, recipe)
+
+        threads = [threading.Thread(target=add, args=("same", 25)) for _ in range(4)]
+        threads += [threading.Thread(target=add, args=(f"other{i}", 25)) for i in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(service.getHistory("same")), 100)
+        self.assertEqual(len(HistoryService().getHistory("same")), 100)
+
+        # locks are striped, not kept per user ever seen
+        for i in range(200):
+            service.getHistory(f"visitor{i}")
+        self.assertEqual(len(service._user_locks), HISTORY_LOCK_STRIPES)
+
+
+    def _add_at(self, username, dish_name, when):
+        """Add a history entry as if it had been generated at `when`."""
+        recipe = {"dish_name": dish_name, "ingredients": [], "steps": []}
+        with mock.patch("services.datetime") as fake_datetime:
+            fake_datetime.now.return_value = when
+            self.history_service.addEntry(username, recipe)
+
+    # -----------------------------------------
+    # TC-HIST-06: pagination
+    # -----------------------------------------
+    def test_get_page_newest_first(self):
+        """
+        TC-HIST-06:
+        Given 25 history entries,
+        when we ask for pages of 10,
+        then pages are newest first and the last page holds the remainder.
+        """
+        username = "test"
+        for i in range(25):
+            self._add_at(username, f"Dish {i}", datetime(2026, 1, 1, 12, i))
+
+        first = self.history_service.getPage(username, 1, 10)
+        last = self.history_service.getPage(username, 3, 10)
+
+        self.assertEqual(first["total"], 25)
+        self.assertEqual(first["pages"], 3)
+        self.assertEqual([e["dish_name"] for e in first["entries"]][:2], ["Dish 24", "Dish 23"])
+        self.assertEqual([e["dish_name"] for e in last["entries"]],
+                         ["Dish 4", "Dish 3", "Dish 2", "Dish 1", "Dish 0"])
+
+        # out of range pages are clamped
+        self.assertEqual(self.history_service.getPage(username, 99, 10)["page"], 3)
+
+    # -----------------------------------------
+    # TC-HIST-07: time-range filter
+    # -----------------------------------------
+    def test_entries_between_dates(self):
+        """
+        TC-HIST-07:
+        getEntriesBetween(start, end) returns entries with
+        start <= timestamp < end, including ones added after the first query.
+        """
+        username = "test"
+        for day in range(1, 11):
+            self._add_at(username, f"Day {day}", datetime(2026, 3, day, 18, 0))
+
+        week = self.history_service.getEntriesBetween(username, datetime(2026, 3, 3), datetime(2026, 3, 10))
+        self.assertEqual([e["dish_name"] for e in week], [f"Day {d}" for d in range(3, 10)])
+
+        self._add_at(username, "Day 11", datetime(2026, 3, 11, 18, 0))
+        later = self.history_service.getEntriesBetween(username, "2026-03-10")
+        self.assertEqual([e["dish_name"] for e in later], ["Day 10", "Day 11"])
+
+    # -----------------------------------------
+    # TC-HIST-08: top dishes and stats
+    # -----------------------------------------
+    def test_top_dishes_and_stats(self):
+        """
+        TC-HIST-08:
+        topDishes() ranks dishes by how often they were generated,
+        and getStats() summarises the history.
+        """
+        username = "test"
+        dishes = ["Poutine", "Salad", "Poutine", "Soup", "Poutine", "Salad"]
+        for i, dish in enumerate(dishes):
+            self._add_at(username, dish, datetime(2026, 5, 1 + i))
+
+        self.assertEqual(self.history_service.topDishes(username, 2), [("Poutine", 3), ("Salad", 2)])
+
+        stats = self.history_service.getStats(username)
+        self.assertEqual(stats["total"], 6)
+        self.assertEqual(stats["distinct"], 3)
+        self.assertEqual(stats["first"], "2026-05-01T00:00:00")
+        self.assertEqual(stats["last"], "2026-05-06T00:00:00")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from index import RecipeIndex
+from testutil import CORPUS, make_recipe
+
+
+class TestRecipeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RecipeIndex.build(CORPUS)
+
+    # -----------------------------------------
+    # TC-IDX-01: name search
+    # -----------------------------------------
+    def test_search_by_name(self):
+        """
+        TC-IDX-01:
+        Exact names win, whole words narrow the candidates,
+        and partial words still match as substrings.
+        """
+        self.assertEqual(self.index.search("potato salad"), 1)
+        self.assertEqual(self.index.search("  POTATO "), 1)
+        self.assertEqual(self.index.search("cheese"), 2)
+        self.assertEqual(self.index.search("pout"), 0)
+        self.assertIsNone(self.index.search("lasagna"))
+
+    # -----------------------------------------
+    # TC-IDX-02: pantry search ranks by coverage
+    # -----------------------------------------
+    def test_pantry_ranks_by_coverage(self):
+        """
+        TC-IDX-02:
+        Given potatoes and salt on hand,
+        then Baked Potato (all ingredients) ranks first,
+        then Potato Salad (2 of 3), then Poutine (2 of 4).
+        """
+        ranked, _ = self.index.pantry(["potatoes", "salt"])
+
+        self.assertEqual([slot for slot, _ in ranked], [3, 1, 0])
+        self.assertEqual([round(c, 2) for _, c in ranked], [1.0, 0.67, 0.5])
+
+    def test_pantry_item_covers_more_generic_ingredient(self):
+        """
+        TC-IDX-03:
+        "cheddar cheese" on hand covers a recipe asking for "Cheese",
+        and "cheese" covers "Cheese curds".
+        """
+        ranked, _ = self.index.pantry(["cheddar cheese", "bread"])
+        self.assertEqual(ranked[0][0], 2)
+
+        ranked, _ = self.index.pantry(["cheese"])
+        self.assertIn(0, [slot for slot, _ in ranked])
+
+    def test_pantry_respects_diet_and_exclusions(self):
+        """
+        TC-IDX-04:
+        Recipes that break the diet or contain an exclusion are left out.
+        """
+        vegetarian, _ = self.index.pantry(["potato", "salt"], diet="vegetarian")
+        self.assertNotIn(0, [slot for slot, _ in vegetarian])
+
+        no_mayo, _ = self.index.pantry(["potato", "salt"], exclusions=["mayonnaise"])
+        self.assertNotIn(1, [slot for slot, _ in no_mayo])
+
+    def test_incremental_add_is_searchable(self):
+        """
+        TC-IDX-05:
+        A recipe added after the build shows up in name and pantry search.
+        """
+        slot = len(CORPUS)
+        self.index.add(slot, make_recipe("Hash Browns", "Potato", "Oil"))
+
+        self.assertEqual(self.index.search("hash browns"), slot)
+        ranked, _ = self.index.pantry(["potato", "oil"])
+        self.assertEqual(ranked[0], (slot, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
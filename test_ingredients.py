@@ -0,0 +1,102 @@
+import unittest
+
+from index import DIET_BITS, diet_flags
+from index import RecipeIndex
+from ingredients import canonical_name, excluded_by, ingredient_term_ids, first_match, parse_ingredient
+from models import Ingredient, Recipe
+from services import Validator
+
+
+class TestIngredientNormalization(unittest.TestCase):
+
+    # -----------------------------------------
+    # TC-ING-01: amount, unit and canonical name
+    # -----------------------------------------
+    def test_parse_ingredient(self):
+        """
+        TC-ING-01:
+        Quantities (including fractions), unit aliases and preparation
+        notes are split off the ingredient name.
+        """
+        self.assertEqual(parse_ingredient("2 cups shredded cheddar cheese"), (2.0, "cup", "cheddar cheese"))
+        self.assertEqual(parse_ingredient("1 1/2 Tablespoons olive oil"), (1.5, "tbsp", "olive oil"))
+        self.assertEqual(parse_ingredient("½ tsp salt"), (0.5, "tsp", "salt"))
+        self.assertEqual(parse_ingredient("1 onion, finely chopped"), (1.0, "", "onion"))
+        self.assertEqual(canonical_name("Potatoes (for fries)"), "potato")
+        self.assertEqual(canonical_name("Tomatoes"), "tomato")
+
+    # -----------------------------------------
+    # TC-ING-02: term matching instead of substrings
+    # -----------------------------------------
+    def test_term_matching(self):
+        """
+        TC-ING-02:
+        Rules match whole terms of the canonical name, so "ground beef"
+        is found in "lean ground beef" but "egg" is not found in "eggplant".
+        """
+        ids = ingredient_term_ids([{"name": "1 lb lean ground beef"}])
+        self.assertEqual(first_match(ids, ["ground beef"]), "ground beef")
+        self.assertEqual(first_match(ids, ["beef"]), "beef")
+
+        eggplant = [{"name": "Eggplant"}, {"name": "Olive oil"}]
+        self.assertIsNone(first_match(ingredient_term_ids(eggplant), ["egg"]))
+        self.assertTrue(diet_flags(eggplant) & DIET_BITS["vegan"])
+        self.assertFalse(diet_flags([{"name": "2 large eggs"}]) & DIET_BITS["vegan"])
+
+    # -----------------------------------------
+    # TC-ING-03: Validator uses canonical terms
+    # -----------------------------------------
+    def test_validator_feasibility(self):
+        """
+        TC-ING-03:
+        Exclusions and diet rules are checked against canonical terms.
+        """
+        validator = Validator()
+        recipe = Recipe(dish_name="Ratatouille", ingredients=[
+            Ingredient(name="1 Eggplant, diced"),
+            Ingredient(name="3 Tomatoes"),
+        ], steps=[])
+
+        self.assertTrue(validator.checkFeasibility(recipe, {"diet_mode": "vegan", "exclusions": []})["feasible"])
+        result = validator.checkFeasibility(recipe, {"diet_mode": "none", "exclusions": ["tomato"]})
+        self.assertFalse(result["feasible"])
+        self.assertIn("tomato", result["reason"])
+
+    # -----------------------------------------
+    # TC-ING-04: exclusions match parts of words
+    # -----------------------------------------
+    def test_exclusions_match_parts_of_words(self):
+        """
+        TC-ING-04:
+        An exclusion rules out every ingredient containing it, also inside
+        a word ("nuts" -> walnuts, "cheese" -> cheesecake), and a
+        multi-word exclusion needs all its words in one ingredient
+        ("coconut milk" does not rule out milk). The feasibility check and
+        the index agree.
+        """
+        self.assertTrue(excluded_by("nuts", ["walnut"]))
+        self.assertFalse(excluded_by("coconut milk", ["milk"]))
+        self.assertFalse(excluded_by("", ["milk"]))
+
+        validator = Validator()
+        walnuts = Recipe(dish_name="Brownies", ingredients=[Ingredient(name="1 cup chopped walnuts")], steps=[])
+        cheesecake = Recipe(dish_name="Berry Trifle", ingredients=[Ingredient(name="Cheesecake")], steps=[])
+        milk = Recipe(dish_name="Rice Pudding", ingredients=[Ingredient(name="Milk")], steps=[])
+        for recipe, banned in ((walnuts, "nuts"), (cheesecake, "cheese")):
+            with self.subTest(exclusion=banned):
+                result = validator.checkFeasibility(recipe, {"diet_mode": "none", "exclusions": [banned]})
+                self.assertFalse(result["feasible"])
+                self.assertEqual(result["reason"], f"Contains excluded ingredient: {banned}")
+        self.assertTrue(validator.checkFeasibility(milk, {"diet_mode": "none", "exclusions": ["coconut milk"]})
+                        ["feasible"])
+
+        corpus = [{"dish_name": r.dish_name, "ingredients": [{"name": i.name} for i in r.ingredients]}
+                  for r in (walnuts, cheesecake, milk)]
+        index = RecipeIndex.build(corpus)
+        self.assertEqual(index.excludedSlots(["nuts"]), {0})
+        self.assertEqual(index.excludedSlots(["cheese"]), {1})
+        self.assertEqual(index.excludedSlots(["coconut milk"]), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
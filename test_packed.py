@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from index import RecipeIndex
+from packed import PackedCorpus, open_pack, pack_corpus
+from testutil import CORPUS, make_recipe
+
+
+class TestPackedCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "corpus.pack")
+        self.source = os.path.join(self.tmp, "recipes.json")
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write("[]")
+
+        pack_corpus(CORPUS, {"egg": "flax egg"}, self.path, sources=[self.source])
+        self.corpus = PackedCorpus(self.path)
+        self.index = self.corpus.index()
+        self.plain = RecipeIndex.build(CORPUS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    # -----------------------------------------
+    # TC-PACK-01: same answers as the in-memory index
+    # -----------------------------------------
+    def test_packed_index_matches_recipe_index(self):
+        """
+        TC-PACK-01:
+        Recipes, substitutions, search, lookup, diet flags and pantry
+        search read from the pack agree with a freshly built RecipeIndex.
+        """
+        recipes = self.corpus.recipes()
+        self.assertEqual(list(recipes), CORPUS)
+        self.assertEqual(self.corpus.substitutions(), {"egg": "flax egg"})
+        self.assertEqual(len(self.index), len(CORPUS))
+
+        for query in ["potato salad", "  POTATO ", "cheese", "pout", "brûlée", "to sal", "lasagna"]:
+            self.assertEqual(self.index.search(query), self.plain.search(query), query)
+
+        self.assertEqual(self.index.lookup({"dish_name": "x", "spoonacular_id": 11}), 0)
+        self.assertEqual(self.index.lookup({"dish_name": "Grilled  cheese!"}), 2)
+        self.assertEqual(list(self.index.diet_flags), list(self.plain.diet_flags))
+
+        for on_hand, exclusions in [(["potato", "salt"], []), (["cheddar cheese", "bread"], ["butter"])]:
+            self.assertEqual(self.index.pantry(on_hand, exclusions=exclusions),
+                             self.plain.pantry(on_hand, exclusions=exclusions))
+
+    # -----------------------------------------
+    # TC-PACK-02: additions stay private to the process
+    # -----------------------------------------
+    def test_added_recipes_overlay_the_pack(self):
+        """
+        TC-PACK-02:
+        A recipe added after packing is searchable and shares postings with
+        packed recipes, while the file on disk is left untouched.
+        """
+        before = os.path.getsize(self.path), os.path.getmtime(self.path)
+
+        recipes = self.corpus.recipes()
+        dal = make_recipe("Potato Dal", "Potato", "Lentils", recipe_id=42)
+        recipes.append(dal)
+        self.index.add(len(recipes) - 1, dal)
+
+        self.assertEqual(recipes[5], dal)
+        self.assertEqual(self.index.search("dal"), 5)
+        self.assertEqual(self.index.lookup({"dish_name": "?", "spoonacular_id": 42}), 5)
+        self.assertEqual(self.index.tokens["potato"], {1, 3, 5})
+
+        ranked, _ = self.index.pantry(["potato", "lentil"])
+        self.assertEqual(ranked[0], (5, 1.0))
+        self.assertEqual(PackedCorpus(self.path).index().search("dal"), None)
+        self.assertEqual((os.path.getsize(self.path), os.path.getmtime(self.path)), before)
+
+    # -----------------------------------------
+    # TC-PACK-03: stale packs are ignored
+    # -----------------------------------------
+    def test_stale_pack_is_not_opened(self):
+        """
+        TC-PACK-03:
+        Once a source file changes, open_pack() declines the pack so the
+        caller falls back to parsing the JSON.
+        """
+        self.assertIsNotNone(open_pack(self.path, [self.source]))
+
+        with open(self.source, "w", encoding="utf-8") as f:
+            f.write("[{}]")
+        self.assertIsNone(open_pack(self.path, [self.source]))
+        self.assertIsNone(open_pack(os.path.join(self.tmp, "missing.pack"), [self.source]))
+
+
+    # -----------------------------------------
+    # TC-PACK-04: forks over the pack
+    # -----------------------------------------
+    def test_fork_remove_and_replace(self):
+        """
+        TC-PACK-04:
+        Removing and replacing packed recipes on a fork hides them from
+        the fork only; the original index keeps answering as before.
+        """
+        fork = self.index.fork()
+        fork.remove(1, CORPUS[1])
+        fork.remove(3, CORPUS[3])
+        fork.add(3, make_recipe("Baked Sweet Potato", "Sweet potato"))
+
+        self.assertIsNone(fork.search("potato salad"))
+        self.assertEqual(fork.search("potato"), 3)
+        self.assertEqual(fork.tokens["potato"], {3})
+        self.assertEqual(len(fork), len(CORPUS) - 1)
+        ranked, _ = fork.pantry(["mayonnaise"])
+        self.assertEqual(ranked, [])
+
+        self.assertEqual(self.index.search("potato salad"), 1)
+        self.assertEqual(self.index.tokens["potato"], {1, 3})
+        self.assertEqual(self.index.pantry(["mayonnaise"])[0], [(1, 1 / 3)])
+
+
+    # -----------------------------------------
+    # TC-PACK-05: lazy recipe bodies
+    # -----------------------------------------
+    def test_recipe_bodies_are_cached_and_spilled(self):
+        """
+        TC-PACK-05:
+        Packed recipes are decoded once while they stay in the LRU;
+        appended and replaced recipes are read back from the body file and
+        a copy made before the change still sees the old recipes.
+        """
+        recipes = self.corpus.recipes()
+        recipes.cache.size = 2
+        self.assertIs(recipes[0], recipes[0])
+        recipes[1], recipes[2]
+        self.assertEqual(len(recipes.cache), 2)
+        self.assertEqual((recipes.cache.hits, recipes.cache.misses), (1, 3))
+
+        before = recipes.copy()
+        recipes[3] = make_recipe("Baked Sweet Potato", "Sweet potato")
+        recipes[4] = None
+        recipes.append(make_recipe("Dal", "Lentils"))
+
+        self.assertEqual(len(recipes.extra), 2)
+        self.assertEqual([r and r["dish_name"] for r in recipes][3:],
+                         ["Baked Sweet Potato", None, "Dal"])
+        self.assertEqual(list(before), CORPUS)
+
+
+if __name__ == "__main__":
+    unittest.main()
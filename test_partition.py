@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from partition import HashRing, rebalance
+from services import AuthService, HistoryService, PreferencesService, RecipeStore
+
+
+class TestPartitioning(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Create empty directories standing in for data roots on separate nodes
+          (the ring starts with three; the fourth is added by the tests)
+        """
+        self.tmp = tempfile.mkdtemp()
+        self.roots = [os.path.join(self.tmp, f"node{i}") for i in range(4)]
+        for root in self.roots:
+            os.makedirs(root)
+        self.ring = HashRing(self.roots[:3])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _read(self, root, filename):
+        path = os.path.join(root, filename)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _services(self, ring):
+        store = RecipeStore(os.path.join(self.tmp, "recipe_store.json"))
+        return AuthService(ring), PreferencesService(ring), HistoryService(store, ring=ring)
+
+    # -----------------------------------------
+    # TC-PART-01: consistent hashing
+    # -----------------------------------------
+    def test_ring_spreads_users_and_moves_few(self):
+        """
+        TC-PART-01:
+        Users spread over every root, the mapping does not depend on the
+        order roots are listed in, and adding a fourth root only moves
+        users onto the new root.
+        """
+        users = [f"user{i}" for i in range(3000)]
+        before = {u: self.ring.rootFor(u) for u in users}
+
+        counts = {root: list(before.values()).count(root) for root in self.roots[:3]}
+        self.assertTrue(all(600 < c < 1400 for c in counts.values()), counts)
+        self.assertEqual(before, {u: HashRing(self.roots[2::-1]).rootFor(u) for u in users})
+
+        grown = HashRing(self.roots)
+        moved = [u for u in users if grown.rootFor(u) != before[u]]
+        self.assertTrue(all(grown.rootFor(u) == self.roots[3] for u in moved))
+        self.assertLess(len(moved), len(users) * 0.4)
+
+    # -----------------------------------------
+    # TC-PART-02: services write to the user's root
+    # -----------------------------------------
+    def test_services_store_user_data_on_its_root(self):
+        """
+        TC-PART-02:
+        Registration, preferences and history for a user all land on the
+        root the ring assigns, and a fresh service finds them again.
+        """
+        auth, prefs, history = self._services(self.ring)
+        for name in ("alice", "bob", "carol", "dave"):
+            auth.registerUser(name, "pw")
+            prefs.updatePreferences(name, "vegan", [])
+            history.addEntry(name, {"dish_name": f"{name} soup", "ingredients": [], "steps": []})
+
+        for name in ("alice", "bob", "carol", "dave"):
+            home = self.ring.rootFor(name)
+            for root in self.roots[:3]:
+                self.assertEqual(name in self._read(root, "users.json"), root == home)
+                self.assertEqual(name in self._read(root, "preferences.json"), root == home)
+            self.assertTrue(history.shardPath(name).startswith(os.path.join(home, "history")))
+
+        auth, prefs, history = self._services(self.ring)
+        self.assertTrue(auth.authenticate("carol", "pw")[0])
+        self.assertEqual(prefs.viewPreferences("carol")["diet_mode"], "vegan")
+        self.assertEqual(history.getHistory("carol")[0]["dish_name"], "carol soup")
+
+    # -----------------------------------------
+    # TC-PART-03: rebalance after adding a root
+    # -----------------------------------------
+    def test_rebalance_moves_data_to_new_root(self):
+        """
+        TC-PART-03:
+        After a root is added, rebalance moves exactly the users the new
+        ring assigns elsewhere, and services on the new ring see everyone.
+        """
+        auth, prefs, history = self._services(self.ring)
+        users = [f"user{i}" for i in range(40)]
+        for name in users:
+            auth.registerUser(name, "pw")
+            prefs.updatePreferences(name, "vegetarian", [name])
+            history.addEntry(name, {"dish_name": name, "ingredients": [], "steps": []})
+
+        grown = HashRing(self.roots)
+        expected = sum(grown.rootFor(u) != self.ring.rootFor(u) for u in users)
+        self.assertGreater(expected, 0)
+
+        self.assertEqual(rebalance(grown, dry_run=True)["users.json"], expected)
+        moved = rebalance(grown)
+        self.assertEqual(dict(moved), {"users.json": expected, "preferences.json": expected, "history": expected})
+        self.assertEqual(sum(rebalance(grown).values()), 0)
+
+        auth, prefs, history = self._services(grown)
+        for name in users:
+            self.assertTrue(auth.authenticate(name, "pw")[0])
+            self.assertEqual(prefs.viewPreferences(name)["exclusions"], [name])
+            self.assertEqual(history.getHistory(name)[0]["dish_name"], name)
+            self.assertIn(name, self._read(grown.rootFor(name), "users.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
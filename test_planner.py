@@ -0,0 +1,85 @@
+import unittest
+
+from index import RecipeIndex
+from planner import MealPlanner, main_ingredient, shopping_list
+from testutil import make_recipe
+
+
+CORPUS = [
+    make_recipe("Chicken Curry", ("Chicken", "500 g"), ("Rice", "1 cup"), ("Salt", "")),
+    make_recipe("Chicken Salad", ("Chicken", "200 g"), ("Lettuce", "1 head")),
+    make_recipe("Chicken Soup", ("Chicken", "300 g"), ("Carrots", "2")),
+    make_recipe("Lentil Soup", ("Lentils", "1 cup"), ("Carrots", "3")),
+    make_recipe("Bean Chili", ("Salt", ""), ("Kidney beans", "1 can"), ("Tomatoes", "4")),
+    make_recipe("Veggie Rice", ("Rice", "2 cups"), ("Peas", "1 cup")),
+    make_recipe("Omelette", ("Eggs", "3"), ("Milk", "2 tbsp")),
+]
+
+
+class TestMealPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = MealPlanner(CORPUS, RecipeIndex.build(CORPUS))
+
+    def _names(self, plan):
+        return [CORPUS[slot]["dish_name"] for day in plan for slot in day if slot is not None]
+
+    # -----------------------------------------
+    # TC-PLAN-01: distinct, feasible recipes
+    # -----------------------------------------
+    def test_plan_respects_preferences(self):
+        """
+        TC-PLAN-01:
+        A vegan plan never repeats a dish and only uses vegan recipes;
+        meals left over once the candidates run out are None.
+        """
+        plan, _ = self.planner.plan({"diet_mode": "vegan", "exclusions": ["peas"]}, days=2, meals_per_day=2, seed=1)
+
+        names = self._names(plan)
+        self.assertEqual(sorted(names), ["Bean Chili", "Lentil Soup"])
+        self.assertEqual(sum(slot is None for day in plan for slot in day), 2)
+
+    # -----------------------------------------
+    # TC-PLAN-02: variety and history
+    # -----------------------------------------
+    def test_variety_and_recent_history(self):
+        """
+        TC-PLAN-02:
+        The same main ingredient is used at most max_main_repeats times and
+        recent dishes are skipped, until there is nothing else left; then
+        the relaxed constraints are reported.
+        """
+        plan, relaxed = self.planner.plan({"diet_mode": "none", "exclusions": []},
+                                          days=1, meals_per_day=4, recent=[6],
+                                          max_main_repeats=1, seed=3)
+        names = self._names(plan)
+        self.assertEqual(sum(n.startswith("Chicken") for n in names), 1)
+        self.assertNotIn("Omelette", names)
+        self.assertEqual(relaxed, [])
+
+        plan, relaxed = self.planner.plan({"diet_mode": "none", "exclusions": []},
+                                          days=1, meals_per_day=7, recent=[6],
+                                          max_main_repeats=1, seed=3)
+        self.assertEqual(len(set(self._names(plan))), 7)
+        self.assertEqual(relaxed, ["main ingredient variety", "avoid recent history"])
+
+    # -----------------------------------------
+    # TC-PLAN-03: shopping list
+    # -----------------------------------------
+    def test_shopping_list_aggregates(self):
+        """
+        TC-PLAN-03:
+        Amounts are added per canonical ingredient and unit.
+        """
+        self.assertEqual(main_ingredient(CORPUS[4]), "kidney bean")
+
+        items = {(i["name"], i["unit"]): i for i in shopping_list([CORPUS[0], CORPUS[2], CORPUS[3], CORPUS[5]])}
+        self.assertEqual(items[("chicken", "g")]["amount"], 800)
+        self.assertEqual(items[("rice", "cup")]["amount"], 3)
+        self.assertEqual(items[("carrot", "")]["amount"], 5)
+        self.assertEqual(items[("carrot", "")]["recipes"], 2)
+        self.assertIsNone(items[("salt", "")]["amount"])
+
+
+if __name__ == "__main__":
+    unittest.main()
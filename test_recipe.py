@@ -1,6 +1,42 @@
+import os
+import json
+import shutil
+import threading
+import time
 import unittest
+from dataclasses import FrozenInstanceError
+from unittest import mock
 
 from controllers import RecipeController  # use your existing controller
+from fake_server import FakeSpoonacularServer
+from scraper import RecipeScraper
+from models import RecipeRequest
+import services
+from services import RecipeService
+from transport import LiveTransport
+from views import RecipeView
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+RECIPES_PATH = os.path.join(DATA_DIR, "recipes.json")
+RECIPES_BACKUP_PATH = os.path.join(DATA_DIR, "recipes_backup.json")
+JOURNAL_PATH = os.path.join(DATA_DIR, "recipes.ingested.jsonl")
+JOURNAL_BACKUP_PATH = os.path.join(DATA_DIR, "recipes.ingested_backup.jsonl")
+
+
+def _backup_corpus():
+    """Backup recipes.json and set the ingest journal aside (fetched recipes are appended to it)."""
+    shutil.copy(RECIPES_PATH, RECIPES_BACKUP_PATH)
+    if os.path.exists(JOURNAL_PATH):
+        os.replace(JOURNAL_PATH, JOURNAL_BACKUP_PATH)
+
+
+def _restore_corpus():
+    shutil.move(RECIPES_BACKUP_PATH, RECIPES_PATH)
+    if os.path.exists(JOURNAL_BACKUP_PATH):
+        os.replace(JOURNAL_BACKUP_PATH, JOURNAL_PATH)
+    elif os.path.exists(JOURNAL_PATH):
+        os.remove(JOURNAL_PATH)
 
 
 class TestRecipeController(unittest.TestCase):
@@ -8,10 +44,19 @@ class TestRecipeController(unittest.TestCase):
     def setUp(self):
         """
         Runs before each test.
+        - Backup the real recipes.json and ingest journal (fetched recipes are stored locally)
         - Create a fresh RecipeController, which loads recipes.json and substitutions.json
         """
+        _backup_corpus()
         self.recipe_ctrl = RecipeController()
 
+    def tearDown(self):
+        """
+        Runs after each test.
+        - Restore the backup recipes.json
+        """
+        _restore_corpus()
+
     # -----------------------------------------
     # TC-REC-01: find local Poutine recipe
     # -----------------------------------------
@@ -187,8 +232,364 @@ class TestRecipeController(unittest.TestCase):
         self.assertIn("dish_name", recipe)
         self.assertIn("ingredients", recipe)
         self.assertIn("steps", recipe)
-    
-    
+
+
+class TestRecipeIngestion(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Backup the real recipes.json
+        - Start a fake Spoonacular server with a dish that is not stored locally
+        - Point a fresh RecipeService at the fake server
+        """
+        _backup_corpus()
+
+        self.server = FakeSpoonacularServer([{
+            "dish_name": "Chickpea Curry",
+            "ingredients": [{"name": "Chickpeas", "quantity": "400 g"}],
+            "steps": ["Simmer chickpeas in curry sauce."]
+        }])
+        base_url = self.server.start()
+
+        self.service = RecipeService()
+        self.service.scraper = RecipeScraper(LiveTransport(), base_url=base_url, api_key="test")
+
+    def tearDown(self):
+        self.server.stop()
+        _restore_corpus()
+
+    def test_fetched_recipe_is_written_through(self):
+        """
+        TC-REC-07:
+        When a dish is only available online,
+        then findRecipe() should append it to the ingest journal with its
+        Spoonacular id, leaving recipes.json as it was, and the next lookup
+        (also by a new RecipeService) should be a local hit.
+        """
+        before = len(self.service.recipes)
+        stat = os.stat(RECIPES_PATH)
+
+        recipe = self.service.findRecipe("chickpea curry")
+        self.assertEqual(recipe.dish_name, "Chickpea Curry")
+        self.assertEqual(len(self.service.recipes), before + 1)
+
+        with open(JOURNAL_PATH, "r", encoding="utf-8") as f:
+            data = [json.loads(line) for line in f]
+        self.assertEqual([r["dish_name"] for r in data], ["Chickpea Curry"])
+        self.assertEqual(data[-1]["spoonacular_id"], 1)
+        self.assertEqual((os.stat(RECIPES_PATH).st_size, os.stat(RECIPES_PATH).st_mtime_ns),
+                         (stat.st_size, stat.st_mtime_ns))
+
+        # server gone -> only the local corpus can answer
+        self.server.stop()
+        again = self.service.findRecipe("Chickpea Curry")
+        self.assertEqual(again.dish_name, "Chickpea Curry")
+        self.assertEqual(RecipeService().findRecipe("Chickpea Curry").dish_name, "Chickpea Curry")
+
+    def test_ingest_deduplicates_by_id_and_name(self):
+        """
+        TC-REC-08:
+        Ingesting the same Spoonacular id, or the same dish name with
+        different spacing/case, should not add a second copy.
+        """
+        first = self.service.ingestRecipe({"dish_name": "Dal Tadka", "spoonacular_id": 42,
+                                           "ingredients": [], "steps": []})
+        by_id = self.service.ingestRecipe({"dish_name": "Yellow Dal", "spoonacular_id": 42,
+                                           "ingredients": [], "steps": []})
+        by_name = self.service.ingestRecipe({"dish_name": "  dal   TADKA ", "ingredients": [], "steps": []})
+
+        self.assertEqual(first, by_id)
+        self.assertEqual(first, by_name)
+        self.assertEqual(sum(r["dish_name"] == "Dal Tadka" for r in self.service.recipes), 1)
+
+    def test_pantry_missing_uses_canonical_names(self):
+        """
+        TC-REC-15:
+        For an ingested recipe whose canonical ingredient names differ from
+        the free text, pantry search reports full coverage and nothing
+        missing when every canonical ingredient is on hand.
+        """
+        self.service.ingestRecipe({"dish_name": "Zzyzx Cheese Toast", "spoonacular_id": 987654,
+                                   "ingredients": [
+                                       {"name": "2 cups shredded sharp cheddar", "quantity": "",
+                                        "canonical": "cheddar cheese"},
+                                       {"name": "4 slices of sourdough", "quantity": "", "canonical": "bread"},
+                                   ], "steps": []})
+
+        results = self.service.findByIngredients(["cheddar cheese", "bread"], {}, limit=1000)
+        toast = next(r for r in results if r["recipe"]["dish_name"] == "Zzyzx Cheese Toast")
+        self.assertEqual(toast["coverage"], 1.0)
+        self.assertEqual(toast["missing"], [])
+
+
+
+SUBS_PATH = os.path.join(DATA_DIR, "substitutions.json")
+SUBS_BACKUP_PATH = os.path.join(DATA_DIR, "substitutions_backup.json")
+
+
+class TestRecipeReload(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Backup recipes.json and substitutions.json
+        - Start from a small known corpus
+        """
+        _backup_corpus()
+        shutil.copy(SUBS_PATH, SUBS_BACKUP_PATH)
+
+        self.corpus = [
+            {"dish_name": "Poutine", "ingredients": [{"name": "Potato", "quantity": ""}], "steps": []},
+            {"dish_name": "Dal Tadka", "spoonacular_id": 42,
+             "ingredients": [{"name": "Lentils", "quantity": ""}], "steps": []},
+            {"dish_name": "Pancakes", "ingredients": [{"name": "Flour", "quantity": ""}], "steps": []},
+        ]
+        self._write(RECIPES_PATH, self.corpus)
+        self.service = RecipeService()
+
+    def tearDown(self):
+        _restore_corpus()
+        shutil.move(SUBS_BACKUP_PATH, SUBS_PATH)
+
+    def _write(self, path, data):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        # make sure the size/mtime check sees the change on coarse clocks
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_reload_applies_only_changes(self):
+        """
+        TC-REC-09:
+        After recipes.json is edited, reload() keeps unchanged recipes in
+        their slots, updates the changed one in place, adds new ones,
+        removes deleted ones, and leaves the previous snapshot intact.
+        """
+        old_recipes, old_index = self.service.recipes, self.service.index
+
+        self.assertEqual(self.service.reload()["added"], 0)
+
+        edited = [
+            self.corpus[0],
+            {"dish_name": "Yellow Dal", "spoonacular_id": 42,
+             "ingredients": [{"name": "Lentils", "quantity": ""}, {"name": "Chicken", "quantity": ""}],
+             "steps": []},
+            {"dish_name": "Chili", "ingredients": [{"name": "Beans", "quantity": ""}], "steps": []},
+        ]
+        self._write(RECIPES_PATH, edited)
+
+        stats = self.service.reload()
+        self.assertEqual((stats["added"], stats["removed"], stats["changed"]), (1, 1, 1))
+
+        index = self.service.index
+        self.assertEqual(index.search("poutine"), 0)
+        self.assertEqual(index.search("yellow dal"), 1)
+        self.assertIsNone(index.search("dal tadka"))
+        self.assertIsNone(index.search("pancakes"))
+        self.assertEqual(self.service.recipes[index.search("chili")]["dish_name"], "Chili")
+        self.assertFalse(index.fits_diet(1, "vegetarian"))
+
+        # readers holding the old snapshot still see the old corpus
+        self.assertEqual(old_index.search("pancakes"), 2)
+        self.assertEqual(old_recipes[1]["dish_name"], "Dal Tadka")
+        self.assertTrue(old_index.fits_diet(1, "vegetarian"))
+
+    def test_reload_picks_up_substitutions(self):
+        """
+        TC-REC-10:
+        Editing substitutions.json is picked up without touching the recipes.
+        """
+        self._write(SUBS_PATH, {"egg": "flax egg"})
+
+        stats = self.service.reload()
+        self.assertTrue(stats["substitutions"])
+        self.assertEqual((stats["added"], stats["removed"], stats["changed"]), (0, 0, 0))
+        self.assertEqual(self.service.subs, {"egg": "flax egg"})
+
+    def test_readers_see_consistent_snapshots_during_writes(self):
+        """
+        TC-REC-11:
+        Lookups running in other threads while recipes are ingested and
+        reloaded never fail and always see recipes and index from the
+        same snapshot; a snapshot taken earlier is never modified. The
+        ingested recipes are journaled, so an edit to recipes.json keeps them.
+        """
+        before = self.service._snapshot
+        errors = []
+        done = threading.Event()
+
+        def reader():
+            while not done.is_set():
+                try:
+                    snap = self.service._snapshot
+                    self.assertEqual(len(snap.index), sum(r is not None for r in snap.recipes))
+                    slot = snap.index.search("dish")
+                    if slot is not None:
+                        self.assertIn("Dish", snap.recipes[slot]["dish_name"])
+                    self.service.findByIngredients(["potato"], {})
+                except Exception as e:  # reported from the main thread
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for i in range(30):
+            self.service.ingestRecipe({"dish_name": f"Dish {i}", "ingredients": [{"name": "Potato", "quantity": ""}],
+                                       "steps": []})
+        self._write(RECIPES_PATH, self.corpus[:2])
+        self.service.reload()
+        done.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(before.recipes), 3)
+        self.assertIsNone(before.index.search("dish 5"))
+        self.assertIsNotNone(self.service.index.search("dish 5"))
+        self.assertIsNone(self.service.index.search("pancakes"))
+
+
+class _FeasibleValidator:
+    def checkFeasibility(self, recipe, preferences):
+        return {"feasible": True, "reason": ""}
+
+
+class TestSharedRecipes(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RecipeService()
+
+    # -----------------------------------------
+    # TC-REC-12: shared recipes, per-request substitutions
+    # -----------------------------------------
+    def test_substitutions_do_not_touch_shared_recipe(self):
+        """
+        TC-REC-12:
+        Lookups of the same dish share one frozen Recipe. Validating it
+        with exclusions that have substitutes returns an overlay, and only
+        the copy the overlay produces carries the replacement.
+        """
+        recipe = self.service.findRecipe("Poutine")
+        self.assertIs(self.service.findRecipe("poutine"), recipe)
+        with self.assertRaises(FrozenInstanceError):
+            recipe.ingredients[0].name = "Sweet potato"
+
+        self.service.validator = _FeasibleValidator()
+        result = self.service.validateRecipe(recipe, {"diet_mode": "none", "exclusions": ["beef gravy"]})
+        overlay = result["overlay"]
+        self.assertEqual([sub[0] for sub in overlay.substitutions], ["beef gravy"])
+
+        names = [ing.name for ing in recipe.ingredients]
+        substituted = overlay.apply(recipe)
+        self.assertEqual(names[2], "Beef gravy")
+        self.assertEqual([ing.name for ing in recipe.ingredients], names)
+        self.assertEqual(substituted.ingredients[2].name, self.service.subs["beef gravy"])
+        self.assertIs(substituted.ingredients[0], recipe.ingredients[0])
+
+        plain = self.service.validateRecipe(recipe, {"diet_mode": "none", "exclusions": []})["overlay"]
+        self.assertIs(plain.apply(recipe), recipe)
+
+
+class TestLatencyBudget(unittest.TestCase):
+
+    def setUp(self):
+        _backup_corpus()
+        self.server = FakeSpoonacularServer([{
+            "dish_name": "Chicken Caesar Wrap",
+            "ingredients": [{"name": "Chicken breast", "quantity": "200 g"}, {"name": "Tortilla", "quantity": "1"}],
+            "steps": ["Grill the chicken and wrap it."]
+        }], latency=0.3)
+        base_url = self.server.start()
+
+        self.service = RecipeService()
+        self.service.scraper = RecipeScraper(LiveTransport(), base_url=base_url, api_key="test")
+
+    def tearDown(self):
+        # let background lookups finish before the server and recipes.json go away
+        while any(t.name == "recipe-lookup" for t in threading.enumerate()):
+            time.sleep(0.05)
+        self.server.stop()
+        _restore_corpus()
+
+    # -----------------------------------------
+    # TC-REC-13: provisional answer within the budget
+    # -----------------------------------------
+    def test_slow_api_gives_provisional_local_recipe(self):
+        """
+        TC-REC-13:
+        When the API takes longer than the budget, the closest local
+        recipe fitting the preferences comes back marked provisional, and
+        the lookup completes in the background so the next request gets
+        the real recipe.
+        """
+        started = time.perf_counter()
+        result = self.service.generateCompliantRecipe(
+            RecipeRequest("chicken caesar wrap", diet_mode="none", exclusions=["anchovy"], budget=0.05))
+        self.assertLess(time.perf_counter() - started, 0.25)
+
+        self.assertTrue(result["success"])
+        self.assertTrue(result["provisional"])
+        self.assertEqual(result["recipe"]["dish_name"], "Herb Caesar (without anchovy)")
+
+        deadline = time.time() + 5
+        while self.service.index.search("chicken caesar wrap") is None and time.time() < deadline:
+            time.sleep(0.05)
+
+        again = self.service.generateCompliantRecipe(RecipeRequest("chicken caesar wrap", budget=0.05))
+        self.assertTrue(again["success"])
+        self.assertNotIn("provisional", again)
+        self.assertEqual(again["recipe"]["dish_name"], "Chicken Caesar Wrap")
+
+    # -----------------------------------------
+    # TC-REC-14: nothing close enough
+    # -----------------------------------------
+    def test_slow_api_without_local_match(self):
+        """
+        TC-REC-14:
+        Local matches that break the preferences are never returned: with
+        none that fits, or no local recipe sharing a word with the dish,
+        the request fails fast.
+        """
+        result = self.service.generateCompliantRecipe(
+            RecipeRequest("chicken caesar wrap", diet_mode="vegan", budget=0.05))
+        self.assertFalse(result["success"])
+        self.assertTrue(result["provisional"])
+        self.assertNotIn("recipe", result)
+
+        result = self.service.generateCompliantRecipe(RecipeRequest("zzz qqq", budget=0.05))
+        self.assertFalse(result["success"])
+        self.assertTrue(result["provisional"])
+
+    # -----------------------------------------
+    # TC-REC-16: provisional recipes stay out of history
+    # -----------------------------------------
+    def test_provisional_recipe_not_saved_to_history(self):
+        """
+        TC-REC-16:
+        The view shows a provisional recipe but does not save it to the
+        user's history; the real recipe, asked for again, is saved.
+        """
+        ctrl = RecipeController()
+        ctrl.service = self.service
+        history = mock.Mock()
+        view = RecipeView(ctrl, history)
+        prefs = {"diet_mode": "none", "exclusions": ["anchovy"]}
+
+        with mock.patch.object(services, "LATENCY_BUDGET", 0.05), \
+                mock.patch("builtins.input", return_value="chicken caesar wrap"), \
+                mock.patch("builtins.print"):
+            view.generateRecipe("alice", prefs)
+            history.addEntry.assert_not_called()
+
+            deadline = time.time() + 5
+            while self.service.index.search("chicken caesar wrap") is None and time.time() < deadline:
+                time.sleep(0.05)
+            view.generateRecipe("alice", prefs)
+
+        history.addEntry.assert_called_once()
+        self.assertEqual(history.addEntry.call_args.args[1]["dish_name"], "Chicken Caesar Wrap")
 
 
 if __name__ == "__main__":
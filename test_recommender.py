@@ -0,0 +1,77 @@
+import unittest
+
+from index import RecipeIndex
+from testutil import make_recipe
+
+try:
+    from recommender import Recommender  # needs numpy
+except ImportError:
+    Recommender = None
+
+
+CORPUS = [
+    make_recipe("Chickpea Curry", "Chickpeas", "Coconut milk", "Curry paste", "Rice"),
+    make_recipe("Chana Masala", "Chickpeas", "Tomato", "Onion", "Garam masala"),
+    make_recipe("Chicken Curry", "Chicken thighs", "Coconut milk", "Curry paste", "Rice"),
+    make_recipe("Lentil Soup", "Lentils", "Carrot", "Onion", "Cumin"),
+    make_recipe("Pancakes", "Flour", "Egg", "Milk", "Sugar"),
+]
+
+
+@unittest.skipIf(Recommender is None, "numpy is not installed")
+class TestRecommender(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = Recommender(CORPUS, RecipeIndex.build(CORPUS))
+
+    def _names(self, results):
+        return [CORPUS[slot]["dish_name"] for slot, _ in results]
+
+    # -----------------------------------------
+    # TC-RECO-01: similar recipes first, history excluded
+    # -----------------------------------------
+    def test_recommends_similar_unseen_recipes(self):
+        """
+        TC-RECO-01:
+        Given a history with Chickpea Curry,
+        then the closest recipes by ingredients come first
+        and Chickpea Curry itself is not recommended.
+        """
+        results = self.recommender.recommend([CORPUS[0]], {"diet_mode": "none", "exclusions": []}, k=2)
+
+        self.assertEqual(self._names(results), ["Chicken Curry", "Chana Masala"])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_respects_diet_and_exclusions(self):
+        """
+        TC-RECO-02:
+        Recipes that break the diet or contain an exclusion are never returned.
+        """
+        vegetarian = self.recommender.recommend([CORPUS[0]], {"diet_mode": "vegetarian", "exclusions": []}, k=3)
+        self.assertNotIn("Chicken Curry", self._names(vegetarian))
+
+        no_onion = self.recommender.recommend([CORPUS[0]], {"diet_mode": "none", "exclusions": ["onions"]}, k=5)
+        self.assertNotIn("Chana Masala", self._names(no_onion))
+        self.assertNotIn("Lentil Soup", self._names(no_onion))
+        self.assertIn("Chicken Curry", self._names(no_onion))
+
+        # the feasibility check's rule: parts of words count, multi-word exclusions need all their words
+        rice = [make_recipe("Rice Pudding", "Rice", "Milk"),
+                make_recipe("Coconut Rice", "Rice", "Coconut milk"),
+                make_recipe("Walnut Pilaf", "Rice", "Chopped walnuts"),
+                make_recipe("Rice Trifle", "Rice", "Cheesecake")]
+        recommender = Recommender(rice, RecipeIndex.build(rice))
+        results = recommender.recommend([make_recipe("Plain Rice", "Rice")],
+                                        {"diet_mode": "none", "exclusions": ["coconut milk", "nuts", "cheese"]})
+        self.assertEqual([rice[slot]["dish_name"] for slot, _ in results], ["Rice Pudding"])
+
+    def test_empty_history_gives_no_recommendations(self):
+        """
+        TC-RECO-03:
+        With no history there is nothing to be similar to.
+        """
+        self.assertEqual(self.recommender.recommend([], {"diet_mode": "none", "exclusions": []}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from resilience import CircuitBreaker, CircuitOpenError, ResilientScraper, ScraperCache
+from testutil import FakeClock
+from transport import TransportError
+
+
+class FlakyScraper:
+    """Answers from a dict, or raises while down."""
+
+    def __init__(self, recipes):
+        self.recipes = recipes
+        self.down = False
+        self.calls = []
+
+    def fetch(self, dish_name):
+        self.calls.append(dish_name)
+        if self.down:
+            raise TransportError("upstream unavailable")
+        return self.recipes.get(dish_name)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    # -----------------------------------------
+    # TC-RES-01: open, half-open, closed
+    # -----------------------------------------
+    def test_breaker_opens_probes_and_closes(self):
+        """
+        TC-RES-01:
+        Three consecutive failures open the circuit; after the reset
+        timeout one probe is let through, a failed probe reopens it and a
+        successful one closes it. A slow success counts as a failure.
+        """
+        clock = FakeClock(1000.0)
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, slow_call=5, clock=clock)
+        closed = []
+        breaker.onClose(lambda: closed.append(True))
+
+        breaker.recordFailure()
+        breaker.recordSuccess(0.1)
+        self.assertEqual(breaker.failures, 0)
+
+        breaker.recordFailure()
+        breaker.recordFailure()
+        breaker.recordSuccess(6.0)  # too slow
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: "never called")
+
+        clock.now += 30
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # one probe at a time
+        breaker.recordFailure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        clock.now += 30
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(closed, [True])
+
+
+class TestResilientScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.clock = FakeClock(1000.0)
+        self.wall = FakeClock(1000.0)
+        self.upstream = FlakyScraper({"chickpea curry": {"dish_name": "Chickpea Curry"}})
+        self.cache = ScraperCache(os.path.join(self.tmp, "cache.json"), ttl=100, negative_ttl=10, clock=self.wall)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock)
+        self.scraper = ResilientScraper(self.upstream, self.cache, self.breaker)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _wait_idle(self):
+        deadline = time.monotonic() + 5
+        while not self.scraper.idle() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    # -----------------------------------------
+    # TC-RES-02: cached answers
+    # -----------------------------------------
+    def test_fresh_answers_skip_the_api(self):
+        """
+        TC-RES-02:
+        Answers (including "not found") are cached per normalized query,
+        persisted, and served without calling the API while fresh.
+        """
+        self.assertEqual(self.scraper.fetch("chickpea curry")["dish_name"], "Chickpea Curry")
+        self.assertIsNone(self.scraper.fetch("Unicorn Stew"))
+        self.assertEqual(self.scraper.fetch("  Chickpea CURRY ")["dish_name"], "Chickpea Curry")
+        self.assertIsNone(self.scraper.fetch("unicorn stew"))
+        self.assertEqual(self.upstream.calls, ["chickpea curry", "Unicorn Stew"])
+
+        reopened = ScraperCache(self.cache.path, clock=self.wall)
+        self.assertIsNone(reopened.get("unicorn stew")["recipe"])
+
+    # -----------------------------------------
+    # TC-RES-03: outage
+    # -----------------------------------------
+    def test_outage_serves_stale_and_revalidates_after_close(self):
+        """
+        TC-RES-03:
+        During an outage misses fail fast once the circuit is open and
+        stale answers are served immediately; when a probe closes the
+        circuit the stale entries are refreshed in the background.
+        """
+        self.scraper.fetch("chickpea curry")
+        self.wall.now += 101  # entry is now stale
+        self.upstream.down = True
+
+        self.assertIsNone(self.scraper.fetch("pad thai"))
+        self.assertIsNone(self.scraper.fetch("ramen"))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        calls = len(self.upstream.calls)
+        self.assertIsNone(self.scraper.fetch("pho"))  # open: no upstream call
+        stale = self.scraper.fetch("chickpea curry")
+        self.assertEqual(stale["dish_name"], "Chickpea Curry")
+        self.assertEqual(len(self.upstream.calls), calls)
+
+        self.upstream.down = False
+        self.upstream.recipes["chickpea curry"] = {"dish_name": "Chickpea Curry v2"}
+        self.clock.now += 30
+        self.assertIsNone(self.scraper.fetch("pho"))  # the half-open probe succeeds
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self._wait_idle()
+        self.assertEqual(self.cache.get("chickpea curry")["recipe"]["dish_name"], "Chickpea Curry v2")
+        self.assertEqual(self.scraper.fetch("chickpea curry")["dish_name"], "Chickpea Curry v2")
+
+    # -----------------------------------------
+    # TC-RES-04: crash while saving
+    # -----------------------------------------
+    def test_failed_save_keeps_previous_cache_file(self):
+        """
+        TC-RES-04:
+        When saving the cache fails halfway (disk full, crash), the file
+        on disk still holds the previous answers.
+        """
+        self.scraper.fetch("chickpea curry")
+        real_open = open
+
+        class _FullDisk:
+            def __init__(self, f):
+                self.f = f
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.f.close()
+
+            def write(self, data):
+                raise OSError("No space left on device")
+
+        def crashing_open(path, mode="r", *args, **kwargs):
+            f = real_open(path, mode, *args, **kwargs)
+            return _FullDisk(f) if "w" in mode else f
+
+        with mock.patch("builtins.open", side_effect=crashing_open):
+            with self.assertRaises(OSError):
+                self.cache.put("pad thai", {"dish_name": "Pad Thai"})
+
+        reopened = ScraperCache(self.cache.path)
+        self.assertEqual(reopened.get("chickpea curry")["recipe"]["dish_name"], "Chickpea Curry")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from fake_server import FakeSpoonacularServer
+from keypool import DAY, KeyPool, NoAPIKeysError, QuotaExhaustedError, key_pool_from_env
+from scraper import RecipeScraper
+from transport import LiveTransport, RecordingTransport, ReplayTransport, TransportError
+
+
+RECIPES = [
+    {
+        "dish_name": "Potato Salad",
+        "ingredients": [
+            {"name": "Potatoes", "quantity": "500 g"},
+            {"name": "Mayonnaise", "quantity": "100 g"}
+        ],
+        "steps": ["Boil potatoes.", "Mix with mayonnaise."]
+    },
+    {
+        "dish_name": "Chicken Alfredo",
+        "ingredients": [
+            {"name": "Chicken breast", "quantity": "300 g"},
+            {"name": "Fettuccine", "quantity": "250 g"}
+        ],
+        "steps": ["Cook pasta.", "Cook chicken.", "Combine."]
+    }
+]
+
+
+class TestScraperTransports(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Start a fake Spoonacular server on a free local port
+        - Create an empty cassette directory
+        """
+        self.server = FakeSpoonacularServer(RECIPES)
+        self.base_url = self.server.start()
+        self.cassette_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.cassette_dir, ignore_errors=True)
+
+    # -----------------------------------------
+    # TC-SCR-01: live transport against fake server
+    # -----------------------------------------
+    def test_fetch_from_fake_server(self):
+        """
+        TC-SCR-01:
+        Given the fake server imitates Spoonacular,
+        when we fetch a dish through the live transport,
+        then we get the recipe in the scraper's dict format.
+        """
+        scraper = RecipeScraper(LiveTransport(), base_url=self.base_url, api_key="test")
+
+        recipe = scraper.fetch("potato salad")
+
+        self.assertEqual(recipe["dish_name"], "Potato Salad")
+        self.assertEqual(len(recipe["ingredients"]), 2)
+        self.assertEqual(recipe["ingredients"][0]["name"], "500 g Potatoes")
+        self.assertEqual(recipe["steps"], ["Boil potatoes.", "Mix with mayonnaise."])
+
+    def test_fetch_unknown_dish_returns_none(self):
+        """
+        TC-SCR-02:
+        When the search returns no results, fetch() should return None.
+        """
+        scraper = RecipeScraper(LiveTransport(), base_url=self.base_url, api_key="test")
+
+        self.assertIsNone(scraper.fetch("beef wellington"))
+
+    # -----------------------------------------
+    # TC-SCR-03: record then replay offline
+    # -----------------------------------------
+    def test_record_then_replay_without_server(self):
+        """
+        TC-SCR-03:
+        Given a fetch recorded to a cassette directory,
+        when the server is gone and we replay,
+        then the same recipe comes back and no API key is stored on disk.
+        """
+        recorder = RecipeScraper(RecordingTransport(self.cassette_dir), base_url=self.base_url, api_key="secret-key")
+        recorded = recorder.fetch("chicken alfredo")
+
+        self.server.stop()
+
+        replayer = RecipeScraper(ReplayTransport(self.cassette_dir), api_key="another-key")
+        replayed = replayer.fetch("chicken alfredo")
+
+        self.assertEqual(recorded, replayed)
+
+        for name in os.listdir(self.cassette_dir):
+            with open(os.path.join(self.cassette_dir, name), "r", encoding="utf-8") as f:
+                self.assertNotIn("secret-key", f.read())
+
+    def test_replay_missing_cassette_raises(self):
+        """
+        TC-SCR-04:
+        Replaying a request that was never recorded should raise TransportError.
+        """
+        scraper = RecipeScraper(ReplayTransport(self.cassette_dir), api_key="secret-key")
+
+        with self.assertRaises(TransportError):
+            scraper.fetch("poutine")
+
+    def test_replay_injected_errors(self):
+        """
+        TC-SCR-05:
+        With error_rate=1.0 every replayed call should fail.
+        """
+        RecipeScraper(RecordingTransport(self.cassette_dir), base_url=self.base_url, api_key="secret-key").fetch("potato salad")
+
+        scraper = RecipeScraper(ReplayTransport(self.cassette_dir, error_rate=1.0, seed=1), api_key="secret-key")
+
+        with self.assertRaises(TransportError):
+            scraper.fetch("potato salad")
+
+    def test_fake_server_requires_api_key(self):
+        """
+        TC-SCR-06:
+        The fake server rejects calls without an apiKey, like the real API.
+        """
+        res = LiveTransport().get(f"{self.base_url}/recipes/complexSearch", {"query": "potato"})
+
+        self.assertEqual(res.status, 401)
+        self.assertIn("X-API-Quota-Left", res.headers)
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestKeyPool(unittest.TestCase):
+
+    # -----------------------------------------
+    # TC-SCR-07: calls spread over the keys with quota left
+    # -----------------------------------------
+    def test_rotates_to_keys_with_quota_left(self):
+        """
+        TC-SCR-07:
+        With 5 points per key, two keys serve 5 two-call fetches: each
+        call goes to the key with the most points left, and a key the
+        server turns away with 402 is rested and the call retried on
+        the other one. Once both are used up, fetches fail without
+        calling the server.
+        """
+        with FakeSpoonacularServer(RECIPES, daily_quota=5) as server:
+            key_a, key_b = "a" * 32, "b" * 32
+            pool = KeyPool([key_a, key_b])
+            scraper = RecipeScraper(LiveTransport(), base_url=server.base_url, keys=pool)
+
+            for _ in range(5):
+                self.assertEqual(scraper.fetch("potato salad")["dish_name"], "Potato Salad")
+            self.assertEqual(dict(server.quota_used), {key_a: 5, key_b: 5})
+
+            calls = sum(server.quota_used.values())
+            with self.assertRaises(QuotaExhaustedError):
+                scraper.fetch("potato salad")
+            self.assertEqual(sum(server.quota_used.values()), calls)
+
+            usage = pool.metrics()
+            self.assertEqual(usage["calls"], 10)
+            self.assertEqual(usage["points"], 10)
+            self.assertEqual(usage["left"], 0)
+            self.assertEqual(usage["keys"][0]["key"], "...aaaaa")
+            self.assertNotIn(key_a, str(usage))
+            self.assertTrue(all(k["resting_for"] > 0 for k in usage["keys"]))
+
+    # -----------------------------------------
+    # TC-SCR-08: rests end
+    # -----------------------------------------
+    def test_rested_keys_come_back(self):
+        """
+        TC-SCR-08:
+        An exhausted key rests until midnight UTC, a rate-limited one
+        for a minute; afterwards they are used again.
+        """
+        clock = _Clock(10 * DAY + 3600)
+        pool = KeyPool(["key-a", "key-b"], clock=clock)
+
+        pool.record(pool.acquire(), 200, {"X-API-Quota-Used": "150", "X-API-Quota-Left": "0"})
+        pool.record(pool.acquire(), 429, {})
+        with self.assertRaises(QuotaExhaustedError):
+            pool.acquire()
+
+        clock.now += 61
+        self.assertEqual(pool.acquire(), "key-b")
+        pool.record("key-b", 200, {"x-api-quota-left": "20", "x-api-quota-request": "1"})
+        self.assertEqual(pool.metrics()["keys"][0]["resting_for"], 11 * DAY - clock.now)
+
+        clock.now = 11 * DAY
+        self.assertEqual(pool.acquire(), "key-a")
+
+    # -----------------------------------------
+    # TC-SCR-09: no keys configured
+    # -----------------------------------------
+    def test_no_keys_configured(self):
+        """
+        TC-SCR-09:
+        With neither SPOONACULAR_API_KEYS nor SPOONACULAR_API_KEY set the
+        pool is empty and fetches fail with NoAPIKeysError without
+        calling the server.
+        """
+        env = {k: v for k, v in os.environ.items() if not k.startswith("SPOONACULAR_API_KEY")}
+        with mock.patch.dict(os.environ, env, clear=True):
+            pool = key_pool_from_env()
+        self.assertEqual(len(pool), 0)
+
+        with FakeSpoonacularServer(RECIPES) as server:
+            scraper = RecipeScraper(LiveTransport(), base_url=server.base_url, keys=pool)
+            with self.assertRaises(NoAPIKeysError):
+                scraper.fetch("potato salad")
+            self.assertEqual(dict(server.quota_used), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import journal
+import packed
+import services
+import snapshot
+from index import RecipeIndex
+from packed import PackedCorpus, PackedRecipes, open_pack
+from services import RecipeService
+
+
+class TestSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Work in a temporary directory with its own data/ folder
+        """
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)
+        os.makedirs("data")
+        self.path = os.path.join("data", "users.json")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, path, data, age=10):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        # back-date the file so it is not "racy" (modified right before the snapshot)
+        past = os.stat(path).st_mtime_ns - age * 1_000_000_000
+        os.utime(path, ns=(past, past))
+
+    # -----------------------------------------
+    # TC-SNAP-01: JSON files are read once
+    # -----------------------------------------
+    def test_load_json_uses_snapshot_until_source_changes(self):
+        """
+        TC-SNAP-01:
+        The second load comes from the snapshot; touching the file without
+        changing it keeps the snapshot, and a same-size edit replaces it.
+        """
+        self._write(self.path, {"alice": {"password": "aaa"}})
+        self.assertEqual(snapshot.load_json(self.path), {"alice": {"password": "aaa"}})
+        self.assertTrue(os.path.exists(os.path.join("data", "snapshots", "users.json.snap")))
+
+        with mock.patch("snapshot._parse") as parse:
+            self.assertEqual(snapshot.load_json(self.path), {"alice": {"password": "aaa"}})
+            os.utime(self.path)
+            self.assertEqual(snapshot.load_json(self.path), {"alice": {"password": "aaa"}})
+            parse.assert_not_called()
+
+        self._write(self.path, {"alice": {"password": "bbb"}}, age=9)
+        self.assertEqual(snapshot.load_json(self.path), {"alice": {"password": "bbb"}})
+
+    # -----------------------------------------
+    # TC-SNAP-02: format version and switch
+    # -----------------------------------------
+    def test_version_mismatch_and_disabled(self):
+        """
+        TC-SNAP-02:
+        A snapshot from another format version is ignored, and
+        RECIPE_SNAPSHOTS=0 neither reads nor writes snapshots.
+        """
+        self._write(self.path, {"bob": {}})
+        snapshot.load_json(self.path)
+
+        with mock.patch("snapshot.FORMAT_VERSION", snapshot.FORMAT_VERSION + 1):
+            self.assertIsNone(snapshot.load(snapshot.snapshot_path(self.path), [self.path]))
+
+        shutil.rmtree(os.path.join("data", "snapshots"))
+        with mock.patch.dict(os.environ, {"RECIPE_SNAPSHOTS": "0"}):
+            self.assertEqual(snapshot.load_json(self.path), {"bob": {}})
+        self.assertFalse(os.path.exists(os.path.join("data", "snapshots")))
+
+    # -----------------------------------------
+    # TC-SNAP-03: warm RecipeService start
+    # -----------------------------------------
+    def test_recipe_service_starts_from_pack(self):
+        """
+        TC-SNAP-03:
+        The first RecipeService parses recipes.json and writes a pack; the
+        next one maps the pack without parsing, and an edit to recipes.json
+        makes it parse again. Both serve recipes from the pack.
+        """
+        recipes = [{"dish_name": "Poutine", "ingredients": [{"name": "Potato", "quantity": ""}], "steps": []}]
+        self._write(os.path.join("data", "recipes.json"), recipes)
+        self._write(os.path.join("data", "substitutions.json"), {"egg": "flax egg"})
+
+        with mock.patch("services._load_recipes", wraps=services._load_recipes) as load:
+            cold = RecipeService()
+            warm = RecipeService()
+            self.assertEqual(load.call_count, 1)
+
+            self.assertIsInstance(cold.recipes, PackedRecipes)
+            self.assertIsInstance(warm.recipes, PackedRecipes)
+            self.assertEqual(list(warm.recipes), recipes)
+            self.assertEqual(warm.subs, {"egg": "flax egg"})
+            self.assertEqual(warm.index.search("poutine"), 0)
+
+            recipes.append({"dish_name": "Chili", "ingredients": [], "steps": []})
+            self._write(os.path.join("data", "recipes.json"), recipes)
+            again = RecipeService()
+            self.assertEqual(load.call_count, 2)
+            self.assertEqual(again.index.search("chili"), 1)
+
+    # -----------------------------------------
+    # TC-SNAP-04: in-memory mode
+    # -----------------------------------------
+    def test_recipe_service_without_snapshots(self):
+        """
+        TC-SNAP-04:
+        With RECIPE_SNAPSHOTS=0 recipes are parsed into a plain list and
+        no pack is written.
+        """
+        self._write(os.path.join("data", "recipes.json"), [{"dish_name": "Poutine", "ingredients": [], "steps": []}])
+        with mock.patch.dict(os.environ, {"RECIPE_SNAPSHOTS": "0"}):
+            service = RecipeService()
+        self.assertIsInstance(service.recipes, list)
+        self.assertEqual(service.index.search("poutine"), 0)
+        self.assertFalse(os.path.exists(os.path.join("data", "snapshots")))
+
+    # -----------------------------------------
+    # TC-SNAP-05: repacking a pack-backed service
+    # -----------------------------------------
+    def test_pack_corpus_from_warm_service(self):
+        """
+        TC-SNAP-05:
+        packCorpus() on a service started from a pack writes the packed
+        recipes plus those ingested since, and the new pack answers like
+        an index built from scratch.
+        """
+        recipes = [
+            {"dish_name": "Poutine", "ingredients": [{"name": "Potato", "quantity": ""}], "steps": [],
+             "spoonacular_id": 11},
+            {"dish_name": "Potato Salad", "ingredients": [{"name": "Potatoes", "quantity": ""}], "steps": []},
+        ]
+        self._write(os.path.join("data", "recipes.json"), recipes)
+        RecipeService()
+        warm = RecipeService()
+        self.assertIsInstance(warm.recipes, PackedRecipes)
+
+        dal = {"dish_name": "Potato Dal", "ingredients": [{"name": "Lentils", "quantity": ""}], "steps": [],
+               "spoonacular_id": 42}
+        warm.ingestRecipe(dal)
+        path = warm.packCorpus(os.path.join(self.tmp, "repacked.pack"))
+
+        index = PackedCorpus(path).index()
+        plain = RecipeIndex.build(recipes + [dal])
+        self.assertEqual(list(PackedCorpus(path).recipes()), recipes + [dal])
+        self.assertEqual(dict(index.tokens.items()), plain.tokens)
+        self.assertEqual(dict(index.by_id.items()), plain.by_id)
+        self.assertEqual(dict(index.ingredient_ids.items()), plain.ingredient_ids)
+        self.assertEqual(index.search("dal"), 2)
+        self.assertEqual(index.lookup({"dish_name": "?", "spoonacular_id": 11}), 0)
+
+    # -----------------------------------------
+    # TC-SNAP-06: ingests keep the pack fresh
+    # -----------------------------------------
+    def test_ingest_keeps_warm_start(self):
+        """
+        TC-SNAP-06:
+        An ingested recipe goes to the journal, so the next RecipeService
+        still starts from the pack and replays it on top; packCorpus()
+        folds the journal into recipes.json and a cold start of a fresh
+        journal does the same.
+        """
+        recipes = [{"dish_name": "Poutine", "ingredients": [{"name": "Potato", "quantity": ""}], "steps": []}]
+        self._write(os.path.join("data", "recipes.json"), recipes)
+        dal = {"dish_name": "Dal", "ingredients": [], "steps": [], "spoonacular_id": 42}
+        chili = {"dish_name": "Chili", "ingredients": [], "steps": []}
+
+        with mock.patch("services._load_recipes", wraps=services._load_recipes) as load:
+            RecipeService().ingestRecipe(dal)
+            warm = RecipeService()
+            self.assertEqual(load.call_count, 1)
+            self.assertEqual(warm.index.search("dal"), 1)
+            self.assertEqual(warm.reload()["added"], 0)
+
+            warm.packCorpus()
+            self.assertFalse(os.path.exists(journal.JOURNAL_PATH))
+            with open(os.path.join("data", "recipes.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f), recipes + [dal])
+            self.assertEqual(RecipeService().index.search("dal"), 1)
+            self.assertEqual(load.call_count, 1)
+
+            journal.append(chili)
+            os.remove(services.PACK_PATH)
+            cold = RecipeService()
+            self.assertEqual(load.call_count, 2)
+            self.assertEqual(cold.index.search("chili"), 2)
+            self.assertFalse(os.path.exists(journal.JOURNAL_PATH))
+            with open(os.path.join("data", "recipes.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f), recipes + [dal, chili])
+
+    # -----------------------------------------
+    # TC-SNAP-07: packs built from the command line
+    # -----------------------------------------
+    def test_built_pack_is_fresh_for_service(self):
+        """
+        TC-SNAP-07:
+        A pack written by `packed.py build` counts as fresh for
+        RecipeService, which maps it instead of parsing recipes.json.
+        """
+        self._write(os.path.join("data", "recipes.json"), [{"dish_name": "Poutine", "ingredients": [], "steps": []}])
+        self._write(os.path.join("data", "diets.json"), {"categories": {}, "diets": {}})
+        with redirect_stdout(io.StringIO()):
+            packed.main(["build"])
+        self.assertIsNotNone(open_pack(services.PACK_PATH, RecipeService.SOURCES))
+
+        with mock.patch("services._load_recipes") as load:
+            self.assertEqual(RecipeService().index.search("poutine"), 0)
+            load.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import tracing
+from controllers import RecipeController
+from fake_server import FakeSpoonacularServer
+from scraper import RecipeScraper
+from services import RecipeService
+from tracing import Tracer, load_traces, set_tracer, span, traced
+from transport import LiveTransport
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+RECIPES_PATH = os.path.join(DATA_DIR, "recipes.json")
+RECIPES_BACKUP_PATH = os.path.join(DATA_DIR, "recipes_tracing_backup.json")
+JOURNAL_PATH = os.path.join(DATA_DIR, "recipes.ingested.jsonl")
+JOURNAL_BACKUP_PATH = os.path.join(DATA_DIR, "recipes.ingested_tracing_backup.jsonl")
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "traces.jsonl")
+
+    def tearDown(self):
+        set_tracer(None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    # -----------------------------------------
+    # TC-TRACE-01: nested spans
+    # -----------------------------------------
+    def test_nested_spans_are_written_with_parents(self):
+        """
+        TC-TRACE-01:
+        Spans opened inside a span become its children in the same trace,
+        attributes and errors (without API keys) are recorded, and nothing is written until
+        the root ends.
+        """
+        set_tracer(Tracer(self.path))
+
+        @traced("inner")
+        def inner():
+            tracing.current_span().set(source="local")
+
+        with span("root", dish="poutine"):
+            inner()
+            with self.assertRaises(ValueError):
+                with span("failing"):
+                    raise ValueError("boom")
+            with self.assertRaises(ConnectionError):
+                with span("offline"):
+                    raise ConnectionError("GET /recipes/complexSearch?apiKey=s3cret&query=poutine")
+            self.assertEqual(self._records(), [])
+
+        records = {r["name"]: r for r in self._records()}
+        self.assertEqual(set(records), {"root", "inner", "failing", "offline"})
+        root = records["root"]
+        self.assertIsNone(root["parent_id"])
+        self.assertEqual(root["attrs"], {"dish": "poutine"})
+        self.assertEqual(records["inner"]["parent_id"], root["span_id"])
+        self.assertEqual(records["inner"]["attrs"], {"source": "local"})
+        self.assertEqual(records["failing"]["error"], "ValueError: boom")
+        self.assertNotIn("s3cret", records["offline"]["error"])
+        self.assertEqual({r["trace_id"] for r in records.values()}, {root["trace_id"]})
+        self.assertGreaterEqual(root["duration_ms"], records["inner"]["duration_ms"])
+
+    # -----------------------------------------
+    # TC-TRACE-02: head sampling
+    # -----------------------------------------
+    def test_head_sampling_keeps_whole_traces(self):
+        """
+        TC-TRACE-02:
+        The sampling decision is made at the root: a request is written
+        with all of its spans or not at all, and rate 0 or no file
+        writes nothing.
+        """
+        set_tracer(Tracer(self.path, sample_rate=0.5, seed=3))
+        for _ in range(40):
+            with span("root"):
+                with span("child"):
+                    with span("grandchild"):
+                        pass
+
+        traces = load_traces(self.path)
+        self.assertTrue(0 < len(traces) < 40)
+        for records in traces.values():
+            self.assertEqual(sorted(r["name"] for r in records), ["child", "grandchild", "root"])
+
+        os.remove(self.path)
+        for tracer in (Tracer(self.path, sample_rate=0), Tracer(None)):
+            set_tracer(tracer)
+            with span("root") as root:
+                root.set(ignored=True)
+        self.assertFalse(os.path.exists(self.path))
+
+    # -----------------------------------------
+    # TC-TRACE-05: unwritable trace file
+    # -----------------------------------------
+    def test_unwritable_trace_file_does_not_fail_requests(self):
+        """
+        TC-TRACE-05:
+        When the trace file cannot be written, traced requests still
+        succeed; their traces are dropped and the failure reported once.
+        """
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+        set_tracer(Tracer(os.path.join(self.path, "traces.jsonl")))  # a directory that is a file
+
+        with mock.patch("builtins.print") as printed:
+            for _ in range(3):
+                with span("root"):
+                    with span("child") as child:
+                        child.set(ok=True)
+        self.assertEqual(printed.call_count, 1)
+        self.assertIn("Cannot write", printed.call_args.args[0])
+
+
+class TestRequestTrace(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - Backup recipes.json and the ingest journal (the fetched recipe is stored locally)
+        - Serve a dish that is not in the local corpus from the fake server
+        """
+        shutil.copy(RECIPES_PATH, RECIPES_BACKUP_PATH)
+        if os.path.exists(JOURNAL_PATH):
+            os.replace(JOURNAL_PATH, JOURNAL_BACKUP_PATH)
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "traces.jsonl")
+        set_tracer(Tracer(self.path))
+
+        self.server = FakeSpoonacularServer([{
+            "dish_name": "Chickpea Curry",
+            "ingredients": [{"name": "Chickpeas", "quantity": "400 g"}],
+            "steps": ["Simmer chickpeas in curry sauce."]
+        }])
+        base_url = self.server.start()
+        self.ctrl = RecipeController()
+        self.ctrl.service = RecipeService()
+        self.ctrl.service.scraper = RecipeScraper(LiveTransport(), base_url=base_url, api_key="test")
+
+    def tearDown(self):
+        self.server.stop()
+        set_tracer(None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        shutil.move(RECIPES_BACKUP_PATH, RECIPES_PATH)
+        if os.path.exists(JOURNAL_BACKUP_PATH):
+            os.replace(JOURNAL_BACKUP_PATH, JOURNAL_PATH)
+        elif os.path.exists(JOURNAL_PATH):
+            os.remove(JOURNAL_PATH)
+
+    # -----------------------------------------
+    # TC-TRACE-03: generate recipe end to end
+    # -----------------------------------------
+    def test_generate_recipe_trace(self):
+        """
+        TC-TRACE-03:
+        Generating a recipe that has to be fetched records the controller,
+        the lookup, both HTTP phases and the feasibility check as one tree.
+        """
+        result = self.ctrl.generateCompliantRecipe("chickpea curry", {"diet_mode": "vegan", "exclusions": []})
+        self.assertTrue(result["success"])
+
+        (records,) = load_traces(self.path).values()
+        by_name = {r["name"]: r for r in records}
+        parent = {r["name"]: next((p["name"] for p in records if p["span_id"] == r["parent_id"]), None)
+                  for r in records}
+        self.assertEqual(parent, {
+            "RecipeController.generateCompliantRecipe": None,
+            "RecipeService.findRecipe": "RecipeController.generateCompliantRecipe",
+            "RecipeScraper.fetch": "RecipeService.findRecipe",
+            "GET complexSearch": "RecipeScraper.fetch",
+            "GET information": "RecipeScraper.fetch",
+            "Validator.checkFeasibility": "RecipeController.generateCompliantRecipe",
+        })
+        self.assertEqual(by_name["RecipeService.findRecipe"]["attrs"], {"source": "api"})
+        self.assertEqual(by_name["GET information"]["attrs"], {"recipe_id": 1, "status": 200})
+        self.assertIn("RecipeController.generateCompliantRecipe", tracing.format_trace(records))
+
+    # -----------------------------------------
+    # TC-TRACE-04: lookups finishing after the request
+    # -----------------------------------------
+    def test_background_lookup_stays_in_trace(self):
+        """
+        TC-TRACE-04:
+        When the API misses the latency budget, the request answers
+        provisionally and its trace is written once the background lookup
+        ends, with the lookup's spans under the request's root.
+        """
+        slow = FakeSpoonacularServer([{
+            "dish_name": "Chickpea Curry",
+            "ingredients": [{"name": "Chickpeas", "quantity": "400 g"}],
+            "steps": ["Simmer chickpeas in curry sauce."]
+        }], latency=0.3)
+        self.ctrl.service.scraper = RecipeScraper(LiveTransport(), base_url=slow.start(), api_key="test")
+        try:
+            result = self.ctrl.generateCompliantRecipe("chickpea curry", {"diet_mode": "none", "exclusions": []},
+                                                       budget=0.05)
+            self.assertTrue(result["provisional"])
+            self.assertFalse(os.path.exists(self.path))
+
+            while any(t.name == "recipe-lookup" for t in threading.enumerate()):
+                time.sleep(0.05)
+        finally:
+            slow.stop()
+
+        (records,) = load_traces(self.path).values()
+        parent = {r["name"]: next((p["name"] for p in records if p["span_id"] == r["parent_id"]), None)
+                  for r in records}
+        self.assertEqual(parent["RecipeService.findRecipe"], "RecipeController.generateCompliantRecipe")
+        self.assertEqual(parent["GET complexSearch"], "RecipeScraper.fetch")
+        self.assertEqual(parent["GET information"], "RecipeScraper.fetch")
+        root = next(r for r in records if r["parent_id"] is None)
+        self.assertEqual(root["attrs"], {"provisional": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from index import RecipeIndex
+from resilience import CircuitBreaker, ResilientScraper, ScraperCache
+from testutil import FakeClock
+from warmer import CacheWarmer, RateLimiter
+
+
+class CountingScraper:
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, dish_name):
+        self.calls.append(dish_name)
+        return {"dish_name": dish_name.title(), "ingredients": [], "steps": []}
+
+
+class TestCacheWarmer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Runs before each test.
+        - A local corpus that only has Poutine, and a scraper cache on a fake clock
+        """
+        self.tmp = tempfile.mkdtemp()
+        self.upstream = CountingScraper()
+        self.clock = FakeClock()
+        self.cache_path = os.path.join(self.tmp, "scraper_cache.json")
+        self.scraper = ResilientScraper(self.upstream, ScraperCache(path=self.cache_path, clock=self.clock),
+                                        CircuitBreaker())
+        self.recipes = SimpleNamespace(
+            index=RecipeIndex.build([{"dish_name": "Poutine", "ingredients": [], "steps": []}]),
+            scraper=self.scraper,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    # -----------------------------------------
+    # TC-WARM-02: warming pass and report
+    # -----------------------------------------
+    def test_warm_pass_refreshes_popular_queries(self):
+        """
+        TC-WARM-02:
+        The warm set is the most requested cached queries the local corpus
+        does not answer; the request counts survive a restart. A pass
+        refetches only those close to expiring, and later lookups of them
+        are cache hits in the report. Nothing is fetched while the circuit
+        is open.
+        """
+        for query, times in [("Poutine", 4), ("spicy chickpea stew", 3), ("ramen", 2), ("pho", 1)]:
+            for _ in range(times):
+                self.scraper.fetch(query)
+        self.assertEqual(len(self.upstream.calls), 4)
+        self.assertEqual(ScraperCache(path=self.cache_path).popular(),
+                         ["poutine", "spicy chickpea stew", "ramen", "pho"])
+
+        warmer = CacheWarmer(self.recipes, top_n=2, rate=1000)
+        stats = warmer.runOnce()
+        self.assertEqual((stats["popular"], stats["local"], stats["fresh"], stats["prefetched"]), (2, 1, 2, 0))
+        self.assertEqual(warmer.warm_set, ["spicy chickpea stew", "ramen"])
+
+        self.clock.now += self.scraper.cache.ttl * 0.95
+        stats = warmer.runOnce()
+        self.assertEqual((stats["fresh"], stats["prefetched"]), (0, 2))
+        self.assertEqual(self.upstream.calls[4:], ["spicy chickpea stew", "ramen"])
+
+        self.scraper.fetch("Ramen")
+        self.assertEqual(len(self.upstream.calls), 6)
+        self.assertEqual(warmer.report(), {"runs": 2, "prefetched": 2, "failed": 0, "warm_set": 2, "hits": 4})
+
+        self.clock.now += self.scraper.cache.ttl
+        for _ in range(3):
+            self.scraper.breaker.recordFailure()
+        self.assertEqual(CacheWarmer(self.recipes, top_n=3, rate=1000).runOnce()["skipped"], 3)
+        self.assertEqual(len(self.upstream.calls), 6)
+
+    # -----------------------------------------
+    # TC-WARM-03: rate limit
+    # -----------------------------------------
+    def test_rate_limiter_spaces_lookups(self):
+        """
+        TC-WARM-03:
+        At 2 lookups per second the limiter lets one through at once and
+        then waits half a second before each of the next ones.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(2, clock=clock, sleep=clock.sleep)
+        for _ in range(4):
+            limiter.acquire()
+        self.assertAlmostEqual(clock.now, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
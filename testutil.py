@@ -0,0 +1,42 @@
+# testutil.py
+"""
+Fixtures shared by the test modules.
+"""
+
+
+def make_recipe(name, *ingredients, recipe_id=None):
+    """A recipe dict; each ingredient is a name or a (name, quantity) pair."""
+    recipe = {
+        "dish_name": name,
+        "ingredients": [{"name": i, "quantity": ""} if isinstance(i, str) else {"name": i[0], "quantity": i[1]}
+                        for i in ingredients],
+        "steps": [],
+    }
+    if recipe_id is not None:
+        recipe["spoonacular_id"] = recipe_id
+    return recipe
+
+
+# A small corpus for index and pack tests.
+CORPUS = [
+    make_recipe("Poutine", "Potato (for fries)", "Cheese curds", "Beef gravy", "Salt", recipe_id=11),
+    make_recipe("Potato Salad", "Potatoes", "Mayonnaise", "Salt"),
+    make_recipe("Grilled Cheese", "Bread", "Cheese", "Butter"),
+    make_recipe("Baked Potato", "Potato", "Salt"),
+    make_recipe("Crème Brûlée", "Cream", "Egg yolks", "Sugar"),
+]
+
+
+class FakeClock:
+    """A clock for time-based code: call it for the time, sleep() moves it on."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
@@ -0,0 +1,283 @@
+# tracing.py
+"""
+Request tracing: nested timing spans written as JSON lines.
+
+    set RECIPE_TRACE_FILE=data/traces.jsonl
+    set RECIPE_TRACE_SAMPLE=0.1
+
+The outermost span of a request is its root. Whether the request is
+traced is decided once, at the root (head sampling), so a trace on disk
+is always complete; spans of an unsampled request cost one context
+lookup. A sampled trace is written once none of its spans is open any
+more, one line per span, so work a request leaves running in the
+background (a lookup past its latency budget) is written when it ends.
+A span opened after that is written in a batch of its own, under the
+same trace_id:
+
+    {"trace_id", "span_id", "parent_id", "name", "start", "duration_ms", "attrs"[, "error"]}
+
+If the file cannot be written, traces are dropped (and that is reported
+once); the requests themselves carry on.
+
+Slow requests can be printed as trees with
+
+    python tracing.py slow [--file data/traces.jsonl] [--min-ms 1000]
+"""
+import argparse
+import functools
+import os
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+import codec
+
+DEFAULT_TRACE_FILE = "data/traces.jsonl"
+
+# Error texts can contain request URLs; their API keys are not written out.
+_SECRET = re.compile(r"(apiKey=)[^&\s'\"]+")
+
+
+class _NoSpan:
+    """Stands in for a span that is not recorded."""
+
+    def set(self, **attrs):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+# The innermost open span of this thread/task, _NO_SPAN inside an unsampled request.
+_current = ContextVar("span", default=None)
+
+
+class _Trace:
+    """The finished spans of one request, handed to write() whenever no span of it is open."""
+
+    __slots__ = ("records", "open", "write", "_lock")
+
+    def __init__(self, write):
+        self.records = []
+        self.open = 0
+        self.write = write
+        self._lock = Lock()
+
+    def opened(self):
+        with self._lock:
+            self.open += 1
+
+    def closed(self, record):
+        with self._lock:
+            self.records.append(record)
+            self.open -= 1
+            if self.open:
+                return
+            records, self.records = self.records, []
+        self.write(records)
+
+
+class Span:
+
+    __slots__ = ("trace", "trace_id", "span_id", "parent_id", "name", "attrs", "start", "_t0")
+
+    def __init__(self, trace, trace_id, parent_id, name, attrs):
+        self.trace = trace          # the request's _Trace, shared by all its spans
+        trace.opened()
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs):
+        """Attach attributes, e.g. span.set(source="local")."""
+        self.attrs.update(attrs)
+
+    def _finish(self, error=None):
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "attrs": self.attrs,
+        }
+        if error is not None:
+            record["error"] = _SECRET.sub(r"\1***", f"{type(error).__name__}: {error}")
+        self.trace.closed(record)
+
+
+class Tracer:
+    """
+    Writes sampled traces to path. path=None turns tracing off;
+    sample_rate is the fraction of requests (root spans) recorded.
+    """
+
+    def __init__(self, path=None, sample_rate=1.0, seed=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._failed = False  # a write failed; reported once
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and self.sample_rate > 0
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        parent = _current.get()
+        if parent is _NO_SPAN or (parent is None and not self._sampled()):
+            token = _current.set(_NO_SPAN)
+            try:
+                yield _NO_SPAN
+            finally:
+                _current.reset(token)
+            return
+
+        if parent is None:
+            span = Span(_Trace(self._write), os.urandom(8).hex(), None, name, attrs)
+        else:
+            span = Span(parent.trace, parent.trace_id, parent.span_id, name, attrs)
+
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span._finish(e)
+            raise
+        else:
+            span._finish()
+        finally:
+            _current.reset(token)
+
+    def _sampled(self) -> bool:
+        return self.enabled and (self.sample_rate >= 1 or self._random.random() < self.sample_rate)
+
+    def _write(self, records):
+        lines = b"".join(codec.dumps(r) + b"\n" for r in records)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "ab") as f:
+                    f.write(lines)
+            except OSError as e:
+                # tracing must never fail the request it traces: the batch is dropped
+                if not self._failed:
+                    self._failed = True
+                    print(f"[trace] Cannot write {self.path} ({type(e).__name__}); traces are dropped")
+
+
+def tracer_from_env() -> Tracer:
+    """Tracer configured by RECIPE_TRACE_FILE (unset: off) and RECIPE_TRACE_SAMPLE (default 1)."""
+    return Tracer(
+        os.environ.get("RECIPE_TRACE_FILE") or None,
+        sample_rate=float(os.environ.get("RECIPE_TRACE_SAMPLE", 1)),
+    )
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = tracer_from_env()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    """Replace the process-wide tracer (None: configure from the environment again)."""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attrs):
+    """Context manager timing a block as a span of the current request."""
+    return get_tracer().span(name, **attrs)
+
+
+def current_span():
+    """The innermost open span, or a stand-in whose set() does nothing."""
+    current = _current.get()
+    return _NO_SPAN if current is None else current
+
+
+def traced(name: str):
+    """Decorator recording every call of a function as a span."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -----------------------------------------------------------
+# READING TRACES
+# -----------------------------------------------------------
+
+def load_traces(path=DEFAULT_TRACE_FILE):
+    """{trace_id: [span records]} from a trace file."""
+    traces = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                record = codec.loads(line)
+                traces.setdefault(record["trace_id"], []).append(record)
+    return traces
+
+
+def format_trace(records) -> str:
+    """A trace as an indented tree, children in start order."""
+    children = {}
+    for record in records:
+        children.setdefault(record["parent_id"], []).append(record)
+
+    lines = []
+
+    def walk(parent_id, depth):
+        for record in sorted(children.get(parent_id, []), key=lambda r: r["start"]):
+            attrs = " ".join(f"{k}={v}" for k, v in record["attrs"].items())
+            error = f" !{record['error']}" if "error" in record else ""
+            lines.append(f"{'  ' * depth}{record['duration_ms']:9.1f} ms  {record['name']} {attrs}{error}".rstrip())
+            walk(record["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect request traces.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    slow = sub.add_parser("slow", help="print the traces of requests slower than --min-ms")
+    slow.add_argument("--file", default=os.environ.get("RECIPE_TRACE_FILE") or DEFAULT_TRACE_FILE)
+    slow.add_argument("--min-ms", type=float, default=1000)
+
+    args = parser.parse_args(argv)
+
+    shown = 0
+    for records in load_traces(args.file).values():
+        root = next((r for r in records if r["parent_id"] is None), None)
+        if root is None or root["duration_ms"] < args.min_ms:
+            continue
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root["start"]))
+        print(f"trace {root['trace_id']} at {started}")
+        print(format_trace(records))
+        print()
+        shown += 1
+    print(f"{shown} request(s) slower than {args.min_ms:g} ms.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# transport.py
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import codec
+
+# Query parameters that must never end up on disk or influence cassette names.
+SECRET_PARAMS = {"apiKey"}
+
+DEFAULT_CASSETTE_DIR = "data/cassettes"
+
+
+@dataclass
+class TransportResponse:
+    status: int
+    data: dict
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class TransportError(Exception):
+    pass
+
+
+# -----------------------------------------------------------
+# LIVE
+# -----------------------------------------------------------
+
+class LiveTransport:
+    """
+    Talks to the real HTTP endpoint (Spoonacular or the local fake server).
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+
+    def get(self, url: str, params: dict) -> TransportResponse:
+        import requests  # deferred: importing requests costs more than the CLI's whole startup
+
+        res = requests.get(url, params=params, timeout=self.timeout)
+        return TransportResponse(
+            status=res.status_code,
+            data=res.json(),
+            headers=dict(res.headers),
+        )
+
+
+# -----------------------------------------------------------
+# RECORD / REPLAY
+# -----------------------------------------------------------
+
+def _cassette_name(url: str, params: dict) -> str:
+    """
+    Cassettes are keyed by URL path + public params only, so a cassette
+    recorded against the live API replays against the fake server (and
+    with any API key).
+    """
+    path = urlparse(url).path
+    public = sorted((k, str(v)) for k, v in params.items() if k not in SECRET_PARAMS)
+    digest = hashlib.sha1(json.dumps([path, public]).encode("utf-8")).hexdigest()[:16]
+    slug = re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-")
+    return f"{slug}-{digest}.json"
+
+
+class RecordingTransport:
+    """
+    Forwards every call to an inner transport and saves the response
+    to the cassette directory.
+    """
+
+    def __init__(self, cassette_dir: str = DEFAULT_CASSETTE_DIR, inner=None):
+        self.cassette_dir = cassette_dir
+        self.inner = inner or LiveTransport()
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    def get(self, url: str, params: dict) -> TransportResponse:
+        res = self.inner.get(url, params)
+
+        cassette = {
+            "request": {
+                "path": urlparse(url).path,
+                "params": {k: v for k, v in params.items() if k not in SECRET_PARAMS},
+            },
+            "response": {
+                "status": res.status,
+                "data": res.data,
+                "headers": res.headers,
+            },
+        }
+        path = os.path.join(self.cassette_dir, _cassette_name(url, params))
+        codec.dump(cassette, path)
+
+        return res
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses from disk. Latency and errors can be
+    injected to imitate a slow or flaky upstream during load tests.
+    """
+
+    def __init__(
+        self,
+        cassette_dir: str = DEFAULT_CASSETTE_DIR,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.cassette_dir = cassette_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def get(self, url: str, params: dict) -> TransportResponse:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise TransportError(f"Injected transport error for {urlparse(url).path}")
+
+        path = os.path.join(self.cassette_dir, _cassette_name(url, params))
+        if not os.path.exists(path):
+            raise TransportError(f"No cassette recorded for {urlparse(url).path} {params.get('query', '')}".strip())
+
+        cassette = codec.load(path)
+
+        res = cassette["response"]
+        return TransportResponse(
+            status=res.get("status", 200),
+            data=res.get("data", {}),
+            headers=res.get("headers", {}),
+        )
+
+
+# -----------------------------------------------------------
+# CONFIG
+# -----------------------------------------------------------
+
+def transport_from_env():
+    """
+    Build the transport selected by RECIPE_TRANSPORT (live, record or replay).
+    Live requests give up after RECIPE_API_TIMEOUT seconds (default 10).
+    """
+    mode = os.environ.get("RECIPE_TRANSPORT", "live").lower()
+    cassette_dir = os.environ.get("RECIPE_CASSETTE_DIR", DEFAULT_CASSETTE_DIR)
+
+    if mode == "record":
+        return RecordingTransport(cassette_dir)
+
+    if mode == "replay":
+        return ReplayTransport(
+            cassette_dir,
+            latency=float(os.environ.get("RECIPE_REPLAY_LATENCY", 0)),
+            jitter=float(os.environ.get("RECIPE_REPLAY_JITTER", 0)),
+            error_rate=float(os.environ.get("RECIPE_REPLAY_ERROR_RATE", 0)),
+        )
+
+    if mode != "live":
+        raise ValueError(f"Unknown RECIPE_TRANSPORT: {mode}")
+
+    return LiveTransport(timeout=float(os.environ.get("RECIPE_API_TIMEOUT", 10)))
@@ -4,6 +4,7 @@ from controllers import (
     RecipeController,
     HistoryController
 )
+from tracing import span
 
 class AuthView:
     """
@@ -47,13 +48,13 @@ class PreferencesView:
         print("Current exclusions:", ", ".join(prefs["exclusions"]) or "None")
 
         print("\nDiet options:")
-        print("1) none")
-        print("2) vegetarian")
-        print("3) vegan")
+        diet_map = {}
+        for i, mode in enumerate(self.pref.getDietModes(), 1):
+            diet_map[str(i)] = mode
+            print(f"{i}) {mode}")
 
         mode_choice = input("Select diet mode: ")
 
-        diet_map = {"1": "none", "2": "vegetarian", "3": "vegan"}
         diet_mode = diet_map.get(mode_choice, prefs["diet_mode"])
 
         exclude = input("Enter exclusions (comma-separated): ")
@@ -88,33 +89,121 @@ class RecipeView:
 
         print("\nFetching online recipe... please wait...\n")
 
-        result = self.recipe_ctrl.generateCompliantRecipe(dish, prefs)
+        # one trace per request, from the lookup to the history entry (see tracing.py)
+        with span("RecipeView.generateRecipe", dish=dish):
+            result = self.recipe_ctrl.generateCompliantRecipe(dish, prefs)
+
+            if not result["success"]:
+                print("Error:", result["message"], "\n")
+                return
+
+            recipe = result["recipe"]
+
+            if result.get("provisional"):
+                print("The recipe service is slow to answer, so this is the closest local recipe.")
+                print("The lookup carries on in the background; ask again in a moment.\n")
+
+            print("=== Recipe Found ===")
+            print("Dish:", recipe["dish_name"])
+
+            print("\nIngredients:")
+            for ing in recipe["ingredients"]:
+                print(" •", ing["name"])
+
+            print("\nSteps:")
+            for i, step in enumerate(recipe["steps"], 1):
+                print(f" {i}. {step}")
+
+            if result["substitutions"]:
+                print("\nApplied substitutions:")
+                for old, new in result["substitutions"]:
+                    print(f" - Replaced '{old}' with '{new}'")
+
+            # a stand-in for the dish asked for is not what the user made
+            if result.get("provisional"):
+                print("\nNot saved to history: ask again for the real recipe.\n")
+                return
+
+            print("\nSaving to history...\n")
+            self.history.addEntry(username, recipe, result["substitutions"])
+            print("Saved!\n")
+
+    def showPantrySearch(self, prefs: dict):
+        print("\n--- Cook With What You Have ---")
+        have = input("Enter your ingredients (comma-separated): ")
+        on_hand = [i.strip() for i in have.split(",") if i.strip()]
+
+        if not on_hand:
+            print("No ingredients entered.\n")
+            return
+
+        results = self.recipe_ctrl.findByIngredients(on_hand, prefs)
+
+        if not results:
+            print("No recipes use those ingredients.\n")
+            return
+
+        for i, r in enumerate(results, 1):
+            print(f"{i}) {r['recipe']['dish_name']} ({r['coverage']:.0%} of ingredients)")
+            if r["missing"]:
+                print("    missing:", ", ".join(r["missing"]))
+        print()
+
+    def showRecommendations(self, username: str, prefs: dict):
+        print("\n--- Recommended For You ---")
+
+        # the most recent page of history is enough to describe a user's taste
+        entries = self.history.getPage(username, 1, 50)["entries"]
+        recipes = [r for r in (self.history.getRecipe(e) for e in entries) if r]
+
+        if not recipes:
+            print("Generate a few recipes first so we can learn what you like.\n")
+            return
+
+        result = self.recipe_ctrl.recommendRecipes(recipes, prefs)
 
         if not result["success"]:
             print("Error:", result["message"], "\n")
             return
 
-        recipe = result["recipe"]
+        if not result["recommendations"]:
+            print("No similar recipes match your preferences yet.\n")
+            return
+
+        for i, rec in enumerate(result["recommendations"], 1):
+            print(f"{i}) {rec['recipe']['dish_name']}")
+        print()
 
-        print("=== Recipe Found ===")
-        print("Dish:", recipe["dish_name"])
+    def showMealPlan(self, username: str, prefs: dict):
+        print("\n--- Weekly Meal Plan ---")
+        days = input("How many days? (default 7): ").strip()
+        days = int(days) if days.isdigit() and int(days) > 0 else 7
 
-        print("\nIngredients:")
-        for ing in recipe["ingredients"]:
-            print(" •", ing["name"])
+        # skip what was cooked in the last couple of weeks
+        entries = self.history.getPage(username, 1, 50)["entries"]
+        recent = [r for r in (self.history.getRecipe(e) for e in entries) if r]
 
-        print("\nSteps:")
-        for i, step in enumerate(recipe["steps"], 1):
-            print(f" {i}. {step}")
+        plan = self.recipe_ctrl.planMeals(prefs, days, recent_recipes=recent)
+
+        if not any(meal["recipe"] for day in plan["days"] for meal in day):
+            print("No recipes in the local collection fit your preferences yet.\n")
+            return
 
-        if result["substitutions"]:
-            print("\nApplied substitutions:")
-            for old, new in result["substitutions"]:
-                print(f" - Replaced '{old}' with '{new}'")
+        for i, day in enumerate(plan["days"], 1):
+            print(f"\nDay {i}")
+            for meal in day:
+                dish = meal["recipe"]["dish_name"] if meal["recipe"] else "(nothing fits)"
+                print(f" {meal['meal'].capitalize():<10} {dish}")
 
-        print("\nSaving to history...\n")
-        self.history.addEntry(username, recipe)
-        print("Saved!\n")
+        if plan["relaxed"]:
+            print("\nNot enough recipes to keep every rule; relaxed:", ", ".join(plan["relaxed"]))
+
+        print("\nShopping list:")
+        for item in plan["shopping_list"]:
+            amount = f"{item['amount']:g} {item['unit']}".strip() if item["amount"] is not None else ""
+            print(f" • {item['name']}" + (f" ({amount})" if amount else ""))
+
+        input("\nPress Enter to return to the dashboard...")
 
 class HistoryView:
     """
@@ -125,36 +214,60 @@ class HistoryView:
     def __init__(self, history_controller: HistoryController):
         self.history = history_controller
 
-    def showHistory(self, username: str):
-        print("\n--- Your History ---")
-        items = self.history.getHistory(username)
-
-        if not items:
-            print("No history yet.\n")
-            return
-
-        # List the recipes
-        for i, r in enumerate(items, 1):
-            print(f"{i}) {r.get('dish_name', 'Unknown Dish')}")
-
-        print("\nEnter a number to view details, or press Enter to go back.")
-        choice = input("Choose: ").strip()
+    PAGE_SIZE = 10
 
-        if not choice:
-            return
-
-        # Validate selection
-        if not choice.isdigit():
-            print("Invalid choice. Must be a number.\n")
-            return
-
-        index = int(choice) - 1
-        if index < 0 or index >= len(items):
-            print("Selection out of range.\n")
+    def showHistory(self, username: str):
+        page = 1
+        while True:
+            print("\n--- Your History ---")
+            result = self.history.getPage(username, page, self.PAGE_SIZE)
+            items = result["entries"]
+
+            if not items:
+                print("No history yet.\n")
+                return
+
+            # List the recipes on this page, newest first
+            page = result["page"]
+            print(f"Page {page} of {result['pages']} ({result['total']} recipes)")
+            for i, r in enumerate(items, 1):
+                when = (r.get("timestamp") or "").replace("T", " ")
+                print(f"{i}) {r.get('dish_name', 'Unknown Dish')}" + (f"  [{when}]" if when else ""))
+
+            print("\nEnter a number to view details, n/p for next/previous page,")
+            print("s for your stats, or press Enter to go back.")
+            choice = input("Choose: ").strip().lower()
+
+            if not choice:
+                return
+            if choice == "n":
+                page += 1
+                continue
+            if choice == "p":
+                page -= 1
+                continue
+            if choice == "s":
+                self.showStats(username)
+                continue
+
+            # Validate selection
+            if not choice.isdigit():
+                print("Invalid choice. Must be a number.\n")
+                return
+
+            index = int(choice) - 1
+            if index < 0 or index >= len(items):
+                print("Selection out of range.\n")
+                return
+
+            break
+
+        # Only the chosen entry's full recipe is loaded
+        recipe = self.history.getRecipe(items[index])
+        if not recipe:
+            print("Recipe details are no longer available.\n")
             return
 
-        recipe = items[index]
-
         # Display recipe details
         print("\n=== Saved Recipe Details ===")
         print("Dish:", recipe.get("dish_name", "Unknown Dish"))
@@ -170,4 +283,19 @@ class HistoryView:
         print("\nPress Enter to return.")
         input()
 
+    def showStats(self, username: str):
+        stats = self.history.getStats(username)
+
+        print("\n--- Your Stats ---")
+        print("Recipes generated:", stats["total"])
+        print("Distinct dishes:", stats["distinct"])
+        if stats["first"]:
+            print("First recipe:", stats["first"].replace("T", " "))
+            print("Latest recipe:", stats["last"].replace("T", " "))
+
+        if stats["top"]:
+            print("\nMost generated:")
+            for dish, count in stats["top"]:
+                print(f" • {dish} ({count}x)")
 
+        input("\nPress Enter to return.")
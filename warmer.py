@@ -0,0 +1,178 @@
+# warmer.py
+"""
+Background warming of the recipe API cache from popular queries.
+
+A fetched recipe is stored in the local corpus, so asking for its dish
+name again never reaches the API. What does are queries the corpus
+cannot answer: ones the API found nothing for, and ones worded unlike
+the name of the recipe it returned ("spicy chickpea stew" for "Chana
+Masala"). Those go through the scraper cache (see resilience.py), which
+counts them. Every WARM_INTERVAL seconds the warmer takes the WARM_TOP
+most requested cached queries the local corpus still does not answer
+and refetches those within REFRESH_AHEAD of expiring, so the next user
+asking does not wait on the API.
+
+The warmer stays out of the way of real requests: a couple of daemon
+threads, at most WARM_RATE API lookups per second, and no lookups at all
+while the circuit breaker is not closed.
+
+    python warmer.py              (one warming pass, then print the report)
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services import RecipeService
+
+WARM_TOP = int(os.environ.get("RECIPE_WARM_TOP", 20))
+WARM_INTERVAL = float(os.environ.get("RECIPE_WARM_INTERVAL", 900))  # 0 turns the warmer off
+WARM_WORKERS = 2
+WARM_RATE = 0.5            # lookups per second; each is two API calls
+REFRESH_AHEAD = 0.1        # refresh entries in the last 10% of their TTL
+
+
+class RateLimiter:
+    """Token bucket: acquire() blocks until one of rate-per-second tokens is free."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class CacheWarmer:
+    """
+    Keeps the scraper cache warm for popular queries. recipes is a
+    RecipeService; its scraper must be a ResilientScraper.
+    """
+
+    def __init__(self, recipes, top_n=WARM_TOP, interval=WARM_INTERVAL,
+                 workers=WARM_WORKERS, rate=WARM_RATE, refresh_ahead=REFRESH_AHEAD):
+        self.recipes = recipes
+        self.top_n = top_n
+        self.interval = interval
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.refresh_ahead = refresh_ahead
+
+        self.warm_set = []       # normalized queries the cache is kept warm for, most popular first
+        self.totals = {"runs": 0, "prefetched": 0, "failed": 0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def scraper(self):
+        return self.recipes.scraper
+
+    def runOnce(self):
+        """
+        One warming pass. Returns {"popular", "local", "fresh", "prefetched",
+        "failed", "skipped"}: popular counts the queries kept warm, local the
+        more requested ones the corpus answers by now, skipped those not
+        fetched because the circuit was open.
+        """
+        stats = {"popular": 0, "local": 0, "fresh": 0, "prefetched": 0, "failed": 0, "skipped": 0}
+        cache, breaker = self.scraper.cache, self.scraper.breaker
+        index = self.recipes.index
+
+        warm, due = [], []
+        for query in cache.popular():
+            if len(warm) >= self.top_n:
+                break
+            if index.search(query) is not None:
+                stats["local"] += 1
+                continue
+            warm.append(query)
+            if cache.isFresh(cache.get(query), self.refresh_ahead):
+                stats["fresh"] += 1
+            else:
+                due.append(query)
+        self.warm_set = warm
+        stats["popular"] = len(warm)
+
+        def prefetch(query):
+            if breaker.state != breaker.CLOSED:
+                return "skipped"
+            self.limiter.acquire()
+            try:
+                self.scraper.refresh(query)
+            except Exception:
+                return "failed"
+            return "prefetched"
+
+        if due:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cache-warmer") as pool:
+                for outcome in pool.map(prefetch, due):
+                    stats[outcome] += 1
+
+        self.totals["runs"] += 1
+        self.totals["prefetched"] += stats["prefetched"]
+        self.totals["failed"] += stats["failed"]
+        return stats
+
+    def report(self):
+        """Totals so far, with hits: lookups answered from the cache for a dish in the warm set."""
+        hits = self.scraper.cache.hits
+        return dict(self.totals, warm_set=len(self.warm_set), hits=sum(hits[query] for query in self.warm_set))
+
+    # ------------------------------
+    # BACKGROUND THREAD
+    # ------------------------------
+    def start(self):
+        """Warm now and then every interval seconds, in a daemon thread."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.runOnce()
+            except Exception as e:
+                # a failed pass is retried on the next tick
+                print(f"[warmer] pass failed: {type(e).__name__}")
+            self._stop.wait(self.interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the recipe API cache from popular queries.")
+    parser.add_argument("--top", type=int, default=WARM_TOP)
+    args = parser.parse_args(argv)
+
+    warmer = CacheWarmer(RecipeService(), top_n=args.top)
+    stats = warmer.runOnce()
+    print(f"{stats['popular']} popular queries need the API ({stats['local']} more are in the local corpus): "
+          f"{stats['fresh']} already cached, {stats['prefetched']} prefetched, "
+          f"{stats['failed']} failed, {stats['skipped']} skipped (API circuit open).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())